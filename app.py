@@ -7,6 +7,7 @@ from logic.find_instrument import FindInstrument
 from logic.save_results_path import SaveFilePath
 from pymeasure.experiment.procedure import Procedure
 from pymeasure.experiment.results import Results
+from pymeasure.experiment.catalog import Catalog
 from pymeasure.display.Qt import QtWidgets
 from pymeasure.display.windows.managed_dock_window import ManagedDockWindow
 from pymeasure.experiment import (
@@ -21,6 +22,11 @@ from modules.cims_mode import CIMSMode
 from modules.calibration_mode import FieldCalibrationMode
 from logic.find_instrument import FindInstrument
 from logic.save_parameters import SaveParameters
+from logic.phase_profiler import PhaseProfiler
+from hardware.session_pool import session_pool
+from logic.field_handover import FIELD_HANDOVER_MODES, can_hand_over, release_field
+from logic.duration_model import duration_model
+from collections import ChainMap
 
 from datetime import datetime
 from datetime import timedelta
@@ -42,7 +48,7 @@ class SpinLabMeasurement(Procedure):
 
     finded_instruments = find_instruments.show_instrument()
     daq_channels = [addr for addr in finded_instruments if "Dev" in addr]
-    used_parameters_list=['mode', 'sample_name', 'vector', 'mode_resistance', 'mode_fmr', 'set_measdevice_fmr', 'set_measdevice_qm', 'set_sourcemeter', 'set_multimeter','set_pulsegenerator', 'set_gaussmeter', 'set_field', 'set_lockin', 'set_automaticstation', 'set_rotationstation','set_switch', 'set_kriostat', 'set_lfgen', 'set_analyzer', 'set_generator', 'address_sourcemeter', 'address_multimeter','address_daq', 'address_polarity_control' , 'address_gaussmeter', 'address_lockin', 'address_switch', 'address_analyzer', 'address_generator', 'address_lfgen','address_pulsegenerator','sourcemter_source', 'sourcemeter_compliance', 'sourcemeter_channel', 'sourcemeter_limit', 'sourcemeter_nplc', 'sourcemeter_average', 'sourcemeter_bias', 'multimeter_function', 'multimeter_resolution','multimeter_nplc', 'multimeter_autorange', 'multimeter_range', 'multimeter_average', 'field_constant', 'gaussmeter_range', 'gaussmeter_resolution', 'lockin_average', 'lockin_input_coupling', 'lockin_reference_source', 'lockin_dynamic_reserve', 'lockin_input_connection', 'lockin_sensitivity','lockin_frequency', 'lockin_harmonic','lockin_sine_amplitude',  'lockin_timeconstant', 'lockin_slope', 'lockin_channel1','lockin_channel2' ,'lockin_autophase','generator_frequency', 'generator_power','generator_channel','lfgen_freq', 'lfgen_amp','set_field_value_fmr', 'field_step', 'delay_field', 'delay_lockin', 'delay_bias', 'rotation_axis', 'rotation_polar_constant', 'rotation_azimuth_constant', 'constant_field_value', 'address_rotationstation', 'mode_cims_relays','pulsegenerator_offset','pulsegenerator_duration','pulsegenerator_pulsetype','pulsegenerator_channel','delay_measurement','pulsegenerator_compliance','pulsegenerator_source_range','return_the_rotationstation','field_bias_value', 'polarity_control_enabled', 'remagnetization','remagnetization_value','remagnetization_time','hold_the_field_after_measurement','remanency_correction','set_polar_angle','set_azimuthal_angle','set_polar_angle_fmr','set_azimuthal_angle_fmr','remanency_correction_time', 'layout_type', 'kriostat_temperature']
+    used_parameters_list=['mode', 'sample_name', 'vector', 'mode_resistance', 'mode_fmr', 'set_measdevice_fmr', 'set_measdevice_qm', 'set_sourcemeter', 'set_multimeter','set_pulsegenerator', 'set_gaussmeter', 'set_field', 'set_lockin', 'set_automaticstation', 'set_rotationstation','set_switch', 'set_kriostat', 'set_lfgen', 'set_analyzer', 'set_generator', 'address_sourcemeter', 'address_multimeter','address_daq', 'address_polarity_control' , 'address_gaussmeter', 'address_lockin', 'address_switch', 'address_analyzer', 'address_generator', 'address_lfgen','address_pulsegenerator','sourcemter_source', 'sourcemeter_compliance', 'sourcemeter_channel', 'sourcemeter_limit', 'sourcemeter_nplc', 'sourcemeter_average', 'sourcemeter_bias', 'multimeter_function', 'multimeter_resolution','multimeter_nplc', 'multimeter_autorange', 'multimeter_range', 'multimeter_average', 'field_constant', 'gaussmeter_range', 'gaussmeter_resolution', 'lockin_average', 'lockin_input_coupling', 'lockin_reference_source', 'lockin_dynamic_reserve', 'lockin_input_connection', 'lockin_sensitivity','lockin_frequency', 'lockin_harmonic','lockin_sine_amplitude',  'lockin_timeconstant', 'lockin_slope', 'lockin_channel1','lockin_channel2' ,'lockin_autophase', 'lockin_buffered_average', 'lockin_sample_frequency','generator_frequency', 'generator_power','generator_channel','lfgen_freq', 'lfgen_amp','set_field_value_fmr', 'field_step', 'field_ramp_rate', 'field_settle_adaptive', 'field_settle_tolerance', 'field_settle_readings', 'concurrent_readout', 'delay_field', 'delay_lockin', 'delay_bias', 'rotation_axis', 'rotation_polar_constant', 'rotation_azimuth_constant', 'constant_field_value', 'address_rotationstation', 'mode_cims_relays','pulsegenerator_offset','pulsegenerator_duration','pulsegenerator_pulsetype','pulsegenerator_channel','delay_measurement','pulsegenerator_compliance','pulsegenerator_source_range','return_the_rotationstation','field_bias_value', 'polarity_control_enabled', 'remagnetization','remagnetization_value','remagnetization_time','hold_the_field_after_measurement','remanency_correction','set_polar_angle','set_azimuthal_angle','set_polar_angle_fmr','set_azimuthal_angle_fmr','remanency_correction_time', 'layout_type', 'kriostat_temperature']
     parameters_from_file = save_parameter.ReadFile()
 #################################################################### METADATA #####################################################################  
     time_of_measurement = Metadata("Measurement start time", default=datetime.now().strftime("%Y-%m-%d %H:%M:%S"))
@@ -141,6 +147,8 @@ class SpinLabMeasurement(Procedure):
     lockin_timeconstant = ListParameter("Lockin Time Constant", default = parameters_from_file["lockin_timeconstant"], choices = ["10 us", "30 us", "100 us", "300 us", "1 ms", "3 ms", "10 ms", "30 ms", "100 ms", "300 ms", "1 s", "3 s", "10 s", "30 s", "100 s", "300 s", "1 ks", "3 ks", "10 ks", "30 ks"],vis_cond=lockin_params_vis_cond)
     lockin_slope = ListParameter("Lockin Slope", default = parameters_from_file["lockin_slope"], choices = ["6 dB/Oct", "12 dB/Oct", "18 dB/Oct", "24 dB/Oct"], vis_cond=lockin_params_vis_cond)
     lockin_autophase = BooleanParameter("Lockin Autophase", default = parameters_from_file["lockin_autophase"], vis_cond=lockin_params_vis_cond)
+    lockin_buffered_average = BooleanParameter("Lockin Buffered Average", default = parameters_from_file["lockin_buffered_average"], vis_cond=(SETTINGS, lambda mode, set_measdevice_fmr, set_lockin, address_lockin: set_lockin == "SR830" and address_lockin != "None" and (mode == "HarmonicMode" or (mode == "FMRMode" and set_measdevice_fmr == "LockIn"))))
+    lockin_sample_frequency = ListParameter("Lockin Sample Rate", default = parameters_from_file["lockin_sample_frequency"], choices = [62.5e-3, 125e-3, 250e-3, 500e-3, 1, 2, 4, 8, 16, 32, 64, 128, 256, 512], units="Hz", vis_cond=(SETTINGS, lambda mode, set_measdevice_fmr, set_lockin, address_lockin, lockin_buffered_average: set_lockin == "SR830" and address_lockin != "None" and lockin_buffered_average == True and (mode == "HarmonicMode" or (mode == "FMRMode" and set_measdevice_fmr == "LockIn"))))
     lockin_channel1 = ListParameter("Lockin Channel 1", default = parameters_from_file["lockin_channel1"], choices = ["X", "Y", "R", "Theta", "Aux In 1", "Aux In 2", "Aux In 3", "Aux In 4"], vis_cond=lockin_params_vis_cond)
     lockin_channel2 = ListParameter("Lockin Channel 2", default = parameters_from_file["lockin_channel2"], choices = ["X", "Y", "R", "Theta", "Aux In 1", "Aux In 2", "Aux In 3", "Aux In 4"], vis_cond=lockin_params_vis_cond)
     
@@ -153,6 +161,11 @@ class SpinLabMeasurement(Procedure):
     field_constant = FloatParameter("Field Calibration Constant", default = parameters_from_file["field_constant"], vis_cond=(SETTINGS, lambda mode: mode != "QuickMeasurement"))
     set_field_value_fmr = FloatParameter("Set Constant Field Value", default = parameters_from_file["set_field_value_fmr"], units="Oe", vis_cond =(PARAMETERS, lambda mode, mode_fmr: mode == "FMRMode" and mode_fmr == "ST-FMR"))
     field_step = FloatParameter("Field sweep step", default = parameters_from_file["field_step"], units="Oe", vis_cond=(PARAMETERS, lambda mode: mode != "CalibrationFieldMode" and mode != "QuickMeasurement"))
+    field_settle_adaptive = BooleanParameter("Adaptive field settling", default = parameters_from_file["field_settle_adaptive"], vis_cond=(SETTINGS, lambda mode, set_gaussmeter: set_gaussmeter != "none" and (mode == "ResistanceMode" or mode == "HarmonicMode" or mode == "FMRMode")))
+    field_settle_tolerance = FloatParameter("Field settling tolerance", default = parameters_from_file["field_settle_tolerance"], units="Oe", minimum=0, vis_cond=(SETTINGS, lambda mode, set_gaussmeter, field_settle_adaptive: set_gaussmeter != "none" and field_settle_adaptive == True and (mode == "ResistanceMode" or mode == "HarmonicMode" or mode == "FMRMode")))
+    field_settle_readings = IntegerParameter("Field settling readings", default = parameters_from_file["field_settle_readings"], minimum=1, vis_cond=(SETTINGS, lambda mode, set_gaussmeter, field_settle_adaptive: set_gaussmeter != "none" and field_settle_adaptive == True and (mode == "ResistanceMode" or mode == "HarmonicMode" or mode == "FMRMode")))
+    concurrent_readout = BooleanParameter("Concurrent readout", default = parameters_from_file["concurrent_readout"], vis_cond=(SETTINGS, lambda mode, set_gaussmeter: set_gaussmeter != "none" and (mode == "ResistanceMode" or mode == "HarmonicMode" or mode == "FMRMode")))
+    field_ramp_rate = FloatParameter("Field ramp rate", default = parameters_from_file["field_ramp_rate"], units="V/s", minimum=0.001, vis_cond=(SETTINGS, lambda mode, set_field: set_field == "DAQ" and mode != "CalibrationFieldMode" and mode != "QuickMeasurement"))
     constant_field_value =  FloatParameter("Set Constant Field Value", default = parameters_from_file["constant_field_value"], units="Oe", vis_cond=(SETTINGS, lambda mode, set_rotationstation: set_rotationstation == True and mode != "QuickMeasurement"))
     field_bias_value= FloatParameter("Set Field Bias Value", default = parameters_from_file['field_bias_value'], units="Oe", vis_cond=(PARAMETERS, lambda mode: mode == "CIMSMode"))
     polarity_control_enabled = BooleanParameter("Polarity control", default = parameters_from_file["polarity_control_enabled"], vis_cond=(SETTINGS, lambda mode: mode=="FMRMode"))
@@ -201,7 +214,7 @@ class SpinLabMeasurement(Procedure):
     iterator= IntegerParameter("Iterator", default = 0, vis_cond=(NOT_VISIBLE))
 
     DEBUG = 1
-    DATA_COLUMNS = ['Voltage (V)', 'Current (A)', 'Resistance (ohm)', 'Field (Oe)', 'Frequency (Hz)', 'X (V)', 'Y (V)', 'Phase', 'Polar angle (deg)', 'Azimuthal angle (deg)','Applied Voltage (V)' ]
+    DATA_COLUMNS = ['Voltage (V)', 'Current (A)', 'Resistance (ohm)', 'Field (Oe)', 'Frequency (Hz)', 'X (V)', 'Y (V)', 'Phase', 'Polar angle (deg)', 'Azimuthal angle (deg)','Applied Voltage (V)', 'Resistance std (ohm)', 'X std (V)', 'Y std (V)', 'Phase std', 'Settle time (s)' ]
     path_file = SaveFilePath()
     
     def refresh_parameters(self):
@@ -233,30 +246,62 @@ class SpinLabMeasurement(Procedure):
         
         self.save_parameter.WriteFile(self.parameters, window.directory, window.file_input.filename_base)
 
+        self.kriostat_duration = 0.0
         if self.set_kriostat:
+            kriostat_start = time()
             try:
                 window.devices_widget.lakeshore336_control.set_setpoint_wait(self.kriostat_temperature, window.manager.aborted)
             except AttributeError as e:
                 logging.error("No kriostat control")
+            self.kriostat_duration = time() - kriostat_start
                 
         self.selected_mode = None
         
         match self.mode:
             case "ResistanceMode":
-                self.selected_mode = ResistanceMode(self.vector, self.mode_resistance, self.sourcemeter_bias, self.set_sourcemeter, self.set_multimeter, self.set_gaussmeter, self.set_field, self.set_automaticstation, self.set_switch, self.set_kriostat, self.set_rotationstation,self.return_the_rotationstation, self.address_sourcemeter, self.address_multimeter, self.address_gaussmeter, self.address_switch, self.delay_field, self.delay_lockin, self.delay_bias, self.sourcemter_source, self.sourcemeter_compliance, self.sourcemeter_channel, self.sourcemeter_limit, self.sourcemeter_nplc, self.sourcemeter_average, self.multimeter_function, self.multimeter_resolution, self.multimeter_autorange, self.multimeter_range, self.multimeter_average, self.field_constant, self.gaussmeter_range, self.gaussmeter_resolution, self.multimeter_nplc, self.address_daq, self.field_step, self.address_rotationstation, self.constant_field_value,self.rotation_axis, self.rotation_polar_constant, self.rotation_azimuth_constant,self.set_polar_angle,self.set_azimuthal_angle)
+                self.selected_mode = ResistanceMode(self.vector, self.mode_resistance, self.sourcemeter_bias, self.set_sourcemeter, self.set_multimeter, self.set_gaussmeter, self.set_field, self.set_automaticstation, self.set_switch, self.set_kriostat, self.set_rotationstation,self.return_the_rotationstation, self.address_sourcemeter, self.address_multimeter, self.address_gaussmeter, self.address_switch, self.delay_field, self.delay_lockin, self.delay_bias, self.sourcemter_source, self.sourcemeter_compliance, self.sourcemeter_channel, self.sourcemeter_limit, self.sourcemeter_nplc, self.sourcemeter_average, self.multimeter_function, self.multimeter_resolution, self.multimeter_autorange, self.multimeter_range, self.multimeter_average, self.field_constant, self.gaussmeter_range, self.gaussmeter_resolution, self.multimeter_nplc, self.address_daq, self.field_step, self.address_rotationstation, self.constant_field_value,self.rotation_axis, self.rotation_polar_constant, self.rotation_azimuth_constant,self.set_polar_angle,self.set_azimuthal_angle, self.field_ramp_rate, self.field_settle_adaptive, self.field_settle_tolerance, self.field_settle_readings, self.concurrent_readout)
             case "HarmonicMode":
-                self.selected_mode = HarmonicMode(self.set_automaticstation, self.set_lockin, self.set_field, self.set_gaussmeter,  self.set_rotationstation, self.address_lockin, self.address_gaussmeter, self.vector, self.delay_field, self.delay_lockin, self.delay_bias, self.lockin_average, self.lockin_input_coupling, self.lockin_reference_source, self.lockin_dynamic_reserve, self.lockin_input_connection, self.lockin_sensitivity, self.lockin_timeconstant, self.lockin_autophase, self.lockin_frequency, self.lockin_harmonic, self.lockin_sine_amplitude,  self.lockin_channel1, self.lockin_channel2, self.field_constant, self.gaussmeter_range, self.gaussmeter_resolution, self.address_daq, self.field_step, self.set_rotationstation, self.address_rotationstation, self.constant_field_value, self.rotation_axis, self.rotation_polar_constant, self.rotation_azimuth_constant, self.set_polar_angle,self.set_azimuthal_angle, self.hold_the_field_after_measurement, self.return_the_rotationstation, self.lockin_slope)
+                self.selected_mode = HarmonicMode(self.set_automaticstation, self.set_lockin, self.set_field, self.set_gaussmeter,  self.set_rotationstation, self.address_lockin, self.address_gaussmeter, self.vector, self.delay_field, self.delay_lockin, self.delay_bias, self.lockin_average, self.lockin_input_coupling, self.lockin_reference_source, self.lockin_dynamic_reserve, self.lockin_input_connection, self.lockin_sensitivity, self.lockin_timeconstant, self.lockin_autophase, self.lockin_frequency, self.lockin_harmonic, self.lockin_sine_amplitude,  self.lockin_channel1, self.lockin_channel2, self.field_constant, self.gaussmeter_range, self.gaussmeter_resolution, self.address_daq, self.field_step, self.set_rotationstation, self.address_rotationstation, self.constant_field_value, self.rotation_axis, self.rotation_polar_constant, self.rotation_azimuth_constant, self.set_polar_angle,self.set_azimuthal_angle, self.hold_the_field_after_measurement, self.return_the_rotationstation, self.lockin_slope, self.lockin_buffered_average, self.lockin_sample_frequency, self.field_ramp_rate, self.field_settle_adaptive, self.field_settle_tolerance, self.field_settle_readings, self.concurrent_readout)
             case "FMRMode":
-                self.selected_mode = FMRMode(self.set_automaticstation, self.set_lockin, self.set_field, self.set_gaussmeter, self.set_generator, self.set_rotationstation, self.address_lockin, self.address_gaussmeter, self.vector, self.delay_field, self.delay_lockin, self.delay_bias, self.lockin_average, self.lockin_input_coupling, self.lockin_reference_source,self.lockin_dynamic_reserve, self.lockin_input_connection, self.lockin_sensitivity, self.lockin_timeconstant, self.lockin_autophase, self.lockin_frequency, self.lockin_harmonic, self.lockin_sine_amplitude, self.lockin_channel1, self.lockin_channel2, self.field_constant, self.gaussmeter_range, self.gaussmeter_resolution, self.address_generator, self.set_field_value_fmr, self.generator_frequency, self.generator_power,  self.mode_fmr, self.address_daq, self.set_lfgen, self.address_lfgen, self.lfgen_freq, self.lfgen_amp, self.field_step, self.set_rotationstation, self.address_rotationstation, self.constant_field_value, self.rotation_axis, self.set_polar_angle_fmr, self.set_azimuthal_angle_fmr, self.hold_the_field_after_measurement, self.return_the_rotationstation, self.set_multimeter, self.address_multimeter, self.multimeter_function, self.multimeter_resolution, self.multimeter_autorange, self.multimeter_range, self.multimeter_average, self.multimeter_nplc, self.set_measdevice_fmr, self.generator_channel, self.lockin_slope, self.polarity_control_enabled, self.address_polarity_control)
+                self.selected_mode = FMRMode(self.set_automaticstation, self.set_lockin, self.set_field, self.set_gaussmeter, self.set_generator, self.set_rotationstation, self.address_lockin, self.address_gaussmeter, self.vector, self.delay_field, self.delay_lockin, self.delay_bias, self.lockin_average, self.lockin_input_coupling, self.lockin_reference_source,self.lockin_dynamic_reserve, self.lockin_input_connection, self.lockin_sensitivity, self.lockin_timeconstant, self.lockin_autophase, self.lockin_frequency, self.lockin_harmonic, self.lockin_sine_amplitude, self.lockin_channel1, self.lockin_channel2, self.field_constant, self.gaussmeter_range, self.gaussmeter_resolution, self.address_generator, self.set_field_value_fmr, self.generator_frequency, self.generator_power,  self.mode_fmr, self.address_daq, self.set_lfgen, self.address_lfgen, self.lfgen_freq, self.lfgen_amp, self.field_step, self.set_rotationstation, self.address_rotationstation, self.constant_field_value, self.rotation_axis, self.set_polar_angle_fmr, self.set_azimuthal_angle_fmr, self.hold_the_field_after_measurement, self.return_the_rotationstation, self.set_multimeter, self.address_multimeter, self.multimeter_function, self.multimeter_resolution, self.multimeter_autorange, self.multimeter_range, self.multimeter_average, self.multimeter_nplc, self.set_measdevice_fmr, self.generator_channel, self.lockin_slope, self.polarity_control_enabled, self.address_polarity_control, self.lockin_buffered_average, self.lockin_sample_frequency, self.field_ramp_rate, self.field_settle_adaptive, self.field_settle_tolerance, self.field_settle_readings, self.concurrent_readout)
             case "CalibrationFieldMode": 
                 self.selected_mode = FieldCalibrationMode(self.set_field, self.set_gaussmeter, self.address_daq, self.address_gaussmeter, self.vector, self.delay_field)
             case "CIMSMode":
-                self.CIMSmode = CIMSMode(self.vector, self.mode_cims_relays, self.sourcemeter_bias, self.set_sourcemeter, self.set_multimeter,self.set_pulsegenerator, self.set_gaussmeter, self.set_field, self.set_automaticstation, self.set_switch, self.set_kriostat, self.set_rotationstation,self.return_the_rotationstation, self.address_sourcemeter, self.address_multimeter,self.address_pulsegenerator, self.address_gaussmeter, self.address_switch, self.delay_field, self.delay_measurement, self.delay_bias, self.sourcemter_source, self.sourcemeter_compliance, self.sourcemeter_channel, self.sourcemeter_limit, self.sourcemeter_nplc, self.sourcemeter_average, self.multimeter_function, self.multimeter_resolution, self.multimeter_autorange, self.multimeter_range, self.multimeter_average, self.field_constant, self.gaussmeter_range, self.gaussmeter_resolution, self.multimeter_nplc, self.address_daq, self.field_step, self.address_rotationstation, self.constant_field_value,self.rotation_axis, self.rotation_polar_constant, self.rotation_azimuth_constant,self.pulsegenerator_duration,self.pulsegenerator_offset,self.pulsegenerator_pulsetype,self.pulsegenerator_channel,self.pulsegenerator_compliance,self.pulsegenerator_source_range,self.field_bias_value,self.remagnetization,self. remagnetization_value,self.remagnetization_time,self.hold_the_field_after_measurement,self.remanency_correction,self.remanency_correction_time,self.set_polar_angle,self.set_azimuthal_angle)
+                self.selected_mode = CIMSMode(self.vector, self.mode_cims_relays, self.sourcemeter_bias, self.set_sourcemeter, self.set_multimeter,self.set_pulsegenerator, self.set_gaussmeter, self.set_field, self.set_automaticstation, self.set_switch, self.set_kriostat, self.set_rotationstation,self.return_the_rotationstation, self.address_sourcemeter, self.address_multimeter,self.address_pulsegenerator, self.address_gaussmeter, self.address_switch, self.delay_field, self.delay_measurement, self.delay_bias, self.sourcemter_source, self.sourcemeter_compliance, self.sourcemeter_channel, self.sourcemeter_limit, self.sourcemeter_nplc, self.sourcemeter_average, self.multimeter_function, self.multimeter_resolution, self.multimeter_autorange, self.multimeter_range, self.multimeter_average, self.field_constant, self.gaussmeter_range, self.gaussmeter_resolution, self.multimeter_nplc, self.address_daq, self.field_step, self.address_rotationstation, self.constant_field_value,self.rotation_axis, self.rotation_polar_constant, self.rotation_azimuth_constant,self.pulsegenerator_duration,self.pulsegenerator_offset,self.pulsegenerator_pulsetype,self.pulsegenerator_channel,self.pulsegenerator_compliance,self.pulsegenerator_source_range,self.field_bias_value,self.remagnetization,self. remagnetization_value,self.remagnetization_time,self.hold_the_field_after_measurement,self.remanency_correction,self.remanency_correction_time,self.set_polar_angle,self.set_azimuthal_angle, self.field_ramp_rate)
             case _:
                 raise NotImplementedError(f"Mode: '{self.mode}' is not implemented!")
              
+        self.profiler = PhaseProfiler(PhaseProfiler.sidecar_filename(window.manager.running_experiment().results.data_filename))
+        window.phase_timing_widget.set_profiler(self.profiler)
+        self.selected_mode.profiler = self.profiler
+
+        field_state = window.manager.field_state
+        if field_state is not None and not can_hand_over(field_state, self.parameter_values()):
+            # The field left on by the previous experiment is not used by this one, switch it off first
+            window.manager.field_state = None
+            release_field(field_state)
+            field_state = None
+        if self.mode in FIELD_HANDOVER_MODES:
+            self.selected_mode.field_state = field_state
+
         self.points = self.selected_mode.generate_points()
-        self.selected_mode.initializing()
+        initializing_start = time()
+        try:
+            self.selected_mode.initializing()
+        except Exception:
+            # A failed initialization leaves the instruments in an unknown state, reopen them next time
+            session_pool.close_all()
+            if field_state is not None:
+                # The field is not taken over, switch it off from where the ramp left it
+                window.manager.field_state = None
+                field_obj = getattr(self.selected_mode, "field_obj", None)
+                current = field_obj.field_state() if hasattr(field_obj, "field_state") else {}
+                release_field({**field_state, **current} if current.get("address") and current.get("field_constant") else field_state)
+            raise
+        # The field is cleared only once the ramp from it has completed
+        window.manager.field_state = None
+        # A ramp from a handed over field is not the one modelled by the duration model
+        self.start_duration = time() - initializing_start if field_state is None else None
 
         window.inputs.number_of_points.setValue(len(self.points)) 
 
@@ -274,12 +319,19 @@ class SpinLabMeasurement(Procedure):
         
         for point in self.points:
             start_time = time()
+            self.profiler.start()
             
-            self.result = self.selected_mode.operating(point)
+            try:
+                self.result = self.selected_mode.operating(point)
+            except Exception:
+                session_pool.close_all()
+                raise
             
             self.emit('results', self.result)
             self.emit('progress', 100 * self.counter / len(self.points))
             self.emit('current_point', point)
+            self.profiler.mark("Emit and record")
+            self.profiler.stop()
             
             self.counter = self.counter + 1
             
@@ -289,18 +341,50 @@ class SpinLabMeasurement(Procedure):
                 log.warning("Caught the stop flag in the procedure")
                 break
             
+        self.selected_mode.handover_field = self.hands_over_field()
+        end_start = time()
         self.selected_mode.end()
+        end_duration = time() - end_start
+        if self.selected_mode.handover_field:
+            window.manager.field_state = {
+                **self.selected_mode.field_obj.field_state(),
+                # used to check that the next experiment takes the field over and to switch it off otherwise
+                **{name: getattr(self, name) for name in ("mode", "set_field", "address_daq", "field_step", "field_ramp_rate")},
+            }
+        elif not self.should_stop() and self.counter == len(self.points):
+            self.record_durations(end_duration)
+
+    def record_durations(self, end_duration):
+        """Calibrates the duration model with the phase timings of this run."""
+        point_phases = {phase: mean for phase, (mean, p95) in self.profiler.summary().items() if phase != "Total"}
+        start_phases = {"Kriostat": self.kriostat_duration} if self.set_kriostat else {}
+        if self.start_duration is not None:
+            start_phases["Start"] = self.start_duration
+        duration_model.record(self.parameter_values(), point_phases, start_phases, {"End": end_duration})
+    
+    def hands_over_field(self):
+        """Returns True if the field is left on for the next experiment of the queue, which ramps from it directly."""
+        if self.should_stop() or self.mode not in FIELD_HANDOVER_MODES:
+            return False
+        next_experiment = window.manager.next_experiment()
+        if next_experiment is None:
+            return False
+        return can_hand_over(self.parameter_values(), next_experiment.procedure.parameter_values())
     
     def shutdown(self):
         pass
     
     def get_estimates(self, sequence_length=None, sequence=None):
-        duration = self.point_meas_duration * self.number_of_points
+        parameters = self.parameter_values()
+        estimate = duration_model.estimate(parameters)
+        duration = estimate["total"]
         total_duration = round(duration)
-        if sequence_length is not None:
-            total_duration  = round(duration * (sequence_length if sequence_length > 0 else 1))
+        if sequence:
+            # Every queued procedure starts from the current inputs, overridden by its sequence entry
+            total_duration = round(duration_model.estimate_sequence([{**parameters, **dict(ChainMap(*entry[::-1]))} for entry in sequence]))
         estimates = [
             ("Single:", str(timedelta(seconds=round(duration)))),
+            ("Per point:", f"{estimate['point']:.2f} s"),
             ("Total:", str(timedelta(seconds=total_duration))),
             ('Measurement finished at', str((datetime.now() + timedelta(seconds=total_duration)).strftime("%Y-%m-%d %H:%M:%S"))),
         ]
@@ -314,7 +398,7 @@ class MainWindow(ManagedDockWindow):
     def __init__(self):
         super().__init__(
             procedure_class= SpinLabMeasurement,
-            inputs = ['mode', 'sample_name', 'vector', 'mode_resistance', 'mode_fmr', 'set_measdevice_qm', 'set_sourcemeter','set_pulsegenerator', 'set_measdevice_fmr', 'set_multimeter', 'set_gaussmeter', 'set_field','address_daq', 'polarity_control_enabled', 'address_polarity_control', 'set_lockin', 'set_automaticstation', 'set_rotationstation','address_rotationstation','rotation_axis', 'set_polar_angle','set_azimuthal_angle','set_polar_angle_fmr','set_azimuthal_angle_fmr', 'rotation_polar_constant', 'rotation_azimuth_constant','set_switch', 'set_kriostat', "kriostat_temperature", 'set_lfgen', 'set_analyzer', 'set_generator', 'address_generator','generator_channel','address_sourcemeter', 'address_multimeter', 'address_gaussmeter', 'address_lockin', 'address_switch', 'address_analyzer', 'address_lfgen','address_pulsegenerator','sourcemter_source', 'sourcemeter_compliance', 'sourcemeter_channel', 'sourcemeter_limit', 'sourcemeter_nplc', 'sourcemeter_average', 'sourcemeter_bias', 'multimeter_function', 'multimeter_resolution','multimeter_nplc', 'multimeter_autorange', 'multimeter_range', 'multimeter_average', 'field_constant', 'constant_field_value', 'gaussmeter_range', 'gaussmeter_resolution', 'lockin_average', 'lockin_input_coupling', 'lockin_reference_source', 'lockin_dynamic_reserve', 'lockin_input_connection', 'lockin_sensitivity','lockin_frequency', 'lockin_harmonic','lockin_sine_amplitude',  'lockin_timeconstant', 'lockin_slope', 'lockin_channel1','lockin_channel2' ,'lockin_autophase','generator_frequency', 'generator_power', 'lfgen_freq', 'lfgen_amp','set_field_value_fmr', 'field_step', 'delay_field', 'delay_lockin', 'delay_bias','mode_cims_relays','pulsegenerator_offset','pulsegenerator_duration','pulsegenerator_pulsetype','pulsegenerator_channel','pulsegenerator_compliance','pulsegenerator_source_range','delay_measurement','field_bias_value','remanency_correction','remanency_correction_time','remagnetization','remagnetization_value','remagnetization_time','hold_the_field_after_measurement','return_the_rotationstation', 'layout_type', 'point_meas_duration', 'number_of_points'],
+            inputs = ['mode', 'sample_name', 'vector', 'mode_resistance', 'mode_fmr', 'set_measdevice_qm', 'set_sourcemeter','set_pulsegenerator', 'set_measdevice_fmr', 'set_multimeter', 'set_gaussmeter', 'set_field','address_daq', 'polarity_control_enabled', 'address_polarity_control', 'set_lockin', 'set_automaticstation', 'set_rotationstation','address_rotationstation','rotation_axis', 'set_polar_angle','set_azimuthal_angle','set_polar_angle_fmr','set_azimuthal_angle_fmr', 'rotation_polar_constant', 'rotation_azimuth_constant','set_switch', 'set_kriostat', "kriostat_temperature", 'set_lfgen', 'set_analyzer', 'set_generator', 'address_generator','generator_channel','address_sourcemeter', 'address_multimeter', 'address_gaussmeter', 'address_lockin', 'address_switch', 'address_analyzer', 'address_lfgen','address_pulsegenerator','sourcemter_source', 'sourcemeter_compliance', 'sourcemeter_channel', 'sourcemeter_limit', 'sourcemeter_nplc', 'sourcemeter_average', 'sourcemeter_bias', 'multimeter_function', 'multimeter_resolution','multimeter_nplc', 'multimeter_autorange', 'multimeter_range', 'multimeter_average', 'field_constant', 'constant_field_value', 'gaussmeter_range', 'gaussmeter_resolution', 'lockin_average', 'lockin_input_coupling', 'lockin_reference_source', 'lockin_dynamic_reserve', 'lockin_input_connection', 'lockin_sensitivity','lockin_frequency', 'lockin_harmonic','lockin_sine_amplitude',  'lockin_timeconstant', 'lockin_slope', 'lockin_channel1','lockin_channel2' ,'lockin_autophase', 'lockin_buffered_average', 'lockin_sample_frequency','generator_frequency', 'generator_power', 'lfgen_freq', 'lfgen_amp','set_field_value_fmr', 'field_step', 'field_ramp_rate', 'field_settle_adaptive', 'field_settle_tolerance', 'field_settle_readings', 'concurrent_readout', 'delay_field', 'delay_lockin', 'delay_bias','mode_cims_relays','pulsegenerator_offset','pulsegenerator_duration','pulsegenerator_pulsetype','pulsegenerator_channel','pulsegenerator_compliance','pulsegenerator_source_range','delay_measurement','field_bias_value','remanency_correction','remanency_correction_time','remagnetization','remagnetization_value','remagnetization_time','hold_the_field_after_measurement','return_the_rotationstation', 'layout_type', 'point_meas_duration', 'number_of_points'],
             x_axis=['Field (Oe)', 'Voltage (V)'],
             y_axis=['Field (Oe)', 'Resistance (ohm)'],
             # directory_input=True,  
@@ -323,15 +407,17 @@ class MainWindow(ManagedDockWindow):
             sequencer_inputs=['constant_field_value',"generator_frequency", "kriostat_temperature", ""],
             inputs_in_scrollarea=True,
             ext_devices = [CameraControl, WaterCoolerControl, Lakeshore336Control],
+            catalog_file=Catalog.default_filename(),
             
         )
        
         self.setWindowTitle('SpinLabAPP v.1.00')
+        self.manager.field_release = release_field
         directory, filename = self.procedure_class.path_file.ReadFile()
         self.directory = directory
         self.filename = filename
         self.store_measurement = False                              # Controls the 'Save data' toggle
-        self.file_input.extensions = ["csv", "txt", "data"]         # Sets recognized extensions, first entry is the default extension
+        self.file_input.extensions = ["csv", "txt", "data", "pmb", "csv.gz", "csv.zst"]         # Sets recognized extensions, first entry is the default extension
         self.file_input.filename_fixed = False 
         
         self.tabs.currentChanged.connect(self.on_tab_change)
@@ -388,6 +474,7 @@ class MainWindow(ManagedDockWindow):
     
 if __name__ == "__main__":
     app = QtWidgets.QApplication(sys.argv)
+    app.aboutToQuit.connect(session_pool.close_all)
     window = MainWindow()
     window.show()
     sys.exit(app.exec_())
@@ -0,0 +1,64 @@
+"""Compare opening plain and compressed CSV data files.
+
+Writes one data file with the given number of rows, stores it as .csv,
+.csv.gz and .csv.zst (if zstandard is installed), and times Results.load
+followed by reading the data, as done when a file is opened in the Browser.
+Run from the repository root:
+
+    python -m benchmarks.compressed_load --rows 500000
+"""
+import argparse
+import os
+import tempfile
+import time
+
+import numpy as np
+
+from pymeasure.experiment import Procedure, Results
+from pymeasure.experiment import compression
+from pymeasure.experiment.compression import convert
+
+COLUMNS = ["Field (Oe)", "Voltage (V)", "X (V)", "Y (V)", "Phase", "Temperature (K)"]
+
+
+class BenchmarkProcedure(Procedure):
+    DATA_COLUMNS = COLUMNS
+
+
+def open_file(filename: str, repeats: int) -> float:
+    durations = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        Results.load(filename).data
+        durations.append(time.perf_counter() - start)
+    return min(durations)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=200000, help="number of rows of the data file")
+    parser.add_argument("--repeats", type=int, default=3, help="openings per file, the fastest counts")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        plain = os.path.join(directory, "data.csv")
+        results = Results(BenchmarkProcedure(), plain)
+        data = np.random.random((args.rows, len(COLUMNS)))
+        results.write_data(results.formatter.frame([dict(zip(COLUMNS, row)) for row in data.tolist()]))
+
+        filenames = [plain, convert(plain, plain + ".gz")]
+        if compression.zstandard is not None:
+            filenames.append(convert(plain, plain + ".zst"))
+        else:
+            print("zstandard is not installed, skipping .csv.zst")
+
+        size = os.path.getsize(plain)
+        for filename in filenames:
+            duration = open_file(filename, args.repeats)
+            print(f"{os.path.basename(filename):>14}: {duration * 1e3:8.1f} ms, "
+                  f"{size / duration / 1e6:7.1f} MB/s of CSV, "
+                  f"ratio {size / os.path.getsize(filename):5.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+"""Compare the per-point readout time with sequential and concurrent reads.
+
+Runs the readout stage of a measurement point (gaussmeter read, bias delay,
+lock-in readout) once sequentially and once through ConcurrentReadout, which
+reads the gaussmeter while the bias delay and the lock-in readout run.
+Without addresses the instruments are simulated with the given latencies;
+with --gaussmeter and --lockin a GM700 and an SR830 are read. Run from the
+repository root:
+
+    python -m benchmarks.concurrent_readout --points 50
+    python -m benchmarks.concurrent_readout --gaussmeter ASRL3::INSTR --lockin GPIB0::8::INSTR
+"""
+import argparse
+import time
+
+import numpy as np
+
+from logic.concurrent_readout import ConcurrentReadout, shared_bus
+
+
+class SimulatedInstrument:
+    def __init__(self, latency: float):
+        self.latency = latency
+
+    def measure(self):
+        time.sleep(self.latency)
+        return np.random.random()
+
+    def snap(self, val1="X", val2="Y"):
+        time.sleep(self.latency)
+        return np.random.random(), np.random.random()
+
+
+def run_points(readout: ConcurrentReadout, gaussmeter, lockin, points: int, delay_bias: float, average: int) -> np.ndarray:
+    durations = []
+    for _ in range(points):
+        start = time.perf_counter()
+        readout.submit("field", gaussmeter.measure)
+        time.sleep(delay_bias)
+        readout.submit("lockin", lambda: [lockin.snap("X", "Y") for _ in range(average)])
+        readout.join()
+        durations.append(time.perf_counter() - start)
+    readout.shutdown()
+    return np.array(durations)
+
+
+def report(name: str, durations: np.ndarray):
+    print(f"{name:>12}: mean {durations.mean() * 1e3:8.1f} ms, "
+          f"median {np.median(durations) * 1e3:8.1f} ms, "
+          f"p95 {np.percentile(durations, 95) * 1e3:8.1f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--points", type=int, default=20, help="number of points per method")
+    parser.add_argument("--delay-bias", type=float, default=0.05, help="bias delay in s")
+    parser.add_argument("--average", type=int, default=5, help="number of lock-in snaps per point")
+    parser.add_argument("--gaussmeter-latency", type=float, default=0.1, help="simulated gaussmeter read in s")
+    parser.add_argument("--lockin-latency", type=float, default=0.02, help="simulated lock-in snap in s")
+    parser.add_argument("--gaussmeter", help="VISA address of a GM700")
+    parser.add_argument("--lockin", help="VISA address of an SR830")
+    args = parser.parse_args()
+
+    if args.gaussmeter and args.lockin:
+        from hardware.GM_700 import GM700
+        from hardware.sr830 import SR830
+        gaussmeter, lockin = GM700(args.gaussmeter), SR830(args.lockin)
+        if shared_bus(args.gaussmeter, args.lockin):
+            print("warning: both instruments share a GPIB board, the modes read them sequentially")
+    else:
+        gaussmeter = SimulatedInstrument(args.gaussmeter_latency)
+        lockin = SimulatedInstrument(args.lockin_latency)
+
+    sequential = run_points(ConcurrentReadout(False), gaussmeter, lockin, args.points, args.delay_bias, args.average)
+    concurrent = run_points(ConcurrentReadout(True), gaussmeter, lockin, args.points, args.delay_bias, args.average)
+
+    report("sequential", sequential)
+    report("concurrent", concurrent)
+    print(f"saving per point (mean): {(sequential.mean() - concurrent.mean()) * 1e3:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+"""Compare per-write latency of the DAQ analog output.
+
+Writes the same voltage sequence once by creating a new nidaqmx task for
+every write (the old DAQ behaviour) and once through DAQ.set_voltage, which
+keeps one task open. Run from the repository root:
+
+    python -m benchmarks.daq_write_latency Dev4/ao0 --writes 200
+"""
+import argparse
+import time
+
+import nidaqmx
+import numpy as np
+
+from hardware.daq import DAQ
+
+
+def task_per_write(channel: str, voltages) -> np.ndarray:
+    latencies = []
+    for voltage in voltages:
+        start = time.perf_counter()
+        with nidaqmx.Task() as task:
+            task.ao_channels.add_ao_voltage_chan(channel)
+            task.write(voltage)
+        latencies.append(time.perf_counter() - start)
+    return np.array(latencies)
+
+
+def persistent_task(channel: str, voltages) -> np.ndarray:
+    daq = DAQ(channel)
+    latencies = []
+    try:
+        for voltage in voltages:
+            start = time.perf_counter()
+            daq.set_voltage(voltage)
+            latencies.append(time.perf_counter() - start)
+    finally:
+        daq.set_voltage(0)
+        daq.close()
+    return np.array(latencies)
+
+
+def report(name: str, latencies: np.ndarray):
+    print(f"{name:>16}: mean {latencies.mean() * 1e3:8.3f} ms, "
+          f"median {np.median(latencies) * 1e3:8.3f} ms, "
+          f"p95 {np.percentile(latencies, 95) * 1e3:8.3f} ms, "
+          f"max {latencies.max() * 1e3:8.3f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("channel", help="analog output channel, e.g. Dev4/ao0")
+    parser.add_argument("--writes", type=int, default=200, help="number of writes per method")
+    parser.add_argument("--amplitude", type=float, default=0.1, help="maximum written voltage in V")
+    args = parser.parse_args()
+
+    voltages = np.linspace(0, args.amplitude, args.writes)
+    old = task_per_write(args.channel, voltages)
+    new = persistent_task(args.channel, voltages)
+
+    report("task per write", old)
+    report("persistent task", new)
+    print(f"speedup (mean): {old.mean() / new.mean():.1f}x")
+
+
+if __name__ == "__main__":
+    main()
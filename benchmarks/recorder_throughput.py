@@ -0,0 +1,79 @@
+"""Compare the rows/s of the data file writers.
+
+Records the same rows once through a logging FileHandler per row (the old
+Recorder) and once through the batched Recorder with each durability policy,
+into temporary CSV and binary data files. The time runs from the first row
+until the Recorder has written and closed the file. Run from the repository
+root:
+
+    python -m benchmarks.recorder_throughput --rows 100000
+"""
+import argparse
+import logging
+import os
+import tempfile
+import time
+from queue import Queue
+
+import numpy as np
+
+from pymeasure.experiment import Procedure, Results
+from pymeasure.experiment.binary import BINARY_EXTENSION
+from pymeasure.experiment.listeners import Recorder
+
+COLUMNS = ["Field (Oe)", "Voltage (V)", "X (V)", "Y (V)", "Phase", "Temperature (K)"]
+
+
+class BenchmarkProcedure(Procedure):
+    DATA_COLUMNS = COLUMNS
+
+
+def make_records(rows: int) -> list:
+    values = np.random.random((rows, len(COLUMNS))).tolist()
+    return [dict(zip(COLUMNS, row)) for row in values]
+
+
+def file_handler(filename: str, records: list) -> float:
+    results = Results(BenchmarkProcedure(), filename)
+    handler = logging.FileHandler(filename)
+    handler.setFormatter(results.formatter)
+    start = time.perf_counter()
+    for record in records:
+        handler.handle(record)
+    handler.close()
+    return time.perf_counter() - start
+
+
+def recorder(filename: str, records: list, durability: str) -> float:
+    results = Results(BenchmarkProcedure(), filename)
+    rec = Recorder(results, Queue(), durability=durability)
+    rec.start()
+    start = time.perf_counter()
+    for record in records:
+        rec.handle(record)
+    rec.stop()
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=20000, help="number of rows per run")
+    args = parser.parse_args()
+
+    records = make_records(args.rows)
+    runs = [("FileHandler", "csv", file_handler)]
+    for extension in ("csv", BINARY_EXTENSION):
+        for durability in (Recorder.FLUSH_POINT, Recorder.FLUSH_INTERVAL, Recorder.SYNC_ON_FINISH):
+            runs.append((f"Recorder {durability}", extension,
+                         lambda f, r, d=durability: recorder(f, r, d)))
+
+    with tempfile.TemporaryDirectory() as directory:
+        for index, (name, extension, run) in enumerate(runs):
+            filename = os.path.join(directory, f"run{index}.{extension}")
+            duration = run(filename, records)
+            print(f"{name:>20} ({extension}): {args.rows / duration:10.0f} rows/s, "
+                  f"{os.path.getsize(filename) / 1e6:6.1f} MB")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,11 +1,12 @@
 import pyvisa
+from pymeasure.adapters.visa import get_resource_manager
 from time import sleep
 
 
 class GM700:
     def __init__(self, port, read_terminator="\n", write_terminator="\r", delay=0.1):
         self.port = port
-        self.rm = pyvisa.ResourceManager()
+        self.rm = get_resource_manager()
         self.inst = self.rm.open_resource(
             port,
             baud_rate=9600,
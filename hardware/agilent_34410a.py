@@ -4,6 +4,9 @@ from pymeasure.instruments.validators import strict_discrete_set
 import numpy as np
 
 class Agilent34410A(Instrument):
+    # Skip rewriting unchanged settings, see Instrument.control
+    cache_settings = True
+
     def __init__(self, adapter, name="HP 34401A", **kwargs):
         super().__init__(
             adapter,
@@ -116,6 +119,13 @@ class Agilent34410A(Instrument):
 
     def write(self, command):
         """Write a command to the instrument."""
+        if command.startswith("FUNC "):
+            # Range, resolution and nplc belong to the active function
+            self.clear_setting_cache()
+        elif command.startswith("{function_prefix_for_range}:RANG"):
+            # Setting the range disables autorange and enabling autorange overrides the range
+            self.forget_setting("{function_prefix_for_range}:RANG %s")
+            self.forget_setting("{function_prefix_for_range}:RANG:AUTO %d")
         if "{function_prefix_for_range}" in command:
             command = command.replace("{function_prefix_for_range}",
                                       self._get_function_prefix_for_range())
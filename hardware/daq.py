@@ -2,8 +2,12 @@ from pymeasure.instruments import Instrument
 from pymeasure.instruments.validators import strict_discrete_set
 from time import sleep
 from logic.sweep_field_to_zero import sweep_field_to_zero
+from logic.sweep_field_to_value import sweep_field_to_value
 import nidaqmx
+from nidaqmx.constants import AcquisitionType
+from nidaqmx.errors import DaqError
 
+import numpy as np
 from numpy import sign
 
 import time
@@ -12,16 +16,69 @@ import logging
 log = logging.getLogger(__name__)
 log.addHandler(logging.NullHandler())
 
+MAX_RAMP_SAMPLES = 10000  # longest ramp waveform, slow ramps are written with a lower sample rate
+
 
 class DAQ:
     def __init__(self, adapter):
         self.adapter = adapter
+        self.prev_voltage = 0
+        self.field = 0.0  # last set field [Oe]
+        self.polarity = False
+        self._ao_task = None
+        self._do_task = None
+        self._ramp_reached = 0.0  # last voltage output by ramp_voltage()
+        self.reset_state()
+
+    def reset_state(self):
+        """
+        Restore the configuration of the field control to its defaults.
+
+        Called by the session pool whenever the pooled object is handed to a new experiment, so that settings of
+        the previous experiment (polarity control, disabled hardware ramps, ramp rate, ...) do not carry over.
+        The state of the output itself (field, polarity) is kept.
+        """
         self.field_constant = None
         self.polarity_control_enabled = False
         self.address_polarity_control = None
-        self.prev_voltage = 0
         self.field_step = 100
-        self.polarity = False
+        self.hardware_ramp = True
+        self.ramp_rate = 1.0  # maximum dV/dt of a ramp [V/s]
+        self.ramp_sample_rate = 1000.0  # [Hz]
+        # The polarity control line may differ in the next experiment
+        if self._do_task is not None:
+            self._do_task.close()
+            self._do_task = None
+
+    def _get_ao_task(self):
+        """Return the analog output task of /self.adapter/, creating and starting it on first use.
+
+        The task is kept open for the whole experiment, so single writes do not pay
+        for creating, committing and clearing a task every time.
+        """
+        if self._ao_task is None:
+            task = nidaqmx.Task()
+            try:
+                task.ao_channels.add_ao_voltage_chan(self.adapter)
+                task.start()
+            except Exception:
+                task.close()
+                raise
+            self._ao_task = task
+        return self._ao_task
+
+    def _get_do_task(self):
+        """Return the digital output task of the polarity control line, creating and starting it on first use."""
+        if self._do_task is None:
+            task = nidaqmx.Task()
+            try:
+                task.do_channels.add_do_chan(self.address_polarity_control)
+                task.start()
+            except Exception:
+                task.close()
+                raise
+            self._do_task = task
+        return self._do_task
 
     def set_field(self, field: float) -> float:
         """
@@ -47,6 +104,7 @@ class DAQ:
         # Convert field value to voltage
         voltage = field * self.field_constant  # field_constant is in [V/Oe]
         voltage = self.set_voltage(voltage)
+        self.field = field
         return voltage
 
     def set_voltage(self, voltage: float) -> float:
@@ -93,24 +151,176 @@ class DAQ:
                 voltage = abs(voltage)  # Use positive voltage after polarity adjustment
 
         # Set the voltage on the analog output channel
-        with nidaqmx.Task() as task:
-            task.ao_channels.add_ao_voltage_chan(self.adapter)
-            task.write(voltage)
+        self._get_ao_task().write(voltage)
 
         return voltage
 
+    def ramp_field(self, start_field: float, end_field: float, abort_callback=None) -> float:
+        """
+        Ramp the magnetic field from a starting value to a target value with a hardware-timed voltage waveform.
+
+        If the device does not support sample clock timing on the output channel, or the buffered ramp fails,
+        the ramp falls back to software steps of /self.field_step/ from the last voltage that was output, and
+        hardware ramps are disabled for this object.
+
+        Args:
+            start_field (float): The initial magnetic field value in Oersteds (Oe).
+            end_field (float): The target magnetic field value in Oersteds (Oe).
+            abort_callback (function, optional): A function that returns True if the ramp should be aborted. Defaults to None.
+
+        Raises:
+            ValueError: If the field constant is not set before ramping the field.
+
+        Returns:
+            float: The final magnetic field value that was set.
+        """
+        if self.field_constant is None:
+            raise ValueError("Field constant must be set before setting field")
+
+        try:
+            voltage = self.ramp_voltage(start_field * self.field_constant, end_field * self.field_constant, abort_callback)
+        except DaqError as e:
+            log.warning(f"Field Controller: Hardware-timed ramp not available ({e}), using software steps")
+            self.hardware_ramp = False
+            self.field = self._ramp_reached / self.field_constant
+            if self.polarity_control_enabled:
+                self.prev_voltage = self._ramp_reached
+            return sweep_field_to_value(self.field, end_field, self.field_step, self, abort_callback)
+        self.field = voltage / self.field_constant
+        return self.field
+
+    def ramp_voltage(self, start_voltage: float, end_voltage: float, abort_callback=None) -> float:
+        """
+        Write a linear voltage ramp to the analog output channel as one buffered, sample clock timed waveform.
+        The number of samples is chosen so that the slope does not exceed /self.ramp_rate/ [V/s]; ramps longer than
+        MAX_RAMP_SAMPLES samples are output with a lower sample rate than /self.ramp_sample_rate/.
+        The last voltage that was output is kept in /self._ramp_reached/, also when the ramp fails.
+
+        If polarity control is enabled and the ramp crosses zero, it is split in two: the output is ramped
+        to zero, the polarity is switched and the second half is ramped with the new polarity.
+
+        Args:
+            start_voltage (float): The voltage at the start of the ramp, normally the present output.
+            end_voltage (float): The target voltage.
+            abort_callback (function, optional): A function that returns True if the ramp should be aborted. Defaults to None.
+
+        Returns:
+            float: The voltage the output was left at (signed when polarity control is enabled).
+
+        Raises:
+            ValueError: If polarity control is enabled but no address for polarity control is specified.
+        """
+        self._ramp_reached = start_voltage
+        if self.polarity_control_enabled:
+            if self.address_polarity_control is None:
+                raise ValueError("Address polarity must be specified if polarity control is enabled")
+
+            if sign(start_voltage) * sign(end_voltage) == -1:
+                reached = self.ramp_voltage(start_voltage, 0, abort_callback)
+                if reached != 0:
+                    return reached
+                start_voltage = 0
+
+            if end_voltage != 0 and (end_voltage < 0) != self.polarity:
+                self._switch_polarity(end_voltage < 0)
+
+        duration = abs(end_voltage - start_voltage) / self.ramp_rate
+        sample_rate = min(self.ramp_sample_rate, (MAX_RAMP_SAMPLES - 1) / duration) if duration > 0 else self.ramp_sample_rate
+        samples = min(int(np.ceil(duration * sample_rate)) + 1, MAX_RAMP_SAMPLES)
+        waveform = np.linspace(start_voltage, end_voltage, max(samples, 2))
+        output = np.abs(waveform) if self.polarity_control_enabled else waveform
+
+        # The on-demand task reserves the channel, release it for the buffered one
+        if self._ao_task is not None:
+            self._ao_task.close()
+            self._ao_task = None
+
+        with nidaqmx.Task() as task:
+            try:
+                task.ao_channels.add_ao_voltage_chan(self.adapter)
+                task.timing.cfg_samp_clk_timing(sample_rate, sample_mode=AcquisitionType.FINITE, samps_per_chan=len(output))
+                task.write(output, auto_start=False)
+                task.start()
+                generated = len(output)
+                while not task.is_task_done():
+                    if abort_callback and abort_callback():
+                        task.stop()
+                        generated = task.out_stream.total_samp_per_chan_generated
+                        log.info("Field Controller: Ramp aborted")
+                        break
+                    time.sleep(0.01)
+            except DaqError:
+                # Keep where the output was left, so that a fallback does not jump back to the start
+                try:
+                    generated = task.out_stream.total_samp_per_chan_generated
+                    if generated > 0:
+                        self._ramp_reached = float(waveform[min(generated, len(waveform)) - 1])
+                except DaqError:
+                    pass
+                raise
+
+        reached = float(waveform[max(generated, 1) - 1])
+        self._ramp_reached = reached
+        if self.polarity_control_enabled:
+            if reached == 0 and self.polarity:
+                self._switch_polarity(False)
+            self.prev_voltage = reached
+        return reached
+
+    def field_state(self) -> dict:
+        """
+        Return the state of the field output, so that the next experiment of a queue can ramp from it.
+
+        Returns:
+            dict: The last set field in Oersteds (Oe), the field constant it was set with [V/Oe], the polarity
+                  and the addresses and polarity control setting needed to sweep the field to zero later.
+        """
+        return {
+            "field": self.field,
+            "field_constant": self.field_constant,
+            "polarity": self.polarity,
+            "address": self.adapter,
+            "polarity_control_enabled": self.polarity_control_enabled,
+            "address_polarity_control": self.address_polarity_control,
+        }
+
+    def restore_field_state(self, state: dict) -> float:
+        """
+        Take over the field left by the previous experiment. The field constant must already be set.
+
+        Args:
+            state (dict): The state returned by field_state() of the previous experiment.
+
+        Returns:
+            float: The present field in Oersteds (Oe), expressed with the current field constant.
+        """
+        voltage = state["field"] * state["field_constant"]
+        self.polarity = state["polarity"]
+        self.prev_voltage = voltage
+        self.field = voltage / self.field_constant
+        return self.field
+
     def _switch_polarity(self, new_polarity: bool):
         """Helper function to switch polarity on the control channel."""
         log.info(f"Field Controller: Switching polarity to {'negative' if new_polarity else 'positive'}...")
-        with nidaqmx.Task() as task:
-            task.do_channels.add_do_chan(self.address_polarity_control)
-            task.write(new_polarity)
+        self._get_do_task().write(new_polarity)
         self.polarity = new_polarity
         time.sleep(5)
 
+    def close(self):
+        """Release the output tasks. The outputs keep their last written values."""
+        for task in (self._ao_task, self._do_task):
+            if task is not None:
+                task.close()
+        self._ao_task = None
+        self._do_task = None
+
     def shutdown(self):
-        """Disable output, call parent function"""
-        self.set_field(0)
+        """Disable output and release the output tasks"""
+        try:
+            self.set_field(0)
+        finally:
+            self.close()
 
 
 # d = DAQ('Dev4/ao0')
@@ -8,8 +8,17 @@ class DummyField:
     def set_field(self, field: float) -> float:
         return 0
 
+    def field_state(self) -> dict:
+        return {"field": 0.0, "field_constant": self.field_constant, "polarity": False}
+
+    def restore_field_state(self, state: dict) -> float:
+        return 0.0
+
     def set_voltage(self, voltage: float) -> float:
         return 0
 
+    def close(self):
+        pass
+
     def shutdown(self):
         pass
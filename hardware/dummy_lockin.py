@@ -204,6 +204,12 @@ class DummyLockin():
     def reset_buffer(self):
         pass
 
+    def buffer_average(self, count, sample_frequency=None, timeout=60,
+                       has_aborted=lambda: False):
+        num1 = randint(0, 100)
+        num2 = randint(0,100)
+        return (num1, 0, num2, 0)
+
     def trigger(self):
         pass
 
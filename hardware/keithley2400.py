@@ -34,6 +34,9 @@ from pymeasure.instruments.keithley.buffer import KeithleyBuffer
 
 
 class Keithley2400(Instrument):
+    # Skip rewriting unchanged settings, see Instrument.control
+    cache_settings = True
+
     def __init__(self, resourceName, **kwargs):
         kwargs.setdefault('read_termination', '\n')
         super().__init__(
@@ -85,6 +88,7 @@ class Keithley2400(Instrument):
                     ":SENS:CURR:NPLC %f;:FORM:ELEM CURR;" % nplc)
         if auto_range:
             self.write(":SENS:CURR:RANG:AUTO 1;")
+            self.forget_setting(":SENS:CURR:RANG:AUTO 0;:SENS:CURR:RANG %g")
         else:
             self.current_range = current
         self.check_errors()
@@ -118,6 +122,7 @@ class Keithley2400(Instrument):
                     ":SENS:VOLT:NPLC %f;:FORM:ELEM VOLT;" % nplc)
         if auto_range:
             self.write(":SENS:VOLT:RANG:AUTO 1;")
+            self.forget_setting(":SENS:VOLT:RANG:AUTO 0;:SENS:VOLT:RANG %g")
         else:
             self.voltage_range = voltage
         self.check_errors()
@@ -1,10 +1,10 @@
-import pyvisa
 import time
 from hardware.crc8dallas import crc8calc
+from pymeasure.adapters.visa import get_resource_manager
 
 class RotationStage:
     def __init__(self, port):
-        rm = pyvisa.ResourceManager()
+        rm = get_resource_manager()
         self.dev = rm.open_resource(port)
         self.dev.baud_rate = 115200
         print("stepper_dev = " +str(self.dev))
@@ -60,6 +60,9 @@ class RotationStage:
         self.goToAzimuth(0)
         self.goToPolar(0)
 
+    def close(self):
+        self.dev.close()
+
 # k = RotationStage('COM4')
 # k.goToAzimuth(45)
 
@@ -0,0 +1,98 @@
+import logging
+import threading
+
+from pymeasure.adapters.visa import get_resource_manager
+
+log = logging.getLogger(__name__)
+log.addHandler(logging.NullHandler())
+
+
+class SessionPool:
+    """
+    Process-wide pool of instrument drivers keyed by (driver, address).
+
+    Modes ask the pool for their drivers instead of constructing them, so consecutive experiments of a
+    sequence reuse the already opened VISA sessions (and skip the reset/homing done in the driver constructors).
+    Sessions are only closed on application exit (close_all) or after a hardware error (discard/close_all).
+    Drivers that keep a configuration in Python attributes provide reset_state(), which is called every time
+    the pooled driver is handed out, so one experiment does not inherit the settings of the previous one.
+    """
+
+    def __init__(self):
+        self._sessions = {}
+        self._lock = threading.RLock()
+
+    def resource_manager(self, visa_library: str = ""):
+        """
+        Returns the ResourceManager shared by all sessions of the process.
+
+        Args:
+            visa_library (str): The VISA library specification, the platform default if empty.
+
+        Returns:
+            pyvisa.ResourceManager: The shared resource manager.
+        """
+        return get_resource_manager(visa_library)
+
+    def get(self, driver, address, **kwargs):
+        """
+        Returns the pooled driver for the given address, creating it on first use.
+        An already opened driver is reset with its reset_state() method, if it has one.
+
+        Args:
+            driver (type): The driver class, e.g. SR830.
+            address (str): The address (resource name, port or channel) of the instrument.
+            **kwargs: Passed to the driver constructor when the session is created.
+
+        Returns:
+            object: The driver instance.
+        """
+        key = (driver, address)
+        with self._lock:
+            session = self._sessions.get(key)
+            if session is None:
+                log.info(f"SessionPool: opening {driver.__name__} at '{address}'")
+                session = driver(address, **kwargs)
+                self._sessions[key] = session
+            elif hasattr(session, "reset_state"):
+                session.reset_state()
+            return session
+
+    def discard(self, driver, address):
+        """
+        Closes and forgets the session of the given driver, so the next get() opens it again.
+
+        Args:
+            driver (type): The driver class.
+            address (str): The address of the instrument.
+        """
+        with self._lock:
+            session = self._sessions.pop((driver, address), None)
+        if session is not None:
+            self._close(session)
+
+    def close_all(self):
+        """
+        Closes every pooled session.
+        """
+        with self._lock:
+            sessions = list(self._sessions.values())
+            self._sessions.clear()
+        for session in sessions:
+            self._close(session)
+
+    def __len__(self):
+        return len(self._sessions)
+
+    @staticmethod
+    def _close(session):
+        try:
+            if hasattr(session, "close"):
+                session.close()
+            elif hasattr(getattr(session, "adapter", None), "close"):
+                session.adapter.close()
+        except Exception as e:
+            log.warning(f"SessionPool: closing {type(session).__name__} failed: {e}")
+
+
+session_pool = SessionPool()
@@ -1,3 +1,4 @@
+import logging
 import re
 import time
 import numpy as np
@@ -5,6 +6,9 @@ from enum import IntFlag
 from pymeasure.instruments import Instrument
 from pymeasure.instruments.validators import strict_discrete_set, truncated_discrete_set, truncated_range, discreteTruncate
 
+log = logging.getLogger(__name__)
+log.addHandler(logging.NullHandler())
+
 class LIAStatus(IntFlag):
     """ IntFlag type that is returned by the lia_status property.
     """
@@ -33,6 +37,9 @@ class ERRStatus(IntFlag):
 
 class SR830(Instrument):
 
+    # Skip rewriting unchanged settings, see Instrument.control
+    cache_settings = True
+
     SAMPLE_FREQUENCIES = [
         62.5e-3, 125e-3, 250e-3, 500e-3, 1, 2, 4, 8, 16,
         32, 64, 128, 256, 512
@@ -350,12 +357,14 @@ class SR830(Instrument):
 
     def auto_gain(self):
         self.write("AGAN")
+        self.forget_setting("SENS%d")
 
     def auto_reserve(self):
         self.write("ARSV")
 
     def auto_phase(self):
         self.write("APHS")
+        self.forget_setting("PHAS%0.2f")
 
     def auto_offset(self, channel):
         """ Offsets the channel (X, Y, or R) to zero """
@@ -440,6 +449,7 @@ class SR830(Instrument):
         self.write('LIAE 2,1')
         while self.is_out_of_range():
             self.write("SENS%d" % (int(self.ask("SENS?")) + 1))
+            self.forget_setting("SENS%d")
             time.sleep(5.0 * self.time_constant)
             self.write("*CLS")
         # Set the range as low as possible
@@ -476,7 +486,7 @@ class SR830(Instrument):
             if has_aborted():
                 self.pause_buffer()
                 return ch1, ch2
-        self.pauseBuffer()
+        self.pause_buffer()
         ch1[index : count + 1] = self.buffer_data(1, index, count)  # noqa: E203
         ch2[index : count + 1] = self.buffer_data(2, index, count)  # noqa: E203
         return ch1, ch2
@@ -495,9 +505,9 @@ class SR830(Instrument):
                 time.sleep(delay)
             currentCount = self.buffer_count
             if stopRequest is not None and stopRequest.isSet():
-                self.pauseBuffer()
+                self.pause_buffer()
                 return (0, 0, 0, 0)
-        self.pauseBuffer()
+        self.pause_buffer()
         ch1[index:count] = self.buffer_data(1, index, count)
         ch2[index:count] = self.buffer_data(2, index, count)
         return (ch1.mean(), ch1.std(), ch2.mean(), ch2.std())
@@ -534,6 +544,41 @@ class SR830(Instrument):
     def reset_buffer(self):
         self.write("REST")
 
+    def buffer_average(self, count, sample_frequency=None, timeout=60,
+                       has_aborted=lambda: False):
+        """ Collects ``count`` samples of both displayed channels in the
+        internal buffer and reads them back with one binary transfer per
+        channel instead of one query per sample.
+
+        If the buffer holds fewer samples after the timeout or an abort,
+        only the stored samples are averaged.
+
+        :param count: number of samples to average
+        :param sample_frequency: buffer sample rate in Hz, used to wait for
+            the acquisition before polling the point count (optional)
+        :param timeout: maximum time in seconds to wait for the buffer
+        :param has_aborted: function returning True to stop waiting
+        :returns: tuple (ch1 mean, ch1 std, ch2 mean, ch2 std)
+        :raises TimeoutError: if no sample was stored
+        """
+        self.reset_buffer()
+        self.start_buffer()
+        timestep = 0.01
+        if sample_frequency:
+            time.sleep(count / sample_frequency)
+            timestep = 1 / sample_frequency
+        if self.wait_for_buffer(count, has_aborted=has_aborted, timeout=timeout,
+                                timestep=timestep) is False:
+            self.pause_buffer()
+        stored = min(self.buffer_count, count)
+        if stored == 0:
+            raise TimeoutError("SR830 stored no samples in the buffer")
+        if stored < count:
+            log.warning(f"SR830 stored {stored} of {count} samples, averaging the stored samples")
+        ch1 = self.get_buffer(1, 0, stored)
+        ch2 = self.get_buffer(2, 0, stored)
+        return (ch1.mean(), ch1.std(), ch2.mean(), ch2.std())
+
     def trigger(self):
         self.write("TRIG")
 
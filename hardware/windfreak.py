@@ -51,4 +51,6 @@ class Windfreak:
             self.enable()
         else:
             self.disable()
-            self.rfgen.close()
+
+    def close(self):
+        self.rfgen.close()
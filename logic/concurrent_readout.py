@@ -0,0 +1,77 @@
+from concurrent.futures import ThreadPoolExecutor
+
+
+def shared_bus(address_a, address_b) -> bool:
+    """
+    Checks whether two instruments are reached through the same bus and cannot be read at the same time.
+
+    Only GPIB boards are shared between instruments, serial ports, LAN and USB connections are independent.
+
+    Args:
+        address_a (str): The VISA resource name of the first instrument.
+        address_b (str): The VISA resource name of the second instrument.
+
+    Returns:
+        bool: True if both instruments sit on the same GPIB board.
+    """
+    if not isinstance(address_a, str) or not isinstance(address_b, str):
+        return False
+    board_a = address_a.split("::")[0].upper()
+    board_b = address_b.split("::")[0].upper()
+    return board_a.startswith("GPIB") and board_a == board_b
+
+
+class ConcurrentReadout:
+    """
+    Issues the independent reads of one measurement point in parallel and joins them.
+
+    submit(name, function, *args) starts a read, join() waits for all of them and returns their results by name.
+    When disabled, submit() runs the read immediately, so the same code path measures sequentially.
+    Exceptions are raised by join() in the order the reads were submitted, which keeps the outcome deterministic.
+    """
+
+    def __init__(self, enabled: bool = False, max_workers: int = 2):
+        self.enabled = enabled
+        self.max_workers = max_workers
+        self._executor = None
+        self._pending = {}
+
+    def submit(self, name: str, function, *args):
+        if not self.enabled:
+            try:
+                self._pending[name] = (function(*args), None)
+            except Exception as e:
+                self._pending[name] = (None, e)
+            return
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="readout")
+        self._pending[name] = self._executor.submit(function, *args)
+
+    def join(self) -> dict:
+        """
+        Waits for all submitted reads.
+
+        Returns:
+            dict: Maps the name of every read to its result.
+        """
+        pending, self._pending = self._pending, {}
+        results = {}
+        error = None
+        for name, read in pending.items():
+            if isinstance(read, tuple):
+                result, exception = read
+            else:
+                exception = read.exception()
+                result = None if exception is not None else read.result()
+            if exception is not None and error is None:
+                error = exception
+            results[name] = result
+        if error is not None:
+            raise error
+        return results
+
+    def shutdown(self):
+        self._pending = {}
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
@@ -0,0 +1,287 @@
+import json
+import math
+import os
+import threading
+
+from logic.vector import Vector
+from logic.phase_profiler import PhaseProfiler
+from logic.field_handover import can_hand_over
+
+SOFTWARE_STEP_TIME = 0.3  # pause after every step of a software field sweep [s]
+POLARITY_SWITCH_TIME = 5.0  # pause after switching the polarity of the field [s]
+LINE_FREQUENCY = 50.0  # [Hz]
+SNAP_TIME = 0.01  # single lock-in snap query [s]
+FIELD_SET_TIME = 0.01  # single DAQ write [s]
+GAUSSMETER_READ_TIME = 0.1  # [s]
+EMIT_TIME = 0.005  # [s]
+START_TIME = 2.0  # instrument initialization [s]
+END_TIME = 0.5  # [s]
+
+SMOOTHING = 0.3  # weight of the newest run in the calibration
+# Kept next to the measurement catalog in the home folder, outside the source tree
+CALIBRATION_FILE = os.path.join(os.path.expanduser("~"), ".pymeasure", "duration_calibration.json")
+
+
+def _number(parameters: dict, name: str, default: float = 0.0) -> float:
+    try:
+        value = float(parameters.get(name, default))
+    except (TypeError, ValueError):
+        return default
+    return default if math.isnan(value) else value
+
+
+class DurationModel:
+    """
+    Estimates the duration of an experiment from its parameters.
+
+    Every measurement point is split into the phases of PhaseProfiler. The start of the experiment consists of the
+    kriostat wait and the initialization with the field ramp to the first point, the end of the ramp back to zero.
+    Each phase gets a modelled duration computed from the parameters (delays, number of averages,
+    ramp length / field step, polarity switches, ...).
+    The model is calibrated per mode by record(), which compares it with the phase timings of a finished run:
+    modelled durations are scaled by the measured/modelled ratio, phases modelled as zero get the measured time.
+    """
+
+    def __init__(self, filename: str = CALIBRATION_FILE):
+        self.filename = filename
+        self.calibration = {}
+        self._lock = threading.Lock()
+        if self.filename is not None and os.path.exists(self.filename):
+            try:
+                with open(self.filename, "r") as f:
+                    self.calibration = json.load(f)
+            except (OSError, ValueError):
+                self.calibration = {}
+
+    @staticmethod
+    def points(parameters: dict) -> list:
+        try:
+            return Vector().generate_vector(parameters.get("vector") or "")
+        except (ValueError, IndexError):
+            return []
+
+    @staticmethod
+    def field_path(parameters: dict, points: list) -> list:
+        """
+        Returns the fields set during the measurement points, in Oersteds (Oe).
+        """
+        mode = parameters.get("mode")
+        constant = _number(parameters, "constant_field_value")
+        if mode in ("ResistanceMode", "HarmonicMode"):
+            return [constant] if parameters.get("set_rotationstation") else list(points)
+        if mode == "FMRMode":
+            if parameters.get("mode_fmr") == "V-FMR" and not parameters.get("set_rotationstation"):
+                return list(points)
+            return [constant]
+        if mode == "CIMSMode":
+            return [_number(parameters, "field_bias_value")]
+        return []
+
+    @staticmethod
+    def ramp_time(parameters: dict, start_field: float, end_field: float) -> float:
+        """
+        Returns the time of a field sweep, hardware-timed on the DAQ or in software steps otherwise.
+        """
+        delta = abs(end_field - start_field)
+        if delta == 0:
+            return 0.0
+        ramp_rate = _number(parameters, "field_ramp_rate")
+        if parameters.get("set_field") == "DAQ" and ramp_rate > 0:
+            return delta * abs(_number(parameters, "field_constant")) / ramp_rate
+        field_step = abs(_number(parameters, "field_step", 1.0)) or 1.0
+        return math.ceil(delta / field_step) * SOFTWARE_STEP_TIME
+
+    @staticmethod
+    def polarity_switches(parameters: dict, fields: list) -> int:
+        if parameters.get("mode") != "FMRMode" or not parameters.get("polarity_control_enabled"):
+            return 0
+        switches = 0
+        negative = False
+        for field in fields:
+            if field != 0 and (field < 0) != negative or field == 0 and negative:
+                negative = field < 0
+                switches += 1
+        return switches
+
+    def point_model(self, parameters: dict) -> dict:
+        """
+        Returns the modelled duration of every phase of one measurement point in seconds (s).
+        """
+        mode = parameters.get("mode")
+        model = dict.fromkeys(PhaseProfiler.PHASES, 0.0)
+        model["Field set"] = FIELD_SET_TIME
+        model["Settle"] = _number(parameters, "delay_field")
+        model["Gaussmeter read"] = GAUSSMETER_READ_TIME if parameters.get("set_gaussmeter") not in (None, "none") else 0.0
+        model["Bias delay"] = _number(parameters, "delay_bias")
+        model["Emit and record"] = EMIT_TIME
+
+        if mode in ("HarmonicMode", "FMRMode"):
+            if mode == "FMRMode":
+                model["Bias delay"] = _number(parameters, "delay_lockin")
+            if mode == "FMRMode" and parameters.get("set_measdevice_fmr") == "Multimeter":
+                model["Readout"] = _number(parameters, "multimeter_average", 1) * _number(parameters, "multimeter_nplc", 1) / LINE_FREQUENCY
+            elif parameters.get("lockin_buffered_average"):
+                model["Readout"] = _number(parameters, "lockin_average", 1) / (_number(parameters, "lockin_sample_frequency", 512) or 512)
+            else:
+                model["Readout"] = _number(parameters, "lockin_average", 1) * SNAP_TIME
+        elif mode == "ResistanceMode":
+            if parameters.get("mode_resistance"):
+                model["Readout"] = _number(parameters, "multimeter_average", 1) * _number(parameters, "multimeter_nplc", 1) / LINE_FREQUENCY
+            else:
+                model["Readout"] = _number(parameters, "sourcemeter_average", 1) * _number(parameters, "sourcemeter_nplc", 1) / LINE_FREQUENCY
+        elif mode == "CIMSMode":
+            model["Field set"] = 0.0
+            model["Settle"] = 0.0
+            model["Bias delay"] = _number(parameters, "delay_bias") + _number(parameters, "delay_measurement")
+            model["Readout"] = _number(parameters, "delay_measurement") + _number(parameters, "sourcemeter_average", 1) * _number(parameters, "sourcemeter_nplc", 1) / LINE_FREQUENCY
+        if parameters.get("concurrent_readout") and mode != "CIMSMode":
+            # the gaussmeter is read during the bias delay and the readout
+            model["Readout"] = max(model["Readout"], model["Gaussmeter read"] - model["Bias delay"])
+            model["Gaussmeter read"] = 0.0
+        return model
+
+    def start_ramp(self, parameters: dict, start_field: float = 0.0) -> float:
+        """
+        Returns the modelled duration of the field ramp done by initializing(), in seconds (s).
+        """
+        fields = self.field_path(parameters, self.points(parameters))
+        if parameters.get("mode") == "CIMSMode":
+            bias = _number(parameters, "field_bias_value")
+            correction = _number(parameters, "remanency_correction_time") if parameters.get("remanency_correction") else 0.0
+            if parameters.get("remagnetization"):
+                remagnetization = _number(parameters, "remagnetization_value")
+                return (self.ramp_time(parameters, start_field, remagnetization) + _number(parameters, "remagnetization_time")
+                        + self.ramp_time(parameters, remagnetization, bias) + 2 * correction)
+            return self.ramp_time(parameters, start_field, bias) + correction
+        return self.ramp_time(parameters, start_field, fields[0]) if fields else 0.0
+
+    def end_ramp(self, parameters: dict) -> float:
+        """
+        Returns the modelled duration of the field ramp to zero done by end(), in seconds (s).
+        """
+        fields = self.field_path(parameters, self.points(parameters))
+        hold = parameters.get("hold_the_field_after_measurement") and parameters.get("mode") != "ResistanceMode"
+        return self.ramp_time(parameters, fields[-1], 0.0) if fields and not hold else 0.0
+
+    def start_model(self, parameters: dict, start_field: float = 0.0) -> dict:
+        """
+        Returns the modelled duration of the experiment start: the kriostat wait and initializing() with its field ramp.
+        """
+        model = {"Start": START_TIME + self.start_ramp(parameters, start_field)}
+        if parameters.get("set_kriostat"):
+            model["Kriostat"] = 0.0  # only known from the calibration
+        return model
+
+    def end_model(self, parameters: dict) -> dict:
+        """
+        Returns the modelled duration of end(), including the ramp of the field to zero.
+        """
+        return {"End": END_TIME + self.end_ramp(parameters)}
+
+    def _calibrated(self, mode: str, model: dict) -> dict:
+        calibration = self.calibration.get(mode, {})
+        result = {}
+        for phase, modelled in model.items():
+            if phase not in calibration:
+                result[phase] = modelled
+                continue
+            measured, reference = calibration[phase]
+            if reference > 0:
+                result[phase] = modelled * measured / reference
+            else:
+                result[phase] = modelled + measured
+        return result
+
+    def estimate(self, parameters: dict, start_field: float = 0.0) -> dict:
+        """
+        Estimates the duration of one experiment.
+
+        Args:
+            parameters (dict): The parameters of the procedure.
+            start_field (float, optional): The field the experiment starts from in Oersteds (Oe). Defaults to 0.
+
+        Returns:
+            dict: The number of points, the calibrated point, start and end durations in seconds (s) and their total.
+        """
+        mode = parameters.get("mode")
+        points = self.points(parameters)
+        fields = self.field_path(parameters, points)
+        with self._lock:
+            point = self._calibrated(mode, self.point_model(parameters))
+            start = self._calibrated(mode, self.start_model(parameters, start_field))
+            end = self._calibrated(mode, self.end_model(parameters))
+
+        switches = self.polarity_switches(parameters, [start_field] + fields + [0.0])
+        point_time = sum(point.values())
+        total = len(points) * point_time + sum(start.values()) + sum(end.values()) + switches * POLARITY_SWITCH_TIME
+        return {
+            "points": len(points),
+            "point": point_time,
+            "start": sum(start.values()),
+            "start ramp": self.start_ramp(parameters, start_field),
+            "end": sum(end.values()),
+            "end ramp": self.end_ramp(parameters),
+            "first field": fields[0] if fields else 0.0,
+            "last field": fields[-1] if fields else 0.0,
+            "total": total,
+        }
+
+    def estimate_sequence(self, sequence: list) -> float:
+        """
+        Estimates the duration of a queue of experiments, taking the field handover between them into account.
+
+        Args:
+            sequence (list): The parameters of every queued experiment, in order.
+
+        Returns:
+            float: The total duration in seconds (s).
+        """
+        total = 0.0
+        previous, previous_estimate = None, None
+        for parameters in sequence:
+            estimate = self.estimate(parameters)
+            total += estimate["total"]
+            if previous is not None and can_hand_over(previous, parameters):
+                # The field is not swept to zero and back, but directly to the next start field
+                total -= previous_estimate["end ramp"] + estimate["start ramp"]
+                total += self.ramp_time(parameters, previous_estimate["last field"], estimate["first field"])
+            previous, previous_estimate = parameters, estimate
+        return total
+
+    def record(self, parameters: dict, point_phases: dict, start_phases: dict, end_phases: dict):
+        """
+        Calibrates the model of the mode with the measured durations of a finished run and saves the calibration.
+
+        Args:
+            parameters (dict): The parameters of the procedure.
+            point_phases (dict): The mean duration of every point phase in seconds (s), e.g. from PhaseProfiler.summary().
+            start_phases (dict): The measured durations of the start phases ("Start", "Kriostat").
+            end_phases (dict): The measured duration of the end ("End").
+        """
+        mode = parameters.get("mode")
+        model = {**self.point_model(parameters), **self.start_model(parameters), **self.end_model(parameters)}
+        measured = {**point_phases, **start_phases, **end_phases}
+
+        with self._lock:
+            calibration = self.calibration.setdefault(mode, {})
+            for phase, value in measured.items():
+                if phase not in model or value is None or math.isnan(value):
+                    continue
+                if phase in calibration:
+                    old_measured, old_reference = calibration[phase]
+                    value = (1 - SMOOTHING) * old_measured + SMOOTHING * value
+                    reference = (1 - SMOOTHING) * old_reference + SMOOTHING * model[phase]
+                else:
+                    reference = model[phase]
+                calibration[phase] = [float(value), float(reference)]
+
+            if self.filename is not None:
+                try:
+                    os.makedirs(os.path.dirname(os.path.abspath(self.filename)), exist_ok=True)
+                    with open(self.filename, "w") as f:
+                        json.dump(self.calibration, f, indent=4)
+                except OSError:
+                    pass
+
+
+duration_model = DurationModel()
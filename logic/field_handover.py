@@ -0,0 +1,57 @@
+import logging
+
+log = logging.getLogger(__name__)
+log.addHandler(logging.NullHandler())
+
+# Modes which can take over the field left on by the previous experiment of the queue
+FIELD_HANDOVER_MODES = ("ResistanceMode", "HarmonicMode", "FMRMode")
+
+
+def can_hand_over(current: dict, following: dict) -> bool:
+    """
+    Checks whether the field of one experiment can be left on for the following experiment of the queue.
+
+    Args:
+        current (dict): The parameters of the experiment that ends.
+        following (dict): The parameters of the experiment that follows it.
+
+    Returns:
+        bool: True if both experiments ramp the field with the same controller.
+    """
+    return (
+        current.get("mode") in FIELD_HANDOVER_MODES
+        and following.get("mode") in FIELD_HANDOVER_MODES
+        and current.get("set_field") == following.get("set_field")
+        and current.get("address_daq") == following.get("address_daq")
+    )
+
+
+def release_field(state: dict):
+    """
+    Sweeps a field that was left on for the next experiment of the queue to zero, because no experiment takes it over
+    (the queue was aborted or stopped, the next experiment was removed or failed to initialize).
+
+    Args:
+        state (dict): The field state stored by the experiment that left the field on, see DAQ.field_state().
+    """
+    if state is None or not state.get("field") or "address" not in state:
+        return
+    from hardware.daq import DAQ
+    from hardware.session_pool import session_pool
+    from logic.sweep_field_to_zero import sweep_field_to_zero
+
+    log.info("Field is not taken over by the next experiment, sweeping it to zero.")
+    daq = session_pool.get(DAQ, state["address"])
+    try:
+        daq.field_constant = state["field_constant"]
+        daq.polarity_control_enabled = state.get("polarity_control_enabled", False)
+        daq.address_polarity_control = state.get("address_polarity_control")
+        if state.get("field_ramp_rate"):
+            daq.ramp_rate = state["field_ramp_rate"]
+        field = daq.restore_field_state(state)
+        sweep_field_to_zero(field, daq.field_constant, state.get("field_step") or daq.field_step, daq)
+    except Exception as e:
+        log.error(f"Sweeping the field to zero failed: {e}")
+        session_pool.discard(DAQ, state["address"])
+    else:
+        daq.close()
@@ -1,11 +1,11 @@
-import pyvisa
 import nidaqmx
+from pymeasure.adapters.visa import get_resource_manager
 import os
 
 
 class FindInstrument(): 
     def __init__(self): 
-        self.rm = pyvisa.ResourceManager() 
+        self.rm = get_resource_manager() 
         self.hardware = {}
    
     def find_instrument(self):
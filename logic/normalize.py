@@ -4,6 +4,14 @@ from pymeasure.experiment.results import Results
 
 
 class Normalize:
+    """
+    Min-max normalization of data columns, with the running minimum and maximum updated per emitted point.
+
+    Calling the object adds the "Norm <column>" values of one point in constant time. The plots derive the
+    normalized columns of all points from the in-memory data when drawn (the "Norm <column>" axes), and finish()
+    writes them to the data file once, when the experiment finishes.
+    """
+
     def __init__(self, to_normalize: list = None, result_object=None):
         if to_normalize is None:
             to_normalize = []
@@ -30,21 +38,6 @@ class Normalize:
                         self._args[arg][0] = min(self._args[arg][0], results[arg])
                         self._args[arg][1] = max(self._args[arg][1], results[arg])
 
-                with self._lock:
-                    data = self._result_object.data
-                    min_val, max_val = self._args[arg]
-                    if max_val - min_val == 0:
-                        data[f"Norm {arg}"] = 0.0
-                    else:
-                        data[f"Norm {arg}"] = (data[arg].astype(float) - min_val) / (max_val - min_val)
-
-                    with open(self._result_object.data_filename, "w") as f:
-                        f.write(self._result_object.header())
-                        f.write(self._result_object.labels())
-                        for _, row in data.iterrows():
-                            f.write(self._result_object.format(row.to_dict()) + self._result_object.LINE_BREAK)
-                    self._result_object.store_metadata()
-
             with self._lock:
                 min_val, max_val = self._args[arg]
                 if max_val - min_val == 0:
@@ -54,6 +47,26 @@ class Normalize:
 
         return results
 
+    def finish(self):
+        """
+        Rewrites the data file once with the normalized columns of the final minimum and maximum.
+        """
+        if self._result_object is None:
+            raise Exception("Normalize: Result object not set!")
+
+        data = self._result_object.data.copy()
+        for arg in self.to_normalize:
+            if arg not in data:
+                continue
+            with self._lock:
+                min_val, max_val = self._args[arg]
+            values = data[arg].to_numpy(dtype=float)
+            if min_val is None or max_val - min_val == 0:
+                data[f"Norm {arg}"] = np.zeros_like(values)
+            else:
+                data[f"Norm {arg}"] = (values - min_val) / (max_val - min_val)
+        self._result_object.write_data(data)
+
 
 if __name__ == "__main__":
     norm = Normalize(["a", "b"])
@@ -0,0 +1,89 @@
+import os
+from time import perf_counter
+
+import numpy as np
+
+from pymeasure.experiment.compression import strip_compression
+
+
+class PhaseProfiler:
+    """
+    Splits the time spent on each measurement point into phases.
+
+    A point is opened with start(); every mark(phase) adds the time elapsed since the previous mark
+    (or since start) to the given phase; stop() closes the point and appends it to the sidecar file.
+    Marks outside of a started point are ignored, so modes can call mark() without a running profiler.
+    """
+
+    PHASES = ["Field set", "Settle", "Gaussmeter read", "Bias delay", "Readout", "Emit and record"]
+
+    def __init__(self, filename=None):
+        self.filename = filename
+        self.points = []
+        self._current = None
+        self._last = None
+
+        if self.filename is not None:
+            with open(self.filename, "w") as f:
+                f.write(",".join(["Point"] + [f"{phase} (s)" for phase in self.PHASES] + ["Total (s)"]) + "\n")
+
+    @staticmethod
+    def sidecar_filename(data_filename: str) -> str:
+        """
+        Returns the name of the timing file stored next to the data file.
+
+        Args:
+            data_filename (str): The path of the data file.
+
+        Returns:
+            str: The path of the timing file.
+        """
+        return os.path.splitext(strip_compression(data_filename))[0] + "_timing.csv"
+
+    def start(self):
+        self._current = dict.fromkeys(self.PHASES, 0.0)
+        self._last = perf_counter()
+
+    def mark(self, phase: str):
+        if self._current is None:
+            return
+        now = perf_counter()
+        self._current[phase] = self._current.get(phase, 0.0) + now - self._last
+        self._last = now
+
+    def stop(self) -> dict:
+        """
+        Closes the current point, stores it and appends it to the timing file.
+
+        Returns:
+            dict: The duration of every phase of the point in seconds (s).
+        """
+        point = self._current
+        if point is None:
+            return {}
+        self._current = None
+        self.points.append(point)
+
+        if self.filename is not None:
+            row = [str(len(self.points))] + [f"{point.get(phase, 0.0)}" for phase in self.PHASES] + [f"{sum(point.values())}"]
+            with open(self.filename, "a") as f:
+                f.write(",".join(row) + "\n")
+        return point
+
+    def summary(self) -> dict:
+        """
+        Returns the mean and the 95th percentile of every phase and of the whole point.
+
+        Returns:
+            dict: Maps the phase name (and "Total") to a (mean, p95) tuple in seconds (s).
+        """
+        points = list(self.points)
+        if not points:
+            return {}
+        result = {}
+        for phase in self.PHASES:
+            values = np.array([point.get(phase, 0.0) for point in points])
+            result[phase] = (values.mean(), np.percentile(values, 95))
+        totals = np.array([sum(point.values()) for point in points])
+        result["Total"] = (totals.mean(), np.percentile(totals, 95))
+        return result
@@ -97,12 +97,19 @@ class SaveParameters:
     "lockin_channel1": "R",
     "lockin_channel2": "Theta",
     "lockin_autophase": false,
+    "lockin_buffered_average": false,
+    "lockin_sample_frequency": 512,
     "generator_frequency": 4000000000.0,
     "generator_power": 12.0,
     "lfgen_freq": 330.0,
     "lfgen_amp": 2.0,
     "set_field_value_fmr": 0.0,
     "field_step": 100.0,
+    "field_ramp_rate": 1.0,
+    "field_settle_adaptive": false,
+    "field_settle_tolerance": 1.0,
+    "field_settle_readings": 3,
+    "concurrent_readout": false,
     "delay_field": 0.25,
     "delay_lockin": 1.0,
     "delay_bias": 2.0,
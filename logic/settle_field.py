@@ -0,0 +1,49 @@
+import logging
+from time import sleep, time
+
+log = logging.getLogger(__name__)
+log.addHandler(logging.NullHandler())
+
+
+def settle_field(gaussmeter, max_delay: float, tolerance: float, readings: int, target: float = None,
+                 target_tolerance: float = None, interval: float = 0.05) -> tuple:
+    """
+    Waits for the magnetic field to settle by polling the gaussmeter until the last readings agree with each other.
+
+    The settled field is only compared with the target field afterwards, so that an offset of the field constant or
+    of the gaussmeter does not make every point wait the maximum delay; a warning is logged instead.
+
+    Args:
+        gaussmeter (object): The gaussmeter used to read the field.
+        max_delay (float): The maximum time to wait in seconds (s), returned if the field does not settle earlier.
+        tolerance (float): The maximum spread of the consecutive readings in Oersteds (Oe).
+        readings (int): The number of consecutive readings that must lie within the tolerance.
+        target (float, optional): The set field in Oersteds (Oe). Defaults to None, not checking the settled field.
+        target_tolerance (float, optional): The maximum distance of the settled field from the target in Oersteds
+            (Oe). Defaults to None, using the tolerance.
+        interval (float, optional): The time between the readings in seconds (s). Defaults to 0.05.
+
+    Returns:
+        tuple: The last field reading in Oersteds (Oe) and the time spent settling in seconds (s).
+    """
+    start_time = time()
+    window = []
+    while True:
+        field = gaussmeter.measure()
+        window = (window + [field])[-readings:]
+        if len(window) >= readings and max(window) - min(window) <= tolerance:
+            break
+        remaining = max_delay - (time() - start_time)
+        if remaining <= 0:
+            log.warning(f"Field did not settle within {max_delay} s, the last readings spread over "
+                        f"{max(window) - min(window)} Oe")
+            return field, time() - start_time
+        sleep(min(interval, remaining))
+
+    if target_tolerance is None:
+        target_tolerance = tolerance
+    settled = sum(window) / len(window)
+    if target is not None and abs(settled - target) > target_tolerance:
+        log.warning(f"Field settled at {settled} Oe, {settled - target} Oe away from the set field {target} Oe")
+
+    return field, time() - start_time
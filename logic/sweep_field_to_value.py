@@ -5,7 +5,8 @@ from time import sleep
 def sweep_field_to_value(start_field: float, end_field: float, field_step: float, daq, abort_callback=None) -> float:
     """
     Gradually sweeps the magnetic field from a starting value to a target value, adjusting the voltage in increments
-    to ensure a smooth transition.
+    to ensure a smooth transition. If the DAQ supports hardware-timed ramps, the whole sweep is written as one
+    waveform instead.
 
     Args:
         start_field (float): The initial magnetic field value in Oersteds (Oe).
@@ -17,6 +18,9 @@ def sweep_field_to_value(start_field: float, end_field: float, field_step: float
     Returns:
         float: The final magnetic field value that was set.
     """
+    if getattr(daq, "hardware_ramp", False):
+        return daq.ramp_field(start_field, end_field, abort_callback)
+
     last_set_field = start_field
     step_direction = field_step if end_field > start_field else -field_step
     field_values = np.arange(start_field, end_field, step_direction)
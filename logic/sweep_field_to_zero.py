@@ -4,6 +4,7 @@ from time import sleep
 def sweep_field_to_zero(start_field: float, field_constant: float, field_step: float, daq, abort_callback=None) -> float:
     """
     Gradually sweeps the magnetic field from a starting value to zero, adjusting the voltage in increments to avoid abrupt changes.
+    If the DAQ supports hardware-timed ramps, the whole sweep is written as one waveform instead.
 
     Args:
         start_field (float): The initial magnetic field value in Oersteds (Oe).
@@ -21,6 +22,9 @@ def sweep_field_to_zero(start_field: float, field_constant: float, field_step: f
         daq.set_field(0)
         return 0.0
 
+    if getattr(daq, "hardware_ramp", False):
+        return daq.ramp_field(start_field, 0, abort_callback)
+
     step_direction = field_step if start_field < 0 else -field_step
     field_values = np.arange(start_field, 0, step_direction)
     field_values = np.append(field_values, 0)
@@ -7,6 +7,7 @@ from hardware.dummy_field import DummyField
 from hardware.lakeshore import Lakeshore
 from hardware.GM_700 import GM700
 from hardware.dummy_gaussmeter import DummyGaussmeter
+from hardware.session_pool import session_pool
 from logic.field_calibration import calibration, set_calibrated_field
 from logic.sweep_field_to_zero import sweep_field_to_zero
 
@@ -46,15 +47,15 @@ class FieldCalibrationMode:
             self.daq = DummyField(self.address_daq)
             log.warning("Used dummy DAQ")
         else:
-            self.daq = DAQ(self.address_daq)
+            self.daq = session_pool.get(DAQ, self.address_daq)
 
         if self.set_gaussmeter == "none":
             self.gaussmeter = DummyGaussmeter(self.address_gaussmeter)
             log.warning("Used dummy Gaussmeter")
         elif self.set_gaussmeter == "GM700":
-            self.gaussmeter = GM700(self.address_gaussmeter)
+            self.gaussmeter = session_pool.get(GM700, self.address_gaussmeter)
         elif self.set_gaussmeter == "Lakeshore":
-            self.gaussmeter = Lakeshore(self.address_gaussmeter)
+            self.gaussmeter = session_pool.get(Lakeshore, self.address_gaussmeter)
         else:
             raise ValueError("Gaussmeter not supported")
 
@@ -83,6 +84,7 @@ class FieldCalibrationMode:
         sweep_field_to_zero(
             self.stop_volt / self.calibration_constant, self.calibration_constant, int((self.stop_volt / self.calibration_constant) / 10), self.daq
         )  # czy tutaj nie powinno byc mnozenia?
+        self.daq.close()
 
 
 # test = FieldCalibrationMode("ff", "dfd", 'Dev4/ao0', 'GPIB1::12::INSTR',[0,5,1], 2)
@@ -23,14 +23,16 @@ from hardware.dummy_field import DummyField
 from hardware.dummy_relay import DummyRelay
 from hardware.rotation_stage import RotationStage
 from hardware.rotation_stage_dummy import RotationStageDummy
+from hardware.session_pool import session_pool
 from logic.vector import Vector
 from logic.sweep_field_to_zero import sweep_field_to_zero 
 from logic.sweep_field_to_value import sweep_field_to_value
+from logic.phase_profiler import PhaseProfiler
 log = logging.getLogger(__name__) 
 log.addHandler(logging.NullHandler()) 
 
 class CIMSMode():
-    def __init__(self, vector:str, mode_cims_relays:bool,  sourcemeter_bias:float, sourcemeter:str, multimeter:str,pulsegenerator:str, gaussmeter:str, field:str, automaticstation:bool, switch: bool, kriostat:bool, rotationstation: bool,return_the_rotationstation:bool, address_sourcemeter:str, address_multimeter:str,address_pulsegenerator:str, address_gaussmeter:str, address_switch:str, delay_field:float, delay_measurement:float, delay_bias:float, sourcemeter_source:str, sourcemeter_compliance:float, sourcemter_channel: str, sourcemeter_limit:str, sourcemeter_nplc:float, sourcemeter_average:str, multimeter_function:str, multimeter_resolution:float, multimeter_autorange:bool, multimeter_range:int, multimeter_average:int, field_constant:float, gaussmeter_range:str, gaussmeter_resolution:str, multimeter_nplc:str, address_daq:str, field_step:float, rotationstation_port:str, constant_field_value:float, rotation_axis:str, rotation_polar_constant:float, rotation_azimuth_constant:float,pulsegenerator_duration,pulsegenerator_offset,pulsegenerator_pulsetype,pulsegenerator_channel,pulsegenerator_compliance,pulsegenerator_source_range,field_bias_value,remagnetization,remagnetization_value,remagnetization_time,hold_the_field_after_measurement,remanency_correction,remanency_correction_time,set_polar_angle,set_azimuthal_angle) -> None:
+    def __init__(self, vector:str, mode_cims_relays:bool,  sourcemeter_bias:float, sourcemeter:str, multimeter:str,pulsegenerator:str, gaussmeter:str, field:str, automaticstation:bool, switch: bool, kriostat:bool, rotationstation: bool,return_the_rotationstation:bool, address_sourcemeter:str, address_multimeter:str,address_pulsegenerator:str, address_gaussmeter:str, address_switch:str, delay_field:float, delay_measurement:float, delay_bias:float, sourcemeter_source:str, sourcemeter_compliance:float, sourcemter_channel: str, sourcemeter_limit:str, sourcemeter_nplc:float, sourcemeter_average:str, multimeter_function:str, multimeter_resolution:float, multimeter_autorange:bool, multimeter_range:int, multimeter_average:int, field_constant:float, gaussmeter_range:str, gaussmeter_resolution:str, multimeter_nplc:str, address_daq:str, field_step:float, rotationstation_port:str, constant_field_value:float, rotation_axis:str, rotation_polar_constant:float, rotation_azimuth_constant:float,pulsegenerator_duration,pulsegenerator_offset,pulsegenerator_pulsetype,pulsegenerator_channel,pulsegenerator_compliance,pulsegenerator_source_range,field_bias_value,remagnetization,remagnetization_value,remagnetization_time,hold_the_field_after_measurement,remanency_correction,remanency_correction_time,set_polar_angle,set_azimuthal_angle, field_ramp_rate:float) -> None:
     
         ## parameter initialization
         self.sourcemeter = sourcemeter
@@ -90,6 +92,8 @@ class CIMSMode():
 
         self.set_polar_angle=set_polar_angle
         self.set_azimuthal_angle=set_azimuthal_angle
+        self.field_ramp_rate = field_ramp_rate
+        self.profiler = PhaseProfiler()
 
         self.remanency_correction=remanency_correction
         self.remanency_correction_time=remanency_correction_time
@@ -112,20 +116,20 @@ class CIMSMode():
         # Hardware objects initialization
         match self.sourcemeter:
             case "Keithley 2400":
-                self.sourcemeter_obj = Keithley2400(self.address_sourcemeter)
+                self.sourcemeter_obj = session_pool.get(Keithley2400, self.address_sourcemeter)
                 #self.sourcemeter_obj.reset()
                 self.sourcemeter_obj.config_average(self.sourcemeter_average)
             case "Keithley 2636":
                 if self.sourcemeter_channel=="Channel A":
-                    self.sourcemeter_obj = Keithley2636(self.address_sourcemeter).ChA
+                    self.sourcemeter_obj = session_pool.get(Keithley2636, self.address_sourcemeter).ChA
                 else:
-                    self.sourcemeter_obj = Keithley2636(self.address_sourcemeter).ChB
+                    self.sourcemeter_obj = session_pool.get(Keithley2636, self.address_sourcemeter).ChB
                 #self.sourcemeter_obj.reset()        
             case "Agilent 2912":
                 if self.sourcemeter_channel=="Channel A":
-                    self.sourcemeter_obj = Agilent2912(self.address_sourcemeter).ChA
+                    self.sourcemeter_obj = session_pool.get(Agilent2912, self.address_sourcemeter).ChA
                 else:
-                    self.sourcemeter_obj = Agilent2912(self.address_sourcemeter).ChB
+                    self.sourcemeter_obj = session_pool.get(Agilent2912, self.address_sourcemeter).ChB
                 #self.sourcemeter_obj.reset()
                 self.sourcemeter_obj.func_shape="DC"
             case _: 
@@ -134,14 +138,14 @@ class CIMSMode():
 
         match self.pulsegenerator:
             case "Tektronix 10,070A":
-                self.pulsegenerator_obj=Tektronix10070a(self.address_pulsegenerator)
+                self.pulsegenerator_obj=session_pool.get(Tektronix10070a, self.address_pulsegenerator)
                 #self.sourcemeter_obj.reset()
                 self.pulsegenerator_obj.trigger_source="GPIB"
             case "Agilent 2912":
                 if self.pulsegenerator_channel=="Channel A":
-                    self.pulsegenerator_obj = Agilent2912(self.address_pulsegenerator).ChA
+                    self.pulsegenerator_obj = session_pool.get(Agilent2912, self.address_pulsegenerator).ChA
                 else:
-                    self.pulsegenerator_obj = Agilent2912(self.address_pulsegenerator).ChB
+                    self.pulsegenerator_obj = session_pool.get(Agilent2912, self.address_pulsegenerator).ChB
                 #self.sourcemeter_obj.reset()
                 self.pulsegenerator_obj.source_mode=self.pulsegenerator_pulsetype
                 self.pulsegenerator_obj.func_shape="PULSE"
@@ -149,9 +153,9 @@ class CIMSMode():
                 self.pulsegenerator_obj.trigger_bypass="ONCE"
             case "Keithley 2636":
                 if self.pulsegenerator_channel=="Channel A":
-                    self.pulsegenerator_obj=Keithley2636(self.address_pulsegenerator).ChA
+                    self.pulsegenerator_obj=session_pool.get(Keithley2636, self.address_pulsegenerator).ChA
                 else:
-                    self.pulsegenerator_obj=Keithley2636(self.address_pulsegenerator).ChB
+                    self.pulsegenerator_obj=session_pool.get(Keithley2636, self.address_pulsegenerator).ChB
                 #self.sourcemeter_obj.reset()
                 self.pulsegenerator_obj.single_pulse_prepare()
             case _:
@@ -160,16 +164,16 @@ class CIMSMode():
                 
         match self.gaussmeter: 
             case "Lakeshore": 
-                self.gaussmeter_obj = Lakeshore(self.address_gaussmeter)
+                self.gaussmeter_obj = session_pool.get(Lakeshore, self.address_gaussmeter)
             case "GM700":
-                self.gaussmeter_obj = GM700(self.address_gaussmeter)
+                self.gaussmeter_obj = session_pool.get(GM700, self.address_gaussmeter)
             case _:
                 self.gaussmeter_obj = DummyGaussmeter(self.address_gaussmeter)
                 log.warning('Used dummy Gaussmeter.')
         
         match self.field:
             case "DAQ": 
-                self.field_obj = DAQ(self.address_daq)
+                self.field_obj = session_pool.get(DAQ, self.address_daq)
             case _:
                 self.field_obj = DummyField(self.address_daq)
                 log.warning('Used dummy DAQ.')           
@@ -199,11 +203,12 @@ class CIMSMode():
         #Rotation station for const angle initizalization
         if self.rotation_axis=="None":
             try:
-                self.rotationstation_obj = RotationStage(self.rotationstation_port)
+                self.rotationstation_obj = session_pool.get(RotationStage, self.rotationstation_port)
                 self.rotationstation_obj.goToAzimuth(self.set_azimuthal_angle)
                 self.rotationstation_obj.goToPolar(self.set_polar_angle)
             except:
                 log.error("Rotation station is not initialized")
+                session_pool.discard(RotationStage, self.rotationstation_port)
                 self.rotationstation_obj = RotationStageDummy(self.rotationstation_port)
 
         #Lakeshore initalization 
@@ -211,6 +216,7 @@ class CIMSMode():
         self.gaussmeter_obj.resolution(self.gaussmeter_resolution)
         
         self.field_obj.field_constant = self.field_constant
+        self.field_obj.ramp_rate = self.field_ramp_rate
 
         #Field remagnetization
         if self.remagnetization:
@@ -262,10 +268,12 @@ class CIMSMode():
             self.tmp_field = point
         else: 
             self.tmp_field = self.gaussmeter_obj.measure()
+        self.profiler.mark("Gaussmeter read")
         sleep(self.delay_bias)
 
 
         sleep(self.delay_measurement)
+        self.profiler.mark("Bias delay")
         #----Give pulse-----------------------------------------------------
         self.pulsegenerator_obj.amplitude=[(self.pulsegenerator_pulsetype,point),point][self.pulsegenerator=="Tektronix 10,070A"]
         self.pulsegenerator_obj.enable_source()
@@ -311,6 +319,7 @@ class CIMSMode():
         #odlaczenie miernika
         if self.mode_cims_relays:
             self.sourcemeter_obj.disable_source()
+        self.profiler.mark("Readout")
             
         data = {
             'Voltage (V)':self.tmp_voltage, 
@@ -339,6 +348,7 @@ class CIMSMode():
 
         else:
             sweep_field_to_zero(self.field_bias_value-self.actual_remanency, self.field_constant, self.field_step, self.field_obj)
+        self.field_obj.close()
 
         if self.rotation_axis=="None" and self.return_the_rotationstation: 
             self.rotationstation_obj.goToZero() 
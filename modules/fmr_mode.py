@@ -19,11 +19,15 @@ from hardware.agilent_34410a import Agilent34410A
 from hardware.dummy_multimeter import DummyMultimeter
 from hardware.rotation_stage import RotationStage
 from hardware.rotation_stage_dummy import RotationStageDummy
+from hardware.session_pool import session_pool
 
 from logic.vector import Vector
 from logic.lockin_parameters import _lockin_timeconstant, _lockin_sensitivity, _lockin_filter_slope
 from logic.sweep_field_to_zero import sweep_field_to_zero
 from logic.sweep_field_to_value import sweep_field_to_value
+from logic.settle_field import settle_field
+from logic.phase_profiler import PhaseProfiler
+from logic.concurrent_readout import ConcurrentReadout, shared_bus
 
 log = logging.getLogger(__name__)
 log.addHandler(logging.NullHandler())
@@ -92,6 +96,13 @@ class FMRMode:
         lockin_slope: str,
         polarity_control_enabled: bool,
         address_polarity_control: str,
+        lockin_buffered_average: bool,
+        lockin_sample_frequency: float,
+        field_ramp_rate: float,
+        field_settle_adaptive: bool,
+        field_settle_tolerance: float,
+        field_settle_readings: int,
+        concurrent_readout: bool,
     ) -> None:
 
         self.set_automaticstation = set_automaticstation
@@ -162,6 +173,18 @@ class FMRMode:
         self.polarity_control_enabled = polarity_control_enabled
         self.address_polarity_control = address_polarity_control
 
+        self.lockin_buffered_average = lockin_buffered_average
+        self.lockin_sample_frequency = lockin_sample_frequency
+        self.field_ramp_rate = field_ramp_rate
+        self.field_settle_adaptive = field_settle_adaptive
+        self.field_settle_tolerance = field_settle_tolerance
+        self.field_settle_readings = field_settle_readings
+        self.profiler = PhaseProfiler()
+        # gaussmeter and lock-in/multimeter are read at the same time unless they share a GPIB board
+        self.readout = ConcurrentReadout(concurrent_readout and not shared_bus(self.address_gaussmeter, self.address_multimeter if self.measdevice == "Multimeter" else self.address_lockin))
+        self.field_state = None  # field left by the previous experiment of the queue
+        self.handover_field = False  # leave the field for the next experiment of the queue
+
         ## parameter initialization
 
     def generate_points(self):
@@ -179,7 +202,7 @@ class FMRMode:
         if self.measdevice == "LockIn":
             match self.set_lockin:
                 case "SR830":
-                    self.lockin_obj = SR830(self.address_lockin)
+                    self.lockin_obj = session_pool.get(SR830, self.address_lockin)
                 case "Zurich":
                     pass
                 case _:
@@ -190,7 +213,7 @@ class FMRMode:
         else:
             match self.set_multimeter:
                 case "Agilent 34400":
-                    self.multimeter_obj = Agilent34410A(self.address_multimeter)
+                    self.multimeter_obj = session_pool.get(Agilent34410A, self.address_multimeter)
                 case _:
                     self.multimeter_obj = DummyMultimeter(self.address_multimeter)
                     log.warning("Used dummy Multimeter.")
@@ -200,16 +223,16 @@ class FMRMode:
 
         match self.set_gaussmeter:
             case "Lakeshore":
-                self.gaussmeter_obj = Lakeshore(self.address_gaussmeter)
+                self.gaussmeter_obj = session_pool.get(Lakeshore, self.address_gaussmeter)
             case "GM700":
-                self.gaussmeter_obj = GM700(self.address_gaussmeter)
+                self.gaussmeter_obj = session_pool.get(GM700, self.address_gaussmeter)
             case _:
                 self.gaussmeter_obj = DummyGaussmeter(self.address_gaussmeter)
                 log.warning("Used dummy Gaussmeter.")
 
         match self.set_field:
             case "DAQ":
-                self.field_obj = DAQ(self.address_daq)
+                self.field_obj = session_pool.get(DAQ, self.address_daq)
             case _:
                 self.field_obj = DummyField(self.address_daq)
                 log.warning("Used dummy DAQ.")
@@ -222,10 +245,11 @@ class FMRMode:
 
         match self.set_generator:
             case "Agilent":
-                self.generator_obj = FGenDriver(self.address_generator)
+                self.generator_obj = session_pool.get(FGenDriver, self.address_generator)
             case "Windfreak":
                 channel = 0 if self.generator_channel == "A" else 1
-                self.generator_obj = Windfreak(self.address_generator, channel=channel)
+                self.generator_obj = session_pool.get(Windfreak, self.address_generator)
+                self.generator_obj.setChannel(channel)
             case _:
                 self.generator_obj = DummyFgenDriver()
                 log.warning("Used dummy Frequency Generator.")
@@ -233,9 +257,9 @@ class FMRMode:
         match self.set_lfgen:
             case "SR830":
                 if type(self.lockin_obj) is DummyLockin:
-                    self.lockin_obj = SR830(self.address_lockin)
+                    self.lockin_obj = session_pool.get(SR830, self.address_lockin)
             case "HP33120A":
-                self.lfgen_obj = LFGenDriver(self.address_lfgen)
+                self.lfgen_obj = session_pool.get(LFGenDriver, self.address_lfgen)
             case _:
                 self.lfgen_obj = DummyLFGenDriver()
                 log.warning("Used dummy Modulation Generator.")
@@ -256,6 +280,8 @@ class FMRMode:
         self.lockin_obj.input_config = self.lockin_input_connection
         self.lockin_obj.input_coupling = self.lockin_input_coupling
         self.lockin_obj.reference_source = self.lockin_reference_source
+        if self.lockin_buffered_average:
+            self.lockin_obj.sample_frequency = self.lockin_sample_frequency
 
         # Multimeter initialization
         if not self.multimeter_autorange:
@@ -277,6 +303,7 @@ class FMRMode:
             
         # Field initialization
         self.field_obj.field_constant = self.field_constant
+        self.field_obj.ramp_rate = self.field_ramp_rate
         self.field_step = self.field_step
         self.field_obj.polarity_control_enabled = self.polarity_control_enabled
         self.field_obj.address_polarity_control = self.address_polarity_control
@@ -288,7 +315,7 @@ class FMRMode:
         # RotationStation initialization
         if self.rotationstation:
             try:
-                self.rotationstation_obj = RotationStage(self.rotationstation_port)
+                self.rotationstation_obj = session_pool.get(RotationStage, self.rotationstation_port)
 
                 self.rotationstation_obj.goToAzimuth(self.rotation_azimuth_constant)
                 while self.rotationstation_obj.checkBusyAzimuth() == "BUSY;":
@@ -299,11 +326,13 @@ class FMRMode:
                     sleep(0.01)
             except:
                 log.error("Rotation station is not initialized")
+                session_pool.discard(RotationStage, self.rotationstation_port)
                 self.rotationstation_obj = RotationStageDummy(self.rotationstation_port)
 
         self.begin()
 
     def begin(self):
+        self.start_field = 0.0 if self.field_state is None else self.field_obj.restore_field_state(self.field_state)
         match self.generator_measurement_mode:
             case "V-FMR":
                 # Generator initialization
@@ -311,18 +340,18 @@ class FMRMode:
                 self.generator_obj.setPower(self.generator_power)
                 # Field initialization
                 if self.rotationstation:
-                    sweep_field_to_value(0, self.constant_field_value, self.field_step, self.field_obj)
+                    sweep_field_to_value(self.start_field, self.constant_field_value, self.field_step, self.field_obj)
                 else:
-                    sweep_field_to_value(0, self.point_list[0], self.field_step, self.field_obj)
+                    sweep_field_to_value(self.start_field, self.point_list[0], self.field_step, self.field_obj)
             case "ST-FMR":
                 # Generator initialization
                 self.generator_obj.setFreq(self.point_list[0])
                 self.generator_obj.setPower(self.generator_power)
                 # Field initialization
                 if self.rotationstation:
-                    sweep_field_to_value(0, self.constant_field_value, self.field_step, self.field_obj)
+                    sweep_field_to_value(self.start_field, self.constant_field_value, self.field_step, self.field_obj)
                 else:
-                    sweep_field_to_value(0, self.constant_field_value, self.field_step, self.field_obj)
+                    sweep_field_to_value(self.start_field, self.constant_field_value, self.field_step, self.field_obj)
 
         self.generator_obj.set_lf_signal()
         self.generator_obj.setOutput(True, True if (self.set_lfgen == "none" and self.measdevice == "LockIn") else False)
@@ -335,8 +364,21 @@ class FMRMode:
 
         sleep(1)
 
+    def settle(self, field):
+        self.profiler.mark("Field set")
+        if self.field_settle_adaptive and self.set_gaussmeter != "none":
+            self.settle_time = settle_field(self.gaussmeter_obj, self.delay_field, self.field_settle_tolerance, self.field_settle_readings, field)[1]
+        else:
+            sleep(self.delay_field)
+            self.settle_time = self.delay_field
+        self.profiler.mark("Settle")
+
     def operating(self, point):
-        sleep(self.delay_field)
+        self.settle_time = math.nan
+        # with adaptive settling the field step below is followed by its own wait
+        if not (self.field_settle_adaptive and self.generator_measurement_mode == "V-FMR" and not self.rotationstation):
+            sleep(self.delay_field)
+        self.profiler.mark("Settle")
         # set temporary result list
         self.result_list = []
 
@@ -359,13 +401,11 @@ class FMRMode:
 
                 else:
                     self.field_obj.set_field(point)
-                    sleep(self.delay_field)
+                    self.settle(point)
 
+                self.profiler.mark("Field set")
                 # measure field
-                if self.set_gaussmeter == "none":
-                    self.tmp_field = point
-                else:
-                    self.tmp_field = self.gaussmeter_obj.measure()
+                self.readout.submit("field", self.measure_field, point)
 
             case "ST-FMR":
                 if self.rotationstation:
@@ -385,33 +425,23 @@ class FMRMode:
 
                 else:
                     self.generator_obj.setFreq(point)
+                    self.profiler.mark("Field set")
                     sleep(self.delay_field)
+                    self.profiler.mark("Settle")
 
+                self.profiler.mark("Field set")
                 # measure field
-                if self.set_gaussmeter == "none":
-                    self.tmp_field = point
-                else:
-                    self.tmp_field = self.gaussmeter_obj.measure()
+                self.readout.submit("field", self.measure_field, point)
 
+        self.profiler.mark("Gaussmeter read")
         sleep(self.delay_lockin)
+        self.profiler.mark("Bias delay")
 
-        self.result1 = math.nan
-        self.result2 = math.nan
-
-        if self.measdevice == "LockIn":
-            # measure_lockin
-            # measure_lockin
-            # measure_lockin
-            for i in range(self.lockin_average):
-                result = self.lockin_obj.snap("{}".format(self.lockin_channel1), "{}".format(self.lockin_channel2))
-                self.result_list.append(result)
-
-            # calculate average:
-            self.result1 = np.average([i[0] for i in self.result_list])
-            self.result2 = np.average([i[1] for i in self.result_list])
-        else:
-            # measure_multimeter
-            result = np.average(self.multimeter_obj.reading)
+        self.readout.submit("signal", self.measure_signal)
+        results = self.readout.join()
+        self.tmp_field = results["field"]
+        result, self.result1, self.std1, self.result2, self.std2 = results["signal"]
+        self.profiler.mark("Readout")
 
         data = {
             "Voltage (V)": result if self.measdevice == "Multimeter" else math.nan,
@@ -424,16 +454,50 @@ class FMRMode:
             "Phase": self.result1 if self.lockin_channel1 == "Theta" else (self.result2 if self.lockin_channel2 == "Theta" else math.nan),
             "Polar angle (deg)": self.polar_angle if self.rotationstation == True else math.nan,
             "Azimuthal angle (deg)": self.azimuthal_angle if self.rotationstation == True else math.nan,
+            "Resistance std (ohm)": self.std1 if self.lockin_channel1 == "R" else (self.std2 if self.lockin_channel2 == "R" else math.nan),
+            "X std (V)": self.std1 if self.lockin_channel1 == "X" else (self.std2 if self.lockin_channel2 == "X" else math.nan),
+            "Y std (V)": self.std1 if self.lockin_channel1 == "Y" else (self.std2 if self.lockin_channel2 == "Y" else math.nan),
+            "Phase std": self.std1 if self.lockin_channel1 == "Theta" else (self.std2 if self.lockin_channel2 == "Theta" else math.nan),
+            "Settle time (s)": self.settle_time,
         }
 
         return data
 
+    def measure_field(self, point):
+        if self.set_gaussmeter == "none":
+            return point
+        return self.gaussmeter_obj.measure()
+
+    def measure_signal(self):
+        """
+        Returns the multimeter reading and the lock-in averages and standard deviations of both channels, NaN for the unused device.
+        """
+        if self.measdevice != "LockIn":
+            # measure_multimeter
+            return np.average(self.multimeter_obj.reading), math.nan, math.nan, math.nan, math.nan
+
+        # measure_lockin
+        if self.lockin_buffered_average:
+            return (math.nan,) + tuple(self.lockin_obj.buffer_average(self.lockin_average, self.lockin_sample_frequency))
+
+        result_list = []
+        for i in range(self.lockin_average):
+            result_list.append(self.lockin_obj.snap("{}".format(self.lockin_channel1), "{}".format(self.lockin_channel2)))
+
+        # calculate average:
+        return (math.nan, np.average([i[0] for i in result_list]), np.std([i[0] for i in result_list]),
+                np.average([i[1] for i in result_list]), np.std([i[1] for i in result_list]))
+
     def end(self):
         FMRMode.idle(self)
 
     def idle(self):
-        if self.hold_the_field_after_measurement == False:
+        self.readout.shutdown()
+        if self.handover_field:
+            log.info("Field is handed over to the next experiment.")
+        elif self.hold_the_field_after_measurement == False:
             sweep_field_to_zero(self.tmp_field, self.field_constant, self.field_step, self.field_obj)
+        self.field_obj.close()
         self.generator_obj.setOutput(False)
         if self.return_the_rotationstation and self.rotationstation == True:
             self.rotationstation_obj.goToZero()
@@ -12,10 +12,14 @@ from hardware.dummy_gaussmeter import DummyGaussmeter
 from hardware.dummy_field import DummyField
 from hardware.rotation_stage import RotationStage
 from hardware.rotation_stage_dummy import RotationStageDummy
+from hardware.session_pool import session_pool
 from logic.vector import Vector
 from logic.lockin_parameters import _lockin_timeconstant, _lockin_sensitivity, _lockin_filter_slope
 from logic.sweep_field_to_zero import sweep_field_to_zero 
 from logic.sweep_field_to_value import sweep_field_to_value
+from logic.settle_field import settle_field
+from logic.phase_profiler import PhaseProfiler
+from logic.concurrent_readout import ConcurrentReadout, shared_bus
 log = logging.getLogger(__name__) 
 log.addHandler(logging.NullHandler()) 
 
@@ -59,7 +63,14 @@ class HarmonicMode():
         set_azimuthal_angle:float,
         hold_the_field_after_measurement:bool,
         return_the_rotationstation:bool,
-        lockin_slope:str
+        lockin_slope:str,
+        lockin_buffered_average:bool,
+        lockin_sample_frequency:float,
+        field_ramp_rate:float,
+        field_settle_adaptive:bool,
+        field_settle_tolerance:float,
+        field_settle_readings:int,
+        concurrent_readout:bool
          ) -> None: 
         self.set_automaticstation = set_automaticstation
         self.set_lockin = set_lockin
@@ -103,6 +114,17 @@ class HarmonicMode():
         self.return_the_rotationstation = return_the_rotationstation
         
         self.lockin_slope = lockin_slope
+        self.lockin_buffered_average = lockin_buffered_average
+        self.lockin_sample_frequency = lockin_sample_frequency
+        self.field_ramp_rate = field_ramp_rate
+        self.field_settle_adaptive = field_settle_adaptive
+        self.field_settle_tolerance = field_settle_tolerance
+        self.field_settle_readings = field_settle_readings
+        self.profiler = PhaseProfiler()
+        # gaussmeter and lock-in are read at the same time unless they share a GPIB board
+        self.readout = ConcurrentReadout(concurrent_readout and not shared_bus(self.address_gaussmeter, self.address_lockin))
+        self.field_state = None  # field left by the previous experiment of the queue
+        self.handover_field = False  # leave the field for the next experiment of the queue
 
 
 ## INITIALIZATION:
@@ -127,8 +149,9 @@ class HarmonicMode():
         match self.set_lockin:
             case "SR830":
                 try:
-                    self.lockin_obj = SR830(self.address_lockin)
+                    self.lockin_obj = session_pool.get(SR830, self.address_lockin)
                 except:
+                    session_pool.discard(SR830, self.address_lockin)
                     self.lockin_obj = DummyLockin()
                     log.warning('Used dummy Lockin.')
 
@@ -140,16 +163,16 @@ class HarmonicMode():
         
         match self.set_gaussmeter: 
             case "Lakeshore": 
-                self.gaussmeter_obj = Lakeshore(self.address_gaussmeter)
+                self.gaussmeter_obj = session_pool.get(Lakeshore, self.address_gaussmeter)
             case "GM700":
-                self.gaussmeter_obj = GM700(self.address_gaussmeter)
+                self.gaussmeter_obj = session_pool.get(GM700, self.address_gaussmeter)
             case _:
                 self.gaussmeter_obj = DummyGaussmeter(self.address_gaussmeter)
                 log.warning('Used dummy Gaussmeter.')
         
         match self.set_field:
             case "DAQ": 
-                self.field_obj = DAQ(self.address_daq)
+                self.field_obj = session_pool.get(DAQ, self.address_daq)
             case _:
                 self.field_obj = DummyField(self.address_daq)
                 log.warning('Used dummy DAQ.')
@@ -175,6 +198,8 @@ class HarmonicMode():
         self.lockin_obj.input_config = self.lockin_input_connection
         self.lockin_obj.input_coupling = self.lockin_input_coupling
         self.lockin_obj.reference_source = self.lockin_reference_source
+        if self.lockin_buffered_average:
+            self.lockin_obj.sample_frequency = self.lockin_sample_frequency
    
 
 #Lakeshore initalization 
@@ -186,7 +211,7 @@ class HarmonicMode():
 ### Set rotation station to constant angle
         if self.rotationstation: 
             try:
-                self.rotationstation_obj = RotationStage(self.rotationstation_port)
+                self.rotationstation_obj = session_pool.get(RotationStage, self.rotationstation_port)
                 match self.rotation_axis:
                     case "Polar": 
                         self.rotationstation_obj.goToAzimuth(self.rotation_azimuth_constant)
@@ -206,19 +231,32 @@ class HarmonicMode():
 
             except:
                 log.warning("Rotation station is not initialized")
+                session_pool.discard(RotationStage, self.rotationstation_port)
                 self.rotationstation_obj = RotationStageDummy(self.rotationstation_port)
       
 #Field initialization 
         self.field_obj.field_constant = self.field_constant
+        self.field_obj.ramp_rate = self.field_ramp_rate
+        self.start_field = 0.0 if self.field_state is None else self.field_obj.restore_field_state(self.field_state)
         if self.rotationstation:
-            sweep_field_to_value(0.0, float(self.constant_field_value), self.field_step, self.field_obj)
+            sweep_field_to_value(self.start_field, float(self.constant_field_value), self.field_step, self.field_obj)
         else:
-            sweep_field_to_value(0.0, self.point_list[0], self.field_step, self.field_obj)
+            sweep_field_to_value(self.start_field, self.point_list[0], self.field_step, self.field_obj)
 
     
+    def settle(self, field):
+        self.profiler.mark("Field set")
+        if self.field_settle_adaptive and self.set_gaussmeter != "none":
+            self.settle_time = settle_field(self.gaussmeter_obj, self.delay_field, self.field_settle_tolerance, self.field_settle_readings, field)[1]
+        else:
+            sleep(self.delay_field)
+            self.settle_time = self.delay_field
+        self.profiler.mark("Settle")
+
     def operating(self, point):
         #set temporary result list
         self.result_list = []
+        self.settle_time = math.nan
         if self.rotationstation:
             match self.rotation_axis:
                 case "Polar":
@@ -237,33 +275,27 @@ class HarmonicMode():
                     self.field_obj.set_field(point)
                     self.polar_angle = self.set_polar_angle
                     self.azimuthal_angle = self.set_azimuthal_angle
-                    sleep(self.delay_field)
+                    self.settle(point)
 
         else:                
             #set_field
             self.field_obj.set_field(point)
-            sleep(self.delay_field)
+            self.settle(point)
             
-
+        self.profiler.mark("Field set")
 
         #measure_field
-        if self.set_gaussmeter == "none":
-            if self.rotationstation:
-                self.tmp_field = self.constant_field_value
-            else: 
-                self.tmp_field = point
-        else: 
-            self.tmp_field = self.gaussmeter_obj.measure()
+        self.readout.submit("field", self.measure_field, point)
+        self.profiler.mark("Gaussmeter read")
         sleep(self.delay_bias)
+        self.profiler.mark("Bias delay")
 
         #measure_lockin 
-        for i in range(self.lockin_average):
-            self.result = self.lockin_obj.snap("{}".format(self.lockin_channel1), "{}".format(self.lockin_channel2))
-            self.result_list.append(self.result)
-        
-        #calculate average:
-        self.result1 = np.average([i[0] for i in self.result_list])
-        self.result2 = np.average([i[1] for i in self.result_list])
+        self.readout.submit("lockin", self.measure_lockin)
+        results = self.readout.join()
+        self.tmp_field = results["field"]
+        self.result1, self.std1, self.result2, self.std2 = results["lockin"]
+        self.profiler.mark("Readout")
             
         data = {
             'Voltage (V)': math.nan,
@@ -275,19 +307,46 @@ class HarmonicMode():
             'Y (V)':  self.result1 if self.lockin_channel1 == "Y" else (self.result2 if self.lockin_channel2 == "Y" else math.nan), 
             'Phase': self.result1 if self.lockin_channel1 == "Theta" else (self.result2 if self.lockin_channel2 == "Theta" else math.nan),
             'Polar angle (deg)': self.polar_angle if self.rotationstation == True else math.nan,
-            'Azimuthal angle (deg)': self.azimuthal_angle if self.rotationstation == True else math.nan
+            'Azimuthal angle (deg)': self.azimuthal_angle if self.rotationstation == True else math.nan,
+            'Resistance std (ohm)': self.std1 if self.lockin_channel1 == "R" else (self.std2 if self.lockin_channel2 == "R" else math.nan),
+            'X std (V)': self.std1 if self.lockin_channel1 == "X" else (self.std2 if self.lockin_channel2 == "X" else math.nan),
+            'Y std (V)': self.std1 if self.lockin_channel1 == "Y" else (self.std2 if self.lockin_channel2 == "Y" else math.nan),
+            'Phase std': self.std1 if self.lockin_channel1 == "Theta" else (self.std2 if self.lockin_channel2 == "Theta" else math.nan),
+            'Settle time (s)': self.settle_time
             }
         
         return data 
         
 
+    def measure_field(self, point):
+        if self.set_gaussmeter == "none":
+            if self.rotationstation:
+                return self.constant_field_value
+            return point
+        return self.gaussmeter_obj.measure()
+
+    def measure_lockin(self):
+        if self.lockin_buffered_average:
+            return self.lockin_obj.buffer_average(self.lockin_average, self.lockin_sample_frequency)
+
+        result_list = []
+        for i in range(self.lockin_average):
+            result_list.append(self.lockin_obj.snap("{}".format(self.lockin_channel1), "{}".format(self.lockin_channel2)))
+
+        #calculate average:
+        return (np.average([i[0] for i in result_list]), np.std([i[0] for i in result_list]),
+                np.average([i[1] for i in result_list]), np.std([i[1] for i in result_list]))
+
     def end(self):
         HarmonicMode.idle(self)
 
     def idle(self):
-        
-        if self.hold_the_field_after_measurement==False:
+        self.readout.shutdown()
+        if self.handover_field:
+            log.info("Field is handed over to the next experiment.")
+        elif self.hold_the_field_after_measurement==False:
             sweep_field_to_zero(self.tmp_field, self.field_constant, self.field_step, self.field_obj)
+        self.field_obj.close()
 
         if self.return_the_rotationstation and self.rotationstation == True: 
             self.rotationstation_obj.goToZero() 
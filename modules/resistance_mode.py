@@ -19,14 +19,18 @@ from hardware.dummy_gaussmeter import DummyGaussmeter
 from hardware.dummy_field import DummyField
 from hardware.rotation_stage import RotationStage
 from hardware.rotation_stage_dummy import RotationStageDummy
+from hardware.session_pool import session_pool
 from logic.vector import Vector
 from logic.sweep_field_to_zero import sweep_field_to_zero 
 from logic.sweep_field_to_value import sweep_field_to_value
+from logic.settle_field import settle_field
+from logic.phase_profiler import PhaseProfiler
+from logic.concurrent_readout import ConcurrentReadout, shared_bus
 log = logging.getLogger(__name__) 
 log.addHandler(logging.NullHandler()) 
 
 class ResistanceMode():
-    def __init__(self, vector:str, fourpoints:bool,  sourcemeter_bias:float, sourcemeter:str, multimeter:str, gaussmeter:str, field:str, automaticstation:bool, switch: bool, kriostat:bool, rotationstation: bool,return_the_rotationstation:bool, address_sourcemeter:str, address_multimeter:str, address_gaussmeter:str, address_switch:str, delay_field:float, delay_lockin:float, delay_bias:float, sourcemeter_source:str, sourcemeter_compliance:float, sourcemter_channel: str, sourcemeter_limit:str, sourcemeter_nplc:float, sourcemeter_average:str, multimeter_function:str, multimeter_resolution:float, multimeter_autorange:bool, multimeter_range:int, multimeter_average:int, field_constant:float, gaussmeter_range:str, gaussmeter_resolution:str, multimeter_nplc:str, address_daq:str, field_step:float, rotationstation_port:str, constant_field_value:float, rotation_axis:str, rotation_polar_constant:float, rotation_azimuth_constant:float,set_polar_angle,set_azimuthal_angle) -> None:   
+    def __init__(self, vector:str, fourpoints:bool,  sourcemeter_bias:float, sourcemeter:str, multimeter:str, gaussmeter:str, field:str, automaticstation:bool, switch: bool, kriostat:bool, rotationstation: bool,return_the_rotationstation:bool, address_sourcemeter:str, address_multimeter:str, address_gaussmeter:str, address_switch:str, delay_field:float, delay_lockin:float, delay_bias:float, sourcemeter_source:str, sourcemeter_compliance:float, sourcemter_channel: str, sourcemeter_limit:str, sourcemeter_nplc:float, sourcemeter_average:str, multimeter_function:str, multimeter_resolution:float, multimeter_autorange:bool, multimeter_range:int, multimeter_average:int, field_constant:float, gaussmeter_range:str, gaussmeter_resolution:str, multimeter_nplc:str, address_daq:str, field_step:float, rotationstation_port:str, constant_field_value:float, rotation_axis:str, rotation_polar_constant:float, rotation_azimuth_constant:float,set_polar_angle,set_azimuthal_angle, field_ramp_rate:float, field_settle_adaptive:bool, field_settle_tolerance:float, field_settle_readings:int, concurrent_readout:bool) -> None:   
         ## parameter initialization 
         self.sourcemeter = sourcemeter
         self.multimeter = multimeter
@@ -72,6 +76,15 @@ class ResistanceMode():
 
         self.set_polar_angle=set_polar_angle
         self.set_azimuthal_angle=set_azimuthal_angle
+        self.field_ramp_rate = field_ramp_rate
+        self.field_settle_adaptive = field_settle_adaptive
+        self.field_settle_tolerance = field_settle_tolerance
+        self.field_settle_readings = field_settle_readings
+        self.profiler = PhaseProfiler()
+        # gaussmeter and multimeter/sourcemeter are read at the same time unless they share a GPIB board
+        self.readout = ConcurrentReadout(concurrent_readout and not shared_bus(self.address_gaussmeter, self.address_multimeter if self.fourpoints else self.address_sourcemeter))
+        self.field_state = None  # field left by the previous experiment of the queue
+        self.handover_field = False  # leave the field for the next experiment of the queue
         
         
     def generate_points(self):
@@ -89,42 +102,42 @@ class ResistanceMode():
         # Hardware objects initialization
         match self.sourcemeter:
             case "Keithley 2400":
-                self.sourcemeter_obj = Keithley2400(self.address_sourcemeter)
+                self.sourcemeter_obj = session_pool.get(Keithley2400, self.address_sourcemeter)
                 self.sourcemeter_obj.config_average(self.sourcemeter_average)
             case "Keithley 2636": 
                 if self.sourcemeter_channel=="Channel A":
-                    self.sourcemeter_obj = Keithley2636(self.address_sourcemeter).ChA
+                    self.sourcemeter_obj = session_pool.get(Keithley2636, self.address_sourcemeter).ChA
                 else:
-                    self.sourcemeter_obj = Keithley2636(self.address_sourcemeter).ChB
+                    self.sourcemeter_obj = session_pool.get(Keithley2636, self.address_sourcemeter).ChB
                
             case "Agilent 2912": 
                 if self.sourcemeter_channel=="Channel A":
-                    self.sourcemeter_obj = Agilent2912(self.address_sourcemeter).ChA
+                    self.sourcemeter_obj = session_pool.get(Agilent2912, self.address_sourcemeter).ChA
                 else:
-                    self.sourcemeter_obj = Agilent2912(self.address_sourcemeter).ChB
+                    self.sourcemeter_obj = session_pool.get(Agilent2912, self.address_sourcemeter).ChB
             case _: 
                 self.sourcemeter_obj = DummySourcemeter(self.address_sourcemeter)
                 log.warning('Used dummy Sourcemeter.')
         
         match self.multimeter:
             case "Agilent 34400": 
-                self.multimeter_obj = Agilent34410A(self.address_multimeter)
+                self.multimeter_obj = session_pool.get(Agilent34410A, self.address_multimeter)
             case _: 
                 self.multimeter_obj = DummyMultimeter(self.address_multimeter)
                 log.warning('Used dummy Multimeter.')
         
         match self.gaussmeter: 
             case "Lakeshore": 
-                self.gaussmeter_obj = Lakeshore(self.address_gaussmeter)
+                self.gaussmeter_obj = session_pool.get(Lakeshore, self.address_gaussmeter)
             case "GM700":
-                self.gaussmeter_obj = GM700(self.address_gaussmeter)
+                self.gaussmeter_obj = session_pool.get(GM700, self.address_gaussmeter)
             case _:
                 self.gaussmeter_obj = DummyGaussmeter(self.address_gaussmeter)
                 log.warning('Used dummy Gaussmeter.')
         
         match self.field:
             case "DAQ": 
-                self.field_obj = DAQ(self.address_daq)
+                self.field_obj = session_pool.get(DAQ, self.address_daq)
             case _:
                 self.field_obj = DummyField(self.address_daq)
                 log.warning('Used dummy DAQ.')
@@ -133,7 +146,7 @@ class ResistanceMode():
 
         if self.rotationstation: 
             try:
-                self.rotationstation_obj = RotationStage(self.rotationstation_port)
+                self.rotationstation_obj = session_pool.get(RotationStage, self.rotationstation_port)
                 match self.rotation_axis:
                     case "Polar": 
                         self.rotationstation_obj.goToAzimuth(self.rotation_azimuth_constant)
@@ -141,16 +154,18 @@ class ResistanceMode():
                         self.rotationstation_obj.goToPolar(self.rotation_polar_constant)
             except:
                 log.error("Rotation station is not initialized")
+                session_pool.discard(RotationStage, self.rotationstation_port)
                 self.rotationstation_obj = RotationStageDummy(self.rotationstation_port)
 
 
         if self.rotation_axis=="None":
             try:
-                self.rotationstation_obj = RotationStage(self.rotationstation_port)
+                self.rotationstation_obj = session_pool.get(RotationStage, self.rotationstation_port)
                 self.rotationstation_obj.goToAzimuth(self.set_azimuthal_angle)
                 self.rotationstation_obj.goToPolar(self.set_polar_angle)
             except:
                 log.error("Rotation station is not initialized")
+                session_pool.discard(RotationStage, self.rotationstation_port)
                 self.rotationstation_obj = RotationStageDummy(self.rotationstation_port)
 
         #Sourcemeter initialization
@@ -184,10 +199,12 @@ class ResistanceMode():
 
         #Field initialization
         self.field_obj.field_constant = self.field_constant
+        self.field_obj.ramp_rate = self.field_ramp_rate
+        self.start_field = 0.0 if self.field_state is None else self.field_obj.restore_field_state(self.field_state)
         if self.rotationstation:
-            sweep_field_to_value(0, self.constant_field_value, self.field_step, self.field_obj)
+            sweep_field_to_value(self.start_field, self.constant_field_value, self.field_step, self.field_obj)
         else:
-            sweep_field_to_value(0, self.point_list[0], self.field_step, self.field_obj)
+            sweep_field_to_value(self.start_field, self.point_list[0], self.field_step, self.field_obj)
 
 
     def operating(self, point):
@@ -207,50 +224,30 @@ class ResistanceMode():
         else:
             pass
         self.field_obj.set_field(point)
-        sleep(self.delay_field)
+        self.profiler.mark("Field set")
+        if self.field_settle_adaptive and self.gaussmeter != "none":
+            self.settle_time = settle_field(self.gaussmeter_obj, self.delay_field, self.field_settle_tolerance, self.field_settle_readings, point)[1]
+        else:
+            sleep(self.delay_field)
+            self.settle_time = self.delay_field
+        self.profiler.mark("Settle")
 
 
         #measure field
-        if self.gaussmeter == "none":
-            self.tmp_field = point
-        else: 
-            self.tmp_field = self.gaussmeter_obj.measure()
+        self.readout.submit("field", self.measure_field, point)
+        self.profiler.mark("Gaussmeter read")
         sleep(self.delay_bias)
+        self.profiler.mark("Bias delay")
 
 
 
 
         #Measure voltage/current/resistance
-        if self.fourpoints:
-            if self.sourcemeter_source == "VOLT":
-                self.tmp_voltage = self.sourcemeter_bias
-                self.tmp_current = np.average(self.multimeter_obj.reading)
-                self.tmp_resistance = self.tmp_voltage/self.tmp_current
-            else:
-                self.tmp_voltage =  np.average(self.multimeter_obj.reading)
-                self.tmp_current =  self.sourcemeter_bias
-                self.tmp_resistance = self.tmp_voltage/self.tmp_current
-        else: 
-            if self.sourcemeter_source == "VOLT":
-                if self.sourcemeter_bias != 0:
-                    self.tmp_voltage = self.sourcemeter_bias
-                else: 
-                    self.tmp_voltage = 1e-9
-                self.tmp_current = self.sourcemeter_obj.current
-                if type(self.tmp_current) == list:
-                    self.tmp_current =np.average(self.tmp_current)
-                print(self.tmp_current)
-                self.tmp_resistance = self.tmp_voltage/self.tmp_current
-            else:
-                self.tmp_voltage =  self.sourcemeter_obj.voltage
-                if type(self.tmp_voltage) == list:
-                    self.tmp_voltage =np.average(self.tmp_voltage)
-                print(self.tmp_voltage)
-                if self.sourcemeter_bias != 0:
-                    self.tmp_current =  self.sourcemeter_bias
-                else: 
-                    self.tmp_current = 1e-9
-                self.tmp_resistance = self.tmp_voltage/self.tmp_current
+        self.readout.submit("resistance", self.measure_resistance)
+        results = self.readout.join()
+        self.tmp_field = results["field"]
+        self.tmp_voltage, self.tmp_current, self.tmp_resistance = results["resistance"]
+        self.profiler.mark("Readout")
             
         data = {
             'Voltage (V)':self.tmp_voltage, 
@@ -262,16 +259,56 @@ class ResistanceMode():
             'Y (V)': math.nan, 
             'Phase':math.nan,
             'Polar angle (deg)': self.polar_angle if self.rotationstation == True else math.nan,
-            'Azimuthal angle (deg)': self.azimuthal_angle if self.rotationstation == True else math.nan
+            'Azimuthal angle (deg)': self.azimuthal_angle if self.rotationstation == True else math.nan,
+            'Settle time (s)': self.settle_time
             }
         
         return data 
 
+    def measure_field(self, point):
+        if self.gaussmeter == "none":
+            return point
+        return self.gaussmeter_obj.measure()
+
+    def measure_resistance(self):
+        if self.fourpoints:
+            if self.sourcemeter_source == "VOLT":
+                voltage = self.sourcemeter_bias
+                current = np.average(self.multimeter_obj.reading)
+            else:
+                voltage =  np.average(self.multimeter_obj.reading)
+                current =  self.sourcemeter_bias
+        else: 
+            if self.sourcemeter_source == "VOLT":
+                if self.sourcemeter_bias != 0:
+                    voltage = self.sourcemeter_bias
+                else: 
+                    voltage = 1e-9
+                current = self.sourcemeter_obj.current
+                if type(current) == list:
+                    current =np.average(current)
+                print(current)
+            else:
+                voltage =  self.sourcemeter_obj.voltage
+                if type(voltage) == list:
+                    voltage =np.average(voltage)
+                print(voltage)
+                if self.sourcemeter_bias != 0:
+                    current =  self.sourcemeter_bias
+                else: 
+                    current = 1e-9
+        return voltage, current, voltage/current
+
     def end(self):
         ResistanceMode.idle(self)
 
     def idle(self):
+        self.readout.shutdown()
         self.sourcemeter_obj.shutdown()
-        sweep_field_to_zero(self.tmp_field, self.field_constant, self.field_step, self.field_obj)
+        if self.handover_field:
+            log.info("Field is handed over to the next experiment.")
+        else:
+            sweep_field_to_zero(self.tmp_field, self.field_constant, self.field_step, self.field_obj)
+        self.field_obj.close()
         if (self.rotationstation or self.rotation_axis=="None") and self.return_the_rotationstation: 
             self.rotationstation_obj.goToZero()
\ No newline at end of file
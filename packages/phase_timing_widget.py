@@ -0,0 +1,64 @@
+from pymeasure.display.Qt import QtCore, QtWidgets
+from logic.phase_profiler import PhaseProfiler
+import sys
+
+
+class PhaseTimingWidget(QtWidgets.QWidget):
+    """ Live breakdown of the time spent per measurement point, read from a
+    :class:`~logic.phase_profiler.PhaseProfiler` """
+
+    ROWS = PhaseProfiler.PHASES + ["Total"]
+
+    def __init__(self, refresh_time=1.0, parent=None):
+        super(PhaseTimingWidget, self).__init__(parent)
+
+        self.profiler = None
+        self._n_points = 0
+
+        self._setup_ui()
+        self._layout()
+
+        self.timer = QtCore.QTimer(self)
+        self.timer.timeout.connect(self.refresh)
+        self.timer.start(int(refresh_time * 1e3))
+
+    def _setup_ui(self):
+        self.label = QtWidgets.QLabel("Points: 0")
+        self.label.setAlignment(QtCore.Qt.AlignCenter)
+
+        self.table = QtWidgets.QTableWidget(len(self.ROWS), 3, self)
+        self.table.setHorizontalHeaderLabels(["Mean (ms)", "p95 (ms)", "Share (%)"])
+        self.table.setVerticalHeaderLabels(self.ROWS)
+        self.table.setEditTriggers(QtWidgets.QAbstractItemView.NoEditTriggers)
+        self.table.horizontalHeader().setSectionResizeMode(QtWidgets.QHeaderView.Stretch)
+
+    def _layout(self):
+        layout = QtWidgets.QVBoxLayout()
+        layout.addWidget(self.label)
+        layout.addWidget(self.table)
+        self.setLayout(layout)
+
+    def set_profiler(self, profiler):
+        self.profiler = profiler
+        self._n_points = 0
+
+    def refresh(self):
+        if self.profiler is None or len(self.profiler.points) == self._n_points:
+            return
+        self._n_points = len(self.profiler.points)
+        self.label.setText(f"Points: {self._n_points}")
+
+        summary = self.profiler.summary()
+        total = summary["Total"][0]
+        for row, phase in enumerate(self.ROWS):
+            mean, p95 = summary[phase]
+            share = 100 * mean / total if total > 0 else 0
+            for col, value in enumerate((mean * 1e3, p95 * 1e3, share)):
+                self.table.setItem(row, col, QtWidgets.QTableWidgetItem(f"{value:.1f}"))
+
+
+if __name__ == "__main__":
+    app = QtWidgets.QApplication(sys.argv)
+    widget = PhaseTimingWidget()
+    widget.show()
+    sys.exit(app.exec_())
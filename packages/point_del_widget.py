@@ -5,6 +5,8 @@ import sys
 
 
 class PointDelWidget(QtWidgets.QWidget):
+    modeChanged = QtCore.Signal(bool)
+
     def __init__(self, parent=None):
         super(PointDelWidget, self).__init__(parent)
 
@@ -49,6 +51,7 @@ class PointDelWidget(QtWidgets.QWidget):
         if not enabled:
             self.undo_all()
             self.isConfirmed = False
+        self.modeChanged.emit(enabled)
 
     def setLabelText(self):
         self.label.setText(f"Points to delete: {self.n_points_deleted}")
@@ -63,21 +66,16 @@ class PointDelWidget(QtWidgets.QWidget):
             self.undo_all_bttn.setEnabled(True)
             self.confirm_bttn.setEnabled(True)
 
-    def pointDeleted(self, curve, spot):
+    def pointDeleted(self, curve, row):
         self.isConfirmed = False
         self.inc()
-        self.undo_stack.append((curve, spot))
+        self.undo_stack.append((curve, row))
         self.updateBttns()
 
     def undo(self):
         if self.undo_stack:
-            curve, spot = self.undo_stack.pop()
-            xdata, ydata = curve.getData()
-            idx = spot.index()
-            x, y = spot.pos()
-            new_xdata = np.insert(xdata, idx, x)
-            new_ydata = np.insert(ydata, idx, y)
-            curve.setData(new_xdata, new_ydata)
+            curve, row = self.undo_stack.pop()
+            curve.restore_point(row)
             self.dec()
         self.updateBttns()
 
@@ -113,27 +111,15 @@ class PointDelWidget(QtWidgets.QWidget):
         self.setLabelText()
 
     def storeChanges(self):
-        to_rewrite = {}
+        deleted = {}
         while self.undo_stack:
-            curve, spot = self.undo_stack.pop(0)
+            curve, row = self.undo_stack.pop(0)
             results: Results = curve.results
-            try:
-                data = to_rewrite[curve][1]
-            except KeyError:
-                data = results.data
-            idx = spot.index()
-            data = data.drop(idx)
-            data = data.reset_index(drop=True)
-            to_rewrite[curve] = (results, data)
-
-        for results, data in to_rewrite.values():
-            with open(results.data_filename, "w") as f:
-                f.write(results.header())
-                f.write(results.labels())
-                for _, row in data.iterrows():
-                    f.write(results.format(row.to_dict()) + results.LINE_BREAK)
-            results.store_metadata()
-            results.reload()
+            # rows of the data shown by the curve, i.e. of results.data
+            deleted.setdefault(results, []).append(row)
+
+        for results, rows in deleted.items():
+            results.delete_rows(np.unique(rows))
 
 
 if __name__ == "__main__":
@@ -34,6 +34,25 @@ from .protocol import ProtocolAdapter
 log = logging.getLogger(__name__)
 log.addHandler(logging.NullHandler())
 
+_resource_managers = {}
+
+
+def get_resource_manager(visa_library=''):
+    """Return the :class:`pyvisa.ResourceManager` shared by all adapters of the process.
+
+    One manager is kept per `visa_library`, so opening many instruments (or reopening them
+    between experiments) does not load the VISA library again.
+
+    :param visa_library: PyVISA VisaLibrary Instance, path of the VISA library or VisaLibrary spec
+        string (``@py`` or ``@ivi``). If not given, the default for the platform will be used.
+    """
+    key = visa_library if isinstance(visa_library, str) else id(visa_library)
+    manager = _resource_managers.get(key)
+    if manager is None:
+        manager = pyvisa.ResourceManager(visa_library)
+        _resource_managers[key] = manager
+    return manager
+
 
 # noinspection PyPep8Naming,PyUnresolvedReferences
 class VISAAdapter(Adapter):
@@ -108,7 +127,7 @@ class VISAAdapter(Adapter):
             resource_name = "GPIB0::%d::INSTR" % resource_name
 
         self.resource_name = resource_name
-        self.manager = pyvisa.ResourceManager(visa_library)
+        self.manager = get_resource_manager(visa_library)
 
         # Clean up kwargs considering the interface type matching resource_name
         if_type = self.manager.resource_info(self.resource_name).interface_type
@@ -142,6 +161,9 @@ class VISAAdapter(Adapter):
                 # if using the pyvisa-sim library the manager has to be also closed.
                 # this works around https://github.com/pyvisa/pyvisa-sim/issues/82
                 self.manager.close()
+                for key, manager in list(_resource_managers.items()):
+                    if manager is self.manager:
+                        del _resource_managers[key]
         except AttributeError:
             # AttributeError can occur during __del__ calling close
             pass
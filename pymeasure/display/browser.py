@@ -51,47 +51,257 @@ class BaseBrowserItem:
         raise NotImplementedError('Must be reimplemented by subclasses')
 
 
-class BrowserItem(QtWidgets.QTreeWidgetItem, BaseBrowserItem):
-    """ Represent a row in the :class:`~pymeasure.display.browser.Browser` tree widget """
+class BrowserItem(BaseBrowserItem):
+    """ Represent a row in the :class:`~pymeasure.display.browser.Browser` view.
+
+    The item only holds the values of the row, which are displayed through the
+    :class:`~pymeasure.display.browser.BrowserModel` it is added to.
+    """
 
     def __init__(self, results, color, parent=None):
-        super().__init__(parent)
+        self.model = None
+        self.parameters = {}
 
         pixelmap = QtGui.QPixmap(24, 24)
         pixelmap.fill(color)
-        self.setIcon(0, QtGui.QIcon(pixelmap))
-        self.setFlags(self.flags() | QtCore.Qt.ItemFlag.ItemIsUserCheckable)
-        self.setCheckState(0, QtCore.Qt.CheckState.Checked)
-        self.setText(1, basename(results.data_filename))
+        self.icon = QtGui.QIcon(pixelmap)
+        self.check_state = QtCore.Qt.CheckState.Checked
+        self.filename = basename(results.data_filename)
+        self.status = results.procedure.status
+        self.progress = 0
+
+    def _changed(self, column):
+        if self.model is not None:
+            self.model.item_updated(self, column)
 
-        self.setStatus(results.procedure.status)
+    def text(self, column):
+        if column == 1:
+            return self.filename
+        if column == 2:
+            return "%d%%" % self.progress
+        if column == 3:
+            return self.status_label[self.status]
+        return self.parameters.get(column, "")
 
-        self.progressbar = QtWidgets.QProgressBar()
-        self.progressbar.setRange(0, 100)
-        self.progressbar.setValue(0)
+    def setText(self, column, text):
+        self.parameters[column] = text
+        self._changed(column)
+
+    def setIcon(self, column, icon):
+        self.icon = icon
+        self._changed(0)
+
+    def checkState(self, column=0):
+        return self.check_state
+
+    def setCheckState(self, column, state):
+        if self.model is not None:
+            self.model.set_check_state(self, state)
+        else:
+            self.check_state = state
 
     def setStatus(self, status):
-        self.setText(3, self.status_label[status])
-
-        if status == Procedure.FAILED or status == Procedure.ABORTED:
-            # Set progress bar color to red
-            return  # Commented this out
-            self.progressbar.setStyleSheet("""
-            QProgressBar {
-                border: 1px solid #AAAAAA;
-                border-radius: 5px;
-                text-align: center;
-            }
-            QProgressBar::chunk {
-                background-color: red;
-            }
-            """)
+        self.status = status
+        self._changed(3)
 
     def setProgress(self, progress):
-        self.progressbar.setValue(int(progress))
+        self.progress = int(progress)
+        self._changed(2)
+
+
+class BrowserModel(QtCore.QAbstractTableModel):
+    """ Model of the rows of the :class:`~pymeasure.display.browser.Browser`.
+
+    The rows of the items are indexed, so that updating the status or the progress
+    of an experiment does not scan the other rows. When the model is sorted, items are
+    inserted at their sorted position, and an item is moved to its sorted position
+    when the value of the sort column changes.
+    """
+    item_changed = QtCore.Signal(object, int)
+
+    def __init__(self, header_labels, parent=None):
+        super().__init__(parent)
+        self.header_labels = header_labels
+        self._items = []
+        self._rows = {}  # id(item) -> row, rebuilt when rows move
+        self._sort_column = None
+        self._sort_order = QtCore.Qt.SortOrder.AscendingOrder
+
+    def __len__(self):
+        return len(self._items)
+
+    def items(self):
+        return list(self._items)
+
+    def item(self, index):
+        """ Returns the item of a model index, or None """
+        if not index.isValid() or index.row() >= len(self._items):
+            return None
+        return self._items[index.row()]
+
+    def row(self, item):
+        """ Returns the row of an item, or None if the item is not in the model """
+        if self._rows is None:
+            self._rows = {id(item): row for row, item in enumerate(self._items)}
+        return self._rows.get(id(item))
+
+    def _key(self, item):
+        if self._sort_column == 2:
+            return item.progress
+        return item.text(self._sort_column)
+
+    def _sorted_row(self, item, exclude=None):
+        """ Returns the row after the items that do not sort after the item, counting
+        the rows without the row ``exclude`` """
+        key = self._key(item)
+        descending = self._sort_order == QtCore.Qt.SortOrder.DescendingOrder
+        low, high = 0, len(self._items) - (exclude is not None)
+        while low < high:
+            middle = (low + high) // 2
+            other = self._key(self._items[
+                middle if exclude is None or middle < exclude else middle + 1])
+            if (key > other) if descending else (key < other):
+                high = middle
+            else:
+                low = middle + 1
+        return low
+
+    def add(self, item):
+        if self._sort_column is None:
+            row = len(self._items)
+        else:
+            row = self._sorted_row(item)
+        self.beginInsertRows(QtCore.QModelIndex(), row, row)
+        self._items.insert(row, item)
+        if row == len(self._items) - 1 and self._rows is not None:
+            self._rows[id(item)] = row
+        else:
+            self._rows = None
+        item.model = self
+        self.endInsertRows()
+
+    def remove(self, item):
+        self.remove_items([item])
+
+    def remove_items(self, items):
+        """ Removes several items, rebuilding the index of the rows once """
+        rows = sorted({row for row in map(self.row, items) if row is not None}, reverse=True)
+        for row in rows:
+            self.beginRemoveRows(QtCore.QModelIndex(), row, row)
+            item = self._items.pop(row)
+            self._rows = None
+            item.model = None
+            self.endRemoveRows()
 
+    def _move_to_sorted_row(self, item, row):
+        """ Moves an item whose sort key changed to its sorted position and
+        returns its new row """
+        new_row = self._sorted_row(item, exclude=row)
+        if new_row == row:
+            return row
+        parent = QtCore.QModelIndex()
+        self.beginMoveRows(parent, row, row, parent, new_row if new_row < row else new_row + 1)
+        del self._items[row]
+        self._items.insert(new_row, item)
+        if self._rows is not None:
+            for moved in range(min(row, new_row), max(row, new_row) + 1):
+                self._rows[id(self._items[moved])] = moved
+        self.endMoveRows()
+        return new_row
 
-class Browser(QtWidgets.QTreeWidget):
+    def item_updated(self, item, column):
+        row = self.row(item)
+        if row is not None:
+            if column == self._sort_column:
+                row = self._move_to_sorted_row(item, row)
+            index = self.index(row, column)
+            self.dataChanged.emit(index, index)
+
+    def set_check_state(self, item, state):
+        state = QtCore.Qt.CheckState(state)
+        if state == item.check_state:
+            return
+        item.check_state = state
+        self.item_updated(item, 0)
+        self.item_changed.emit(item, 0)
+
+    def rowCount(self, parent=QtCore.QModelIndex()):
+        return 0 if parent.isValid() else len(self._items)
+
+    def columnCount(self, parent=QtCore.QModelIndex()):
+        return 0 if parent.isValid() else len(self.header_labels)
+
+    def data(self, index, role=QtCore.Qt.ItemDataRole.DisplayRole):
+        item = self.item(index)
+        if item is None:
+            return None
+        column = index.column()
+        if column == 0:
+            if role == QtCore.Qt.ItemDataRole.DecorationRole:
+                return item.icon
+            if role == QtCore.Qt.ItemDataRole.CheckStateRole:
+                return item.check_state
+        elif column == 2:
+            if role == QtCore.Qt.ItemDataRole.DisplayRole:
+                return item.progress
+        elif role == QtCore.Qt.ItemDataRole.DisplayRole:
+            return item.text(column)
+        return None
+
+    def setData(self, index, value, role=QtCore.Qt.ItemDataRole.EditRole):
+        item = self.item(index)
+        if item is None or index.column() != 0 or role != QtCore.Qt.ItemDataRole.CheckStateRole:
+            return False
+        self.set_check_state(item, value)
+        return True
+
+    def flags(self, index):
+        flags = super().flags(index)
+        if index.column() == 0:
+            flags |= QtCore.Qt.ItemFlag.ItemIsUserCheckable
+        return flags
+
+    def headerData(self, section, orientation, role=QtCore.Qt.ItemDataRole.DisplayRole):
+        if (orientation == QtCore.Qt.Orientation.Horizontal
+                and role == QtCore.Qt.ItemDataRole.DisplayRole):
+            return self.header_labels[section]
+        return None
+
+    def sort(self, column, order=QtCore.Qt.SortOrder.AscendingOrder):
+        self._sort_column = column
+        self._sort_order = order
+        self.layoutAboutToBeChanged.emit()
+        persistent = self.persistentIndexList()
+        persistent_items = [(self.item(index), index.column()) for index in persistent]
+        self._items.sort(key=self._key,
+                         reverse=order == QtCore.Qt.SortOrder.DescendingOrder)
+        self._rows = None
+        self.changePersistentIndexList(
+            persistent,
+            [self.index(self.row(item), column) if item is not None else QtCore.QModelIndex()
+             for item, column in persistent_items])
+        self.layoutChanged.emit()
+
+
+class ProgressDelegate(QtWidgets.QStyledItemDelegate):
+    """ Paints the progress of an experiment as a progress bar, instead of
+    creating a progress bar widget for every row """
+
+    def paint(self, painter, option, index):
+        progress = index.data(QtCore.Qt.ItemDataRole.DisplayRole) or 0
+        bar = QtWidgets.QStyleOptionProgressBar()
+        bar.rect = option.rect.adjusted(1, 1, -1, -1)
+        bar.state = option.state
+        bar.minimum = 0
+        bar.maximum = 100
+        bar.progress = int(progress)
+        bar.text = "%d%%" % bar.progress
+        bar.textVisible = True
+        style = option.widget.style() if option.widget else QtWidgets.QApplication.style()
+        style.drawControl(QtWidgets.QStyle.ControlElement.CE_ProgressBar, bar, painter)
+
+
+class Browser(QtWidgets.QTreeView):
     """Graphical list view of :class:`Experiment<pymeasure.display.manager.Experiment>`
     objects allowing the user to view the status of queued Experiments as well as
     loading and displaying data from previous runs.
@@ -99,7 +309,12 @@ class Browser(QtWidgets.QTreeWidget):
     In order that different Experiments be displayed within the same Browser,
     they must have entries in `DATA_COLUMNS` corresponding to the
     `measured_quantities` of the Browser.
+
+    The rows are served by a :class:`BrowserModel` and the progress is painted by a
+    :class:`ProgressDelegate`, so that thousands of queued experiments can be shown.
     """
+    itemChanged = QtCore.Signal(object, int)
+    currentItemChanged = QtCore.Signal(object, object)
 
     def __init__(self, procedure_class, display_parameters,
                  measured_quantities, sort_by_filename=False, parent=None):
@@ -112,15 +327,25 @@ class Browser(QtWidgets.QTreeWidget):
         for parameter in self.display_parameters:
             header_labels.append(getattr(self.procedure_class, parameter).name)
 
-        self.setColumnCount(len(header_labels))
-        self.setHeaderLabels(header_labels)
+        self.browser_model = BrowserModel(header_labels, parent=self)
+        self.setModel(self.browser_model)
+        self.setItemDelegateForColumn(2, ProgressDelegate(self))
+        self.setRootIsDecorated(False)
+        self.setUniformRowHeights(True)
+        self.browser_model.item_changed.connect(self.itemChanged)
+        self.selectionModel().currentChanged.connect(self._current_changed)
+
         self.setSortingEnabled(True)
         if sort_by_filename:
-            self.sortItems(1, QtCore.Qt.SortOrder.AscendingOrder)
+            self.sortByColumn(1, QtCore.Qt.SortOrder.AscendingOrder)
 
         for i, width in enumerate([80, 140]):
             self.header().resizeSection(i, width)
 
+    def _current_changed(self, current, previous):
+        self.currentItemChanged.emit(self.browser_model.item(current),
+                                     self.browser_model.item(previous))
+
     def add(self, experiment):
         """Add a :class:`Experiment<pymeasure.display.manager.Experiment>` object
         to the Browser. This function checks to make sure that the Experiment
@@ -143,30 +368,49 @@ class Browser(QtWidgets.QTreeWidget):
             if column in experiment_parameter_names:
                 item.setText(i + 4, str(experiment_parameters[column]))
 
-        self.addTopLevelItem(item)
-        self.setItemWidget(item, 2, item.progressbar)
+        self.browser_model.add(item)
         return item
-    
+
+    def remove(self, item):
+        """ Removes a :class:`BrowserItem` from the Browser """
+        self.browser_model.remove(item)
+
+    def remove_items(self, items):
+        """ Removes several :class:`BrowserItem` objects from the Browser """
+        self.browser_model.remove_items(items)
+
+    def items(self):
+        """ Returns the list of the :class:`BrowserItem` objects in the displayed order """
+        return self.browser_model.items()
+
+    def item_count(self):
+        return len(self.browser_model)
+
+    def item_at(self, position):
+        """ Returns the :class:`BrowserItem` at a position of the viewport, or None """
+        return self.browser_model.item(self.indexAt(position))
+
+    def current_item(self):
+        return self.browser_model.item(self.currentIndex())
+
+    def set_current_item(self, item):
+        row = self.browser_model.row(item)
+        if row is not None:
+            self.setCurrentIndex(self.browser_model.index(row, 0))
+
     def keyPressEvent(self, event):
         if event.key() == QtCore.Qt.Key_Space and event.modifiers() == QtCore.Qt.ControlModifier:
-            selected = self.selectedItems()
-            if selected:
-                item = selected[0]
-                if isinstance(item, BrowserItem):
-                    current_state = item.checkState(0)
-                    new_state = QtCore.Qt.CheckState.Checked
-                    item.setCheckState(0, new_state)
-                    root = self.invisibleRootItem()
-                    for i in range(root.childCount()):
-                        if root.child(i) != item:
-                            root.child(i).setCheckState(0, QtCore.Qt.CheckState.Unchecked)
+            item = self.current_item()
+            if item is not None:
+                item.setCheckState(0, QtCore.Qt.CheckState.Checked)
+                for other in self.items():
+                    if other is not item:
+                        other.setCheckState(0, QtCore.Qt.CheckState.Unchecked)
         elif event.key() == QtCore.Qt.Key_Space:
-            selected = self.selectedItems()
-            if selected:
-                item = selected[0]
-                if isinstance(item, BrowserItem):
-                    current_state = item.checkState(0)
-                    new_state = QtCore.Qt.CheckState.Unchecked if current_state == QtCore.Qt.CheckState.Checked else QtCore.Qt.CheckState.Checked
-                    item.setCheckState(0, new_state)
+            item = self.current_item()
+            if item is not None:
+                current_state = item.checkState(0)
+                new_state = QtCore.Qt.CheckState.Unchecked if current_state == QtCore.Qt.CheckState.Checked else QtCore.Qt.CheckState.Checked
+                item.setCheckState(0, new_state)
         else:
-            super().keyPressEvent(event)
\ No newline at end of file
+            super().keyPressEvent(event)
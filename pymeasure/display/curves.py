@@ -31,13 +31,46 @@ from .Qt import QtCore, QtGui
 log = logging.getLogger(__name__)
 log.addHandler(logging.NullHandler())
 
+NORMALIZED_PREFIX = "Norm "
+
+
+def normalized(values):
+    """ Returns the values min-max normalized to the range from 0 to 1. Constant
+    values are normalized to 0.
+
+    :param values: array of float values, NaN values are ignored for the range
+    """
+    if np.all(np.isnan(values)):
+        return np.zeros_like(values)
+    low, high = np.nanmin(values), np.nanmax(values)
+    if high == low:
+        return np.zeros_like(values)
+    return (values - low) / (high - low)
+
 
 class ResultsCurve(pg.PlotDataItem):
     """ Creates a curve loaded dynamically from a file through the Results object. The data can
     be forced to fully reload on each update, useful for cases when the data is changing across
     the full file instead of just appending.
+
+    The curve keeps the shown x-y data in preallocated arrays and only copies the rows appended
+    since the last update. The arrays are refilled when the rows no longer only grow (e.g. after
+    point deletion), when the columns change or when the data is forced to reload. Curves with more
+    than ``DOWNSAMPLE_THRESHOLD`` points are drawn with peak downsampling, and clipped to the view
+    if their x data is increasing.
+
+    An axis named ``"Norm <column>"`` that is not a column of the data shows the min-max normalized
+    values of ``<column>``. The arrays keep the values of ``<column>`` and are normalized over all
+    rows when the data is set.
+
+    While points are deleted (see :meth:`set_deletion_mode`) the curve is drawn without
+    downsampling, so that the index of a clicked spot is its position in :meth:`shown_rows`.
+    Removed points are tracked as rows of the data.
     """
 
+    DOWNSAMPLE_THRESHOLD = 5000
+    INITIAL_CAPACITY = 1024
+
     def __init__(self, results, x, y, force_reload=False, wdg=None, **kwargs):
         super().__init__(**kwargs)
         self.results = results
@@ -47,15 +80,111 @@ class ResultsCurve(pg.PlotDataItem):
         self.force_reload = force_reload
         self.color = self.opts['pen'].color()
         self.prevZValue = self.zValue()
-
-    def update_data(self):
-        """Updates the data by polling the results"""
+        self._xdata = np.empty(self.INITIAL_CAPACITY)
+        self._ydata = np.empty(self.INITIAL_CAPACITY)
+        self._deleting = False
+        self._reset()
+
+    def _reset(self):
+        self._count = 0
+        self._columns = (self.x, self.y)
+        self._deleted = len(self.results.deleted_rows)
+        self._increasing = True
+        self._downsampled = False
+        self._normalized = (False, False)
+        self._removed = []
+
+    def _grow(self, size):
+        capacity = len(self._xdata)
+        while capacity < size:
+            capacity *= 2
+        if capacity != len(self._xdata):
+            for name in ("_xdata", "_ydata"):
+                array = np.empty(capacity)
+                array[:self._count] = getattr(self, name)[:self._count]
+                setattr(self, name, array)
+
+    @staticmethod
+    def _source(data, axis):
+        """ Returns the column holding the values of an axis and whether they are normalized """
+        column = axis[len(NORMALIZED_PREFIX):]
+        if (axis not in data.columns and axis.startswith(NORMALIZED_PREFIX)
+                and column in data.columns):
+            return column, True
+        return axis, False
+
+    def update_data(self, data=None):
+        """Updates the data by polling the results, copying only the new rows
+
+        :param data: snapshot of the results data shared with other displays, or None to
+            read the data of the results
+        """
         if self.force_reload:
             self.results.reload()
-        data = self.results.data  # get the current snapshot
-
-        # Set x-y data
-        self.setData(data[self.x], data[self.y])
+            data = None
+        if data is None:
+            data = self.results.data  # get the current snapshot
+
+        rows = len(data)
+        if (self.force_reload or rows < self._count or self._columns != (self.x, self.y)
+                or self._deleted != len(self.results.deleted_rows)):
+            self._reset()
+        if rows == self._count and rows > 0:
+            return
+
+        x, x_normalized = self._source(data, self.x)
+        y, y_normalized = self._source(data, self.y)
+        self._normalized = (x_normalized, y_normalized)
+        start = self._count
+        self._grow(rows)
+        self._xdata[start:rows] = np.asarray(data[x].iloc[start:rows], dtype=float)
+        self._ydata[start:rows] = np.asarray(data[y].iloc[start:rows], dtype=float)
+        if self._increasing and rows - start > 0:
+            self._increasing = bool(np.all(np.diff(self._xdata[max(start - 1, 0):rows]) >= 0))
+        self._count = rows
+
+        self._update_downsampling()
+        self._show()
+
+    def _update_downsampling(self):
+        if self._count > self.DOWNSAMPLE_THRESHOLD and not self._downsampled and not self._deleting:
+            self.setDownsampling(auto=True, method='peak')
+            self._downsampled = True
+        if self._downsampled:
+            self.setClipToView(self._increasing)
+
+    def _values(self):
+        """ Returns the x-y values of all rows, normalization keeps the order of the x data """
+        xdata, ydata = self._xdata[:self._count], self._ydata[:self._count]
+        if self._normalized[0]:
+            xdata = normalized(xdata)
+        if self._normalized[1]:
+            ydata = normalized(ydata)
+        return xdata, ydata
+
+    def _show(self):
+        xdata, ydata = self._values()
+        if self._removed:
+            rows = self.shown_rows()
+            xdata, ydata = xdata[rows], ydata[rows]
+        self.setData(xdata, ydata)
+
+    def shown_rows(self):
+        """ Returns the rows of the data shown by the curve, in the order of the shown points """
+        return np.delete(np.arange(self._count), self._removed)
+
+    def set_deletion_mode(self, enabled):
+        """ Draws the curve without downsampling while points are deleted, so that the
+        spots are the shown rows, and with downsampling again afterwards
+
+        :param enabled: True while points are deleted
+        """
+        self._deleting = enabled
+        if enabled and self._downsampled:
+            self.setDownsampling(ds=1, auto=False)
+            self.setClipToView(False)
+            self._downsampled = False
+        self._update_downsampling()
 
     def set_color(self, color):
         self.pen.setColor(color)
@@ -65,14 +194,22 @@ class ResultsCurve(pg.PlotDataItem):
         self.updateItems(styleUpdate=True)
         
     def remove_point(self, spot: pg.SpotItem, pointWdg):
-        xdata, ydata = self.getData()
-        idx = spot.index()
+        if self._downsampled:
+            log.warning("Points of a downsampled curve cannot be removed")
+            return
+        row = int(self.shown_rows()[spot.index()])
+        self._removed.append(row)
+        self._show()
 
-        new_xdata = np.delete(xdata, idx)
-        new_ydata = np.delete(ydata, idx)
-        self.setData(new_xdata, new_ydata)
-        
-        pointWdg.pointDeleted(self, spot)
+        pointWdg.pointDeleted(self, row)
+
+    def restore_point(self, row):
+        """ Shows a removed point again
+
+        :param row: row of the point in the data
+        """
+        self._removed.remove(row)
+        self._show()
         
     def set_size(self, pen_size=1, symbol_size=5):
         self.opts['pen'].setWidth(pen_size)
@@ -80,17 +217,26 @@ class ResultsCurve(pg.PlotDataItem):
         self.updateItems(styleUpdate=True)
         
     def get_last_x(self):
-        xdata, _ = self.getData()
-        if xdata is None or len(xdata) == 0 or np.isnan(xdata[-1]):
+        if self._count == 0:
+            return None
+        last_x = self._xdata[self._count - 1]
+        if self._normalized[0]:
+            last_x = normalized(self._xdata[:self._count])[-1]
+        if np.isnan(last_x):
             return None
-        return xdata[-1]
+        return last_x
 
 # TODO: Add method for changing x and y
 
 
 class ResultsImage(pg.ImageItem):
     """ Creates an image loaded dynamically from a file through the Results
-    object."""
+    object.
+
+    The z values are written into a float image, only for the rows appended since the last
+    update, and colored through the lookup table of the colormap with levels from the minimum
+    and maximum of z. Pixels without data are NaN and stay transparent.
+    """
 
     def __init__(self, results, x, y, z, force_reload=False, wdg=None, **kwargs):
         self.results = results
@@ -106,11 +252,13 @@ class ResultsImage(pg.ImageItem):
         self.yend = getattr(self.results.procedure, self.y + '_end')
         self.ystep = getattr(self.results.procedure, self.y + '_step')
         self.ysize = int(np.ceil((self.yend - self.ystart) / self.ystep)) + 1
-        self.img_data = np.zeros((self.ysize, self.xsize, 4))
+        self.img_data = np.full((self.ysize, self.xsize), np.nan)
         self.force_reload = force_reload
         self.cm = pg.colormap.get('viridis')
+        self._reset()
 
-        super().__init__(image=self.img_data)
+        super().__init__(image=self.img_data.T)
+        self.setLookupTable(self.cm.getLookupTable(0.0, 1.0, 256))
 
         # Scale and translate image so that the pixels are in the correct
         # position in "data coordinates"
@@ -120,23 +268,58 @@ class ResultsImage(pg.ImageItem):
                      int(self.ystart / self.ystep) - 0.5)  # 0.5 so pixels centered
         self.setTransform(tr)
 
-    def update_data(self):
+    def _reset(self):
+        self.img_data[:] = np.nan
+        self._count = 0
+        self._columns = (self.x, self.y, self.z)
+        self._deleted = len(self.results.deleted_rows)
+        self._zmin, self._zmax = np.inf, -np.inf
+
+    def update_data(self, data=None):
         if self.force_reload:
             self.results.reload()
-
-        data = self.results.data
-        zmin = data[self.z].min()
-        zmax = data[self.z].max()
-
-        # populate the image array with the new data
-        for idx, row in data.iterrows():
-            xdat = row[self.x]
-            ydat = row[self.y]
-            xidx, yidx = self.find_img_index(xdat, ydat)
-            self.img_data[yidx, xidx, :] = self.colormap((row[self.z] - zmin) / (zmax - zmin))
+            data = None
+        if data is None:
+            data = self.results.data
+
+        rows = len(data)
+        if (self.force_reload or rows < self._count or self._columns != (self.x, self.y, self.z)
+                or self._deleted != len(self.results.deleted_rows)):
+            self._reset()
+        if rows == self._count:
+            return
+
+        # populate the image array with the new rows only
+        new = slice(self._count, rows)
+        x = np.asarray(data[self.x].iloc[new], dtype=float)
+        y = np.asarray(data[self.y].iloc[new], dtype=float)
+        z = np.asarray(data[self.z].iloc[new], dtype=float)
+        xidx, yidx = self.find_img_indices(x, y)
+        self.img_data[yidx, xidx] = z
+        self._count = rows
+        if np.isfinite(z).any():
+            self._zmin = min(self._zmin, np.nanmin(z))
+            self._zmax = max(self._zmax, np.nanmax(z))
+
+        levels = (0., 1.)  # no finite data yet, all pixels are transparent
+        if self._zmin <= self._zmax:
+            levels = (self._zmin, self._zmax if self._zmax > self._zmin else self._zmin + 1)
 
         # set image data, need to transpose since pyqtgraph assumes column-major order
-        self.setImage(image=np.transpose(self.img_data, axes=(1, 0, 2)))
+        self.setImage(image=self.img_data.T, autoLevels=False, levels=levels)
+
+    def find_img_indices(self, x, y):
+        """ Finds the integer image indices corresponding to the closest x and y points for
+        arrays of x and y data; points outside of the range go to the final pixel.
+        """
+        with np.errstate(invalid='ignore'):
+            inside_x = (self.xstart <= x) & (x <= self.xend)
+            inside_y = (self.ystart <= y) & (y <= self.yend)
+            xidx = np.floor((np.where(inside_x, x, self.xstart) - self.xstart) / self.xstep + 0.5)
+            yidx = np.floor((np.where(inside_y, y, self.ystart) - self.ystart) / self.ystep + 0.5)
+        xidx = np.where(inside_x, np.minimum(xidx, self.xsize - 1), self.xsize - 1).astype(int)
+        yidx = np.where(inside_y, np.minimum(yidx, self.ysize - 1), self.ysize - 1).astype(int)
+        return xidx, yidx
 
     def find_img_index(self, x, y):
         """ Finds the integer image indices corresponding to the
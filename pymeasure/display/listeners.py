@@ -94,6 +94,7 @@ class Monitor(QtCore.QThread):
     status = QtCore.Signal(int)
     progress = QtCore.Signal(float)
     current_point = QtCore.Signal(float)
+    new_rows = QtCore.Signal()
     log = QtCore.Signal(object)
     worker_running = QtCore.Signal()
     worker_failed = QtCore.Signal()
@@ -126,5 +127,7 @@ class Monitor(QtCore.QThread):
                 self.log.emit(data)
             elif topic == 'current_point':
                 self.current_point.emit(data)
+            elif topic == 'results':
+                self.new_rows.emit()
 
         log.info("Monitor caught stop command")
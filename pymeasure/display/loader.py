@@ -0,0 +1,91 @@
+#
+# This file is part of the PyMeasure package.
+#
+# Copyright (c) 2013-2024 PyMeasure Developers
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+#
+
+
+import logging
+import os
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+from .Qt import QtCore
+from .thread import StoppableQThread
+from ..experiment.results import Results
+
+log = logging.getLogger(__name__)
+log.addHandler(logging.NullHandler())
+
+
+class ResultsLoader(StoppableQThread):
+    """ Loads results files in a thread pool: the header is parsed, the
+    procedure constructed and the data read off the GUI thread. Every
+    finished file is emitted with the :attr:`loaded` signal as soon as it
+    is available, in the order of completion.
+
+    Calling :meth:`stop` cancels the files that have not started loading.
+
+    :param filenames: list of the data filenames to load
+    :param procedure_class: optional procedure class passed to
+                            :meth:`.Results.load`
+    :param max_workers: number of loading threads
+    """
+
+    loaded = QtCore.Signal(str, object)
+    failed = QtCore.Signal(str, str)
+    progress = QtCore.Signal(int, int)
+
+    def __init__(self, filenames, procedure_class=None, max_workers=None, parent=None):
+        super().__init__(parent)
+        self.filenames = list(filenames)
+        self.procedure_class = procedure_class
+        self.max_workers = max_workers or min(8, (os.cpu_count() or 1) + 2)
+
+    @staticmethod
+    def load(filename, procedure_class=None):
+        results = Results.load(filename, procedure_class)
+        results.data  # read the data in the pool as well
+        return results
+
+    def run(self):
+        total = len(self.filenames)
+        done = 0
+        self.progress.emit(done, total)
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            pending = {executor.submit(self.load, filename, self.procedure_class): filename
+                       for filename in self.filenames}
+            try:
+                while pending and not self.should_stop():
+                    finished, _ = wait(pending, timeout=0.1, return_when=FIRST_COMPLETED)
+                    for future in finished:
+                        filename = pending.pop(future)
+                        try:
+                            self.loaded.emit(filename, future.result())
+                        except Exception as e:
+                            log.exception(f"Could not load data file {filename}")
+                            self.failed.emit(filename, str(e))
+                        done += 1
+                        self.progress.emit(done, total)
+            finally:
+                for future in pending:
+                    future.cancel()
+        if pending:
+            log.info(f"Loading cancelled, {len(pending)} data files were not opened")
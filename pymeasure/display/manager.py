@@ -22,7 +22,9 @@
 # THE SOFTWARE.
 #
 
+import heapq
 import logging
+import threading
 
 from os.path import basename
 from os import unlink
@@ -80,44 +82,96 @@ class Experiment(QtCore.QObject):
 class ExperimentQueue(QtCore.QObject):
     """ Represents a queue of Experiments and allows queries to
     be easily preformed.
+
+    The experiments are indexed by the basename of their data file, by their
+    browser item and by their order of queuing, so that lookups and finding the
+    next queued experiment do not scan the whole queue. The queued experiments
+    are kept in a heap which is cleaned lazily of the experiments that changed
+    their status; :meth:`set_status` puts experiments which are queued again back
+    on the heap. The indexes are guarded by a lock, since the running procedure
+    looks up the next experiment from the worker thread.
     """
 
     def __init__(self):
         super().__init__()
         self.queue = []
+        self._order = {}  # id(experiment) -> order of queuing
+        self._filenames = {}  # basename of the data file -> number of experiments
+        self._browser_items = {}  # id(browser item) -> experiment
+        self._queued = []  # heap of (order of queuing, experiment)
+        self._queued_ids = set()
+        self._count = 0
+        self._lock = threading.Lock()
 
     def append(self, experiment):
-        self.queue.append(experiment)
+        with self._lock:
+            self.queue.append(experiment)
+            self._order[id(experiment)] = self._count
+            self._count += 1
+            name = basename(experiment.data_filename)
+            self._filenames[name] = self._filenames.get(name, 0) + 1
+            if experiment.browser_item is not None:
+                self._browser_items[id(experiment.browser_item)] = experiment
+            self._push(experiment)
 
     def remove(self, experiment):
-        if experiment not in self.queue:
-            raise Exception("Attempting to remove an Experiment that is "
-                            "not in the ExperimentQueue")
-        else:
+        with self._lock:
+            if id(experiment) not in self._order:
+                raise Exception("Attempting to remove an Experiment that is "
+                                "not in the ExperimentQueue")
             if experiment.procedure.status == Procedure.RUNNING:
                 raise Exception("Attempting to remove a running experiment")
-            else:
-                self.queue.pop(self.queue.index(experiment))
+            self.queue.remove(experiment)
+            del self._order[id(experiment)]
+            name = basename(experiment.data_filename)
+            self._filenames[name] -= 1
+            if self._filenames[name] == 0:
+                del self._filenames[name]
+            if experiment.browser_item is not None:
+                self._browser_items.pop(id(experiment.browser_item), None)
+            # The entry of the heap is dropped by next()
+            self._queued_ids.discard(id(experiment))
+
+    def _push(self, experiment):
+        if (experiment.procedure.status == Procedure.QUEUED
+                and id(experiment) not in self._queued_ids):
+            heapq.heappush(self._queued, (self._order[id(experiment)], experiment))
+            self._queued_ids.add(id(experiment))
+
+    def set_status(self, experiment, status):
+        """ Sets the status of the procedure of an experiment and updates the index
+        of queued experiments
+        """
+        with self._lock:
+            experiment.procedure.status = status
+            if id(experiment) in self._order:
+                self._push(experiment)
 
     def __contains__(self, value):
         if isinstance(value, Experiment):
-            return value in self.queue
+            return id(value) in self._order
         if isinstance(value, str):
-            for experiment in self.queue:
-                if basename(experiment.data_filename) == basename(value):
-                    return True
-            return False
+            return basename(value) in self._filenames
         return False
 
     def __getitem__(self, key):
         return self.queue[key]
 
+    def __len__(self):
+        return len(self.queue)
+
     def next(self):
         """ Returns the next experiment on the queue
         """
-        for experiment in self.queue:
-            if experiment.procedure.status == Procedure.QUEUED:
-                return experiment
+        with self._lock:
+            while self._queued:
+                order, experiment = self._queued[0]
+                current = self._order.get(id(experiment)) == order
+                if current and experiment.procedure.status == Procedure.QUEUED:
+                    return experiment
+                heapq.heappop(self._queued)
+                if current:
+                    self._queued_ids.discard(id(experiment))
         raise StopIteration("There are no queued experiments")
 
     def has_next(self):
@@ -131,10 +185,7 @@ class ExperimentQueue(QtCore.QObject):
         return True
 
     def with_browser_item(self, item):
-        for experiment in self.queue:
-            if experiment.browser_item is item:
-                return experiment
-        return None
+        return self._browser_items.get(id(item))
 
 
 class BaseManager(QtCore.QObject):
@@ -153,6 +204,7 @@ class BaseManager(QtCore.QObject):
     log = QtCore.Signal(object)
     
     update_point = QtCore.Signal(float)
+    new_rows = QtCore.Signal(object)
 
     def __init__(self, port=5888, log_level=logging.INFO, parent=None):
         super().__init__(parent)
@@ -162,6 +214,13 @@ class BaseManager(QtCore.QObject):
         self._running_experiment = None
         self._monitor = None
         self.log_level = log_level
+        # State of the magnetic field left on by an experiment for the next one of the queue
+        self.field_state = None
+        # Called with a field state that no experiment takes over, to switch the field off
+        self.field_release = None
+        self._release_thread = None
+        # Catalog in which the results are indexed when they are recorded
+        self.catalog = None
 
         self.port = port
 
@@ -176,13 +235,33 @@ class BaseManager(QtCore.QObject):
         else:
             raise Exception("There is no Experiment running")
 
+    def next_experiment(self):
+        """ Returns the experiment that will be started after the running one,
+        or None if the queue ends (or has been stopped) with the running one
+        """
+        if not self._is_continuous or not self.experiments.has_next():
+            return None
+        return self.experiments.next()
+
+    def release_field_state(self):
+        """ Releases the field state left for the next experiment when no experiment
+        takes it over. The field is switched off by :attr:`field_release` in a
+        background thread, which is joined before the next experiment starts.
+        """
+        state, self.field_state = self.field_state, None
+        if state is None or self.field_release is None:
+            return
+        self._release_thread = threading.Thread(target=self.field_release, args=(state,),
+                                                name="field release", daemon=True)
+        self._release_thread.start()
+
     def _update_progress(self, progress):
         if self.is_running():
             self._running_experiment.browser_item.setProgress(progress)
 
     def _update_status(self, status):
         if self.is_running():
-            self._running_experiment.procedure.status = status
+            self.experiments.set_status(self._running_experiment, status)
             self._running_experiment.browser_item.setStatus(status)
             
     def _update_current_point(self, point):
@@ -207,23 +286,33 @@ class BaseManager(QtCore.QObject):
     def remove(self, experiment):
         """ Removes an Experiment
         """
-        self.experiments.remove(experiment)
+        self.remove_experiments([experiment])
+
+    def remove_experiments(self, experiments):
+        """ Removes several Experiments at once
+        """
+        try:
+            for experiment in experiments:
+                self.experiments.remove(experiment)
+        finally:
+            if not self.is_running():
+                self.release_field_state()
 
     def clear(self):
         """ Remove all Experiments
         """
-        for experiment in self.experiments[:]:
-            self.remove(experiment)
+        self.remove_experiments(self.experiments[:])
             
     def clear_filtered(self, status, delete=False):
         """ Remove all Experiments that match the status
         """
 
-        for experiment in self.experiments[:]:
-            if experiment.procedure.status in status:
-                self.remove(experiment)
-                if delete:
-                    unlink(experiment.data_filename)
+        experiments = [experiment for experiment in self.experiments[:]
+                       if experiment.procedure.status in status]
+        self.remove_experiments(experiments)
+        if delete:
+            for experiment in experiments:
+                unlink(experiment.data_filename)
                 
 
     def next(self):
@@ -234,12 +323,16 @@ class BaseManager(QtCore.QObject):
         if self.is_running():
             raise Exception("Another procedure is already running")
         else:
+            if self._release_thread is not None:
+                self._release_thread.join()
+                self._release_thread = None
             if self.experiments.has_next():
                 log.debug("Manager is initiating the next experiment")
                 experiment = self.experiments.next()
                 self._running_experiment = experiment
 
-                self._worker = Worker(experiment.results, port=self.port, log_level=self.log_level)
+                self._worker = Worker(experiment.results, port=self.port, log_level=self.log_level,
+                                      catalog=self.catalog)
 
                 self._monitor = Monitor(self._worker.monitor_queue)
                 self._monitor.worker_running.connect(self._running)
@@ -249,6 +342,7 @@ class BaseManager(QtCore.QObject):
                 self._monitor.progress.connect(self._update_progress)
                 self._monitor.status.connect(self._update_status)
                 self._monitor.current_point.connect(self._update_current_point)
+                self._monitor.new_rows.connect(self._new_rows)
                 self._monitor.log.connect(self._update_log)
 
                 self._monitor.start()
@@ -258,6 +352,10 @@ class BaseManager(QtCore.QObject):
         if self.is_running():
             self.running.emit(self._running_experiment)
 
+    def _new_rows(self):
+        if self.is_running():
+            self.new_rows.emit(self._running_experiment)
+
     def _clean_up(self):
         self._worker.join()
         del self._worker
@@ -271,12 +369,14 @@ class BaseManager(QtCore.QObject):
         log.debug("Manager's running experiment has failed")
         experiment = self._running_experiment
         self._clean_up()
+        self.release_field_state()
         self.failed.emit(experiment)
 
     def _abort_returned(self):
         log.debug("Manager's running experiment has returned after an abort")
         experiment = self._running_experiment
         self._clean_up()
+        self.release_field_state()
         self.abort_returned.emit(experiment)
 
     def _finish(self):
@@ -287,6 +387,8 @@ class BaseManager(QtCore.QObject):
         self.finished.emit(experiment)
         if self._is_continuous:  # Continue running procedures
             self.next()
+        if not self.is_running():
+            self.release_field_state()
 
     def resume(self):
         """ Resume processing of the queue.
@@ -327,6 +429,10 @@ class Manager(BaseManager):
         self._running_experiment = None
         self._monitor = None
         self.log_level = log_level
+        self.field_state = None
+        self.field_release = None
+        self._release_thread = None
+        self.catalog = None
 
         self.widget_list = widget_list
         self.browser = browser
@@ -343,17 +449,21 @@ class Manager(BaseManager):
             if curve:
                 curve.wdg.load(curve)
 
-    def remove(self, experiment):
-        """ Removes an Experiment
+    def remove_experiments(self, experiments):
+        """ Removes several Experiments, taking their rows out of the browser at once
         """
-        super().remove(experiment)
+        removed = []
+        try:
+            for experiment in experiments:
+                super().remove_experiments([experiment])
+                removed.append(experiment)
+        finally:
+            self.browser.remove_items([experiment.browser_item for experiment in removed])
 
-        self.browser.takeTopLevelItem(
-            self.browser.indexOfTopLevelItem(experiment.browser_item))
-
-        for curve in experiment.curve_list:
-            if curve:
-                curve.wdg.remove(curve)
+            for experiment in removed:
+                for curve in experiment.curve_list:
+                    if curve:
+                        curve.wdg.remove(curve)
 
     def _finish(self):
         log.debug("Manager's running experiment has finished")
@@ -366,3 +476,5 @@ class Manager(BaseManager):
         self.finished.emit(experiment)
         if self._is_continuous:  # Continue running procedures
             self.next()
+        if not self.is_running():
+            self.release_field_state()
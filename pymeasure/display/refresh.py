@@ -0,0 +1,90 @@
+#
+# This file is part of the PyMeasure package.
+#
+# Copyright (c) 2013-2024 PyMeasure Developers
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+#
+
+
+import logging
+from time import monotonic
+
+from .Qt import QtCore
+
+log = logging.getLogger(__name__)
+log.addHandler(logging.NullHandler())
+
+
+class RefreshScheduler(QtCore.QObject):
+    """ Refreshes the curves and tables of experiments when new rows arrive,
+    instead of polling every display on a timer.
+
+    :meth:`mark_dirty` is connected to the ``new_rows`` signal of the
+    :class:`.Manager`. Experiments marked dirty are refreshed together at most
+    ``max_rate`` times per second: the data of every experiment is read once
+    per refresh and shared by all of its curves and tables, in every dock.
+    Afterwards, the widgets of the updated curves are told through their
+    ``curves_updated`` method, if they have one.
+
+    :param max_rate: maximum number of refreshes per second.
+    :param parent: parent object.
+    """
+
+    refreshed = QtCore.Signal(object)
+
+    def __init__(self, max_rate=10, parent=None):
+        super().__init__(parent)
+        self.interval = 1. / max_rate
+        self._dirty = []
+        self._last = 0.
+        self._timer = QtCore.QTimer(self)
+        self._timer.setSingleShot(True)
+        self._timer.timeout.connect(self.refresh)
+
+    def mark_dirty(self, experiment):
+        """ Schedules the refresh of an experiment that received new rows """
+        if experiment is None:
+            return
+        if not any(experiment is dirty for dirty in self._dirty):
+            self._dirty.append(experiment)
+        if not self._timer.isActive():
+            delay = max(self._last + self.interval - monotonic(), 0)
+            self._timer.start(int(delay * 1e3))
+
+    def refresh(self):
+        """ Updates the curves and tables of all dirty experiments """
+        self._last = monotonic()
+        dirty, self._dirty = self._dirty, []
+        for experiment in dirty:
+            curves = [curve for curve in experiment.curve_list or () if curve]
+            data = experiment.results.data  # one snapshot for all curves
+            updated = {}
+            for curve in curves:
+                try:
+                    curve.update_data(data)
+                except Exception:
+                    log.exception(f"Could not refresh {curve!r}")
+                    continue
+                updated.setdefault(id(curve.wdg), (curve.wdg, []))[1].append(curve)
+            for wdg, wdg_curves in updated.values():
+                curves_updated = getattr(wdg, "curves_updated", None)
+                if curves_updated is not None:
+                    curves_updated(wdg_curves)
+            self.refreshed.emit(experiment)
@@ -23,6 +23,7 @@
 #
 
 from .browser_widget import BrowserWidget
+from .catalog_widget import CatalogWidget
 from .fileinput_widget import FileInputWidget
 from .estimator_widget import EstimatorWidget, EstimatorThread
 from .image_frame import ImageFrame
@@ -0,0 +1,178 @@
+#
+# This file is part of the PyMeasure package.
+#
+# Copyright (c) 2013-2024 PyMeasure Developers
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+#
+
+
+import logging
+import os
+from datetime import datetime
+
+from ..thread import StoppableQThread
+from ..Qt import QtCore, QtWidgets
+from ...experiment.catalog import parse_query
+
+log = logging.getLogger(__name__)
+log.addHandler(logging.NullHandler())
+
+
+class CatalogScanThread(StoppableQThread):
+    """ Indexes the results files of a folder in the catalog """
+    progress = QtCore.Signal(int)
+    scanned = QtCore.Signal(int)
+
+    def __init__(self, catalog, directory):
+        StoppableQThread.__init__(self)
+        self.catalog = catalog
+        self.directory = directory
+
+    def run(self):
+        self._should_stop.clear()
+        try:
+            indexed = self.catalog.scan(self.directory, should_stop=self.should_stop,
+                                        progress=self.progress.emit)
+        except Exception:
+            log.exception(f"Could not scan {self.directory}")
+            indexed = 0
+        self.scanned.emit(indexed)
+
+
+class CatalogWidget(QtWidgets.QWidget):
+    """
+    Widget to search the measurement catalog and to open the matching
+    results files.
+
+    A query consists of terms separated by semicolons. A term without an
+    operator matches the procedure class, the other terms compare a parameter
+    or metadata value, e.g. ``HarmonicMode; Sample name~A12; Kriostat temperature<5``.
+    The operators are ``=``, ``!=``, ``<``, ``<=``, ``>``, ``>=`` and ``~`` (contains).
+    """
+    open_files = QtCore.Signal(list)
+
+    COLUMNS = ("File", "Procedure", "Status", "Rows", "Modified")
+
+    def __init__(self, catalog, parent=None):
+        super().__init__(parent)
+        self.catalog = catalog
+        self._scanner = None
+        self._setup_ui()
+        self._layout()
+
+    def _setup_ui(self):
+        self.query = QtWidgets.QLineEdit(self)
+        self.query.setPlaceholderText("Mode; Parameter=value; Parameter<number; Parameter~text")
+        self.query.returnPressed.connect(self.search)
+
+        self.search_button = QtWidgets.QPushButton("Search", self)
+        self.search_button.clicked.connect(self.search)
+
+        self.scan_button = QtWidgets.QPushButton("Scan folder...", self)
+        self.scan_button.clicked.connect(self.scan)
+
+        self.open_button = QtWidgets.QPushButton("Open selected", self)
+        self.open_button.clicked.connect(self.open_selected)
+
+        self.table = QtWidgets.QTableWidget(0, len(self.COLUMNS), self)
+        self.table.setHorizontalHeaderLabels(self.COLUMNS)
+        self.table.setEditTriggers(QtWidgets.QAbstractItemView.EditTrigger.NoEditTriggers)
+        self.table.setSelectionBehavior(QtWidgets.QAbstractItemView.SelectionBehavior.SelectRows)
+        self.table.verticalHeader().setVisible(False)
+        self.table.horizontalHeader().setStretchLastSection(True)
+        self.table.doubleClicked.connect(self.open_selected)
+
+        self.status = QtWidgets.QLabel(self)
+
+    def _layout(self):
+        query_hbox = QtWidgets.QHBoxLayout()
+        query_hbox.addWidget(self.query)
+        query_hbox.addWidget(self.search_button)
+
+        button_hbox = QtWidgets.QHBoxLayout()
+        button_hbox.addWidget(self.open_button)
+        button_hbox.addWidget(self.scan_button)
+        button_hbox.addStretch()
+
+        vbox = QtWidgets.QVBoxLayout(self)
+        vbox.addLayout(query_hbox)
+        vbox.addWidget(self.table)
+        vbox.addLayout(button_hbox)
+        vbox.addWidget(self.status)
+        self.setLayout(vbox)
+
+    def search(self):
+        try:
+            procedure, conditions = parse_query(self.query.text())
+            entries = self.catalog.search(procedure, conditions)
+        except Exception as e:
+            self.status.setText(f"Invalid query: {e}")
+            return
+
+        self.table.setRowCount(len(entries))
+        for row, entry in enumerate(entries):
+            modified = entry["modified"]
+            values = (
+                os.path.basename(entry["filename"]),
+                entry["procedure"].rpartition(".")[2],
+                entry["status"] or "",
+                "" if entry["rows"] is None else str(entry["rows"]),
+                "" if modified is None else datetime.fromtimestamp(modified).strftime("%Y-%m-%d %H:%M"),
+            )
+            for column, value in enumerate(values):
+                item = QtWidgets.QTableWidgetItem(value)
+                item.setData(QtCore.Qt.ItemDataRole.UserRole, entry["filename"])
+                if column == 0:
+                    item.setToolTip(entry["filename"])
+                self.table.setItem(row, column, item)
+        self.table.resizeColumnsToContents()
+        self.status.setText(f"{len(entries)} matching files")
+
+    def open_selected(self):
+        rows = sorted({index.row() for index in self.table.selectedIndexes()})
+        filenames = [self.table.item(row, 0).data(QtCore.Qt.ItemDataRole.UserRole) for row in rows]
+        missing = [filename for filename in filenames if not os.path.exists(filename)]
+        if missing:
+            self.status.setText(f"{len(missing)} files no longer exist, scan their folder to update")
+        filenames = [filename for filename in filenames if filename not in missing]
+        if filenames:
+            self.open_files.emit(filenames)
+
+    def scan(self):
+        if self._scanner is not None:
+            self._scanner.stop()
+            return
+        directory = QtWidgets.QFileDialog.getExistingDirectory(self, "Scan folder")
+        if not directory:
+            return
+        self._scanner = CatalogScanThread(self.catalog, directory)
+        self._scanner.progress.connect(
+            lambda checked: self.status.setText(f"Scanning... {checked} files checked"))
+        self._scanner.scanned.connect(self.scan_finished)
+        self.scan_button.setText("Stop scan")
+        self._scanner.start()
+
+    def scan_finished(self, indexed):
+        self._scanner.wait()
+        self._scanner = None
+        self.scan_button.setText("Scan folder...")
+        self.status.setText(f"{indexed} files indexed")
+        if self.query.text():
+            self.search()
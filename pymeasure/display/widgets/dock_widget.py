@@ -164,6 +164,10 @@ class DockWidget(TabWidget, QtWidgets.QWidget):
             curves.append(self.plot_frames[i].new_curve(results, color=color, **kwargs))
         return curves
 
+    def stop_polling(self):
+        for plot_frame in self.plot_frames:
+            plot_frame.stop_polling()
+
     def clear(self):
         for i in range(self.num_plots):
             self.plot_frames[i].plot.clear()
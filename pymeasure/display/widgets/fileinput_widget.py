@@ -111,12 +111,7 @@ class FileInputWidget(QtWidgets.QWidget):
         """String containing the base of the filename with which the file will be stored.
         Can only be read.
         """
-        filename_split = self.filename.rsplit('.', 1)
-
-        if len(filename_split) > 1 and filename_split[1] in self.extensions:
-            return filename_split[0]
-        else:
-            return self.filename
+        return self._split_extension()[0]
 
     @property
     def filename_extension(self):
@@ -124,12 +119,17 @@ class FileInputWidget(QtWidgets.QWidget):
 
         Can only be read.
         """
-        filename_split = self.filename.rsplit('.', 1)
+        extension = self._split_extension()[1]
+        return extension if extension is not None else self.extensions[0]
 
-        if len(filename_split) > 1 and filename_split[1] in self.extensions:
-            return filename_split[1]
-        else:
-            return self.extensions[0]
+    def _split_extension(self):
+        """Splits the filename into its base and the recognized extension (or None). The
+        longest matching extension is used, so that e.g. 'csv.gz' is recognized before 'gz'.
+        """
+        for extension in sorted(self.extensions, key=len, reverse=True):
+            if self.filename.endswith('.' + extension):
+                return self.filename[:-len(extension) - 1], extension
+        return self.filename, None
 
     @property
     def extensions(self):
@@ -106,6 +106,12 @@ class ImageWidget(TabWidget, QtWidgets.QWidget):
         axis = self.columns_z.itemText(index)
         self.image_frame.change_z_axis(axis)
 
+    def stop_polling(self):
+        self.image_frame.stop_polling()
+
+    def curves_updated(self, curves):
+        self.image_frame.curves_updated(curves)
+
     def load(self, curve):
         curve.z = self.columns_z.currentText()
         curve.update_data()
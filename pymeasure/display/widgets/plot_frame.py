@@ -38,7 +38,9 @@ log.addHandler(logging.NullHandler())
 class PlotFrame(QtWidgets.QFrame):
     """ Combines a PyQtGraph Plot with Crosshairs. Refreshes
     the plot based on the refresh_time, and allows the axes
-    to be changed on the fly, which updates the plotted data
+    to be changed on the fly, which updates the plotted data.
+    The periodic refresh can be stopped in favour of a
+    :class:`.RefreshScheduler`, which calls :meth:`curves_updated`.
     """
 
     LABEL_STYLE = {'font-size': '10pt', 'font-family': 'Arial', 'color': '#000000'}
@@ -93,20 +95,37 @@ class PlotFrame(QtWidgets.QFrame):
         self.coordinates.setText(f"({x:g}, {y:g})")
 
     def update_curves(self):
-        for item in self.plot.items:
-            if isinstance(item, self.ResultsClass):
-                if self.check_status:
-                    if item.results.procedure.status == Procedure.RUNNING:
-                        item.update_data()
-                else:
-                    item.update_data()
-                    
+        items = [item for item in self.plot.items if isinstance(item, self.ResultsClass)]
+        for item in items:
+            if self.check_status:
                 if item.results.procedure.status == Procedure.RUNNING:
-                    last_x = item.get_last_x()
-                    if last_x is not None:
-                        if self.vline not in self.plot.items:
-                            self.plot.addItem(self.vline)
-                        self.vline.setPos(last_x)
+                    item.update_data()
+            else:
+                item.update_data()
+        self.update_vline(items)
+
+    def update_vline(self, items):
+        """ Moves the marker of the last point to the running curve among the items """
+        for item in items:
+            # Images have no last point
+            if item.results.procedure.status == Procedure.RUNNING and hasattr(item, 'get_last_x'):
+                last_x = item.get_last_x()
+                if last_x is not None:
+                    if self.vline not in self.plot.items:
+                        self.plot.addItem(self.vline)
+                    self.vline.setPos(last_x)
+
+    def stop_polling(self):
+        """ Stops the periodic refresh of the curves """
+        self.timer.stop()
+
+    def curves_updated(self, curves):
+        """ Updates the marker of the last point and the crosshairs after the
+        data of the given curves has been updated
+        """
+        self.update_vline(curves)
+        self.crosshairs.update()
+        self.updated.emit()
                     
     def get_experiment(self, experiment):
         color = experiment.curve_list[0].color
@@ -26,7 +26,7 @@ import logging
 
 import pyqtgraph as pg
 
-from ..curves import ResultsCurve
+from ..curves import NORMALIZED_PREFIX, ResultsCurve
 from ..Qt import QtCore, QtWidgets
 from .tab_widget import TabWidget
 from .plot_frame import PlotFrame
@@ -39,6 +39,9 @@ log.addHandler(logging.NullHandler())
 class PlotWidget(TabWidget, QtWidgets.QWidget):
     """ Extends :class:`PlotFrame<pymeasure.display.widgets.plot_frame.PlotFrame>`
     to allow different columns of the data to be dynamically chosen
+
+    Besides the columns, the axes offer the min-max normalized ``"Norm <column>"`` of each column,
+    derived by the curves when they are drawn.
     """
     
     sigCurveClicked = QtCore.Signal(object)
@@ -74,6 +77,14 @@ class PlotWidget(TabWidget, QtWidgets.QWidget):
         for column in self.columns:
             self.columns_x.addItem(column)
             self.columns_y.addItem(column)
+        derived = [NORMALIZED_PREFIX + column for column in self.columns
+                   if not column.startswith(NORMALIZED_PREFIX)
+                   and NORMALIZED_PREFIX + column not in self.columns]
+        if derived:
+            self.columns_x.insertSeparator(self.columns_x.count())
+            self.columns_y.insertSeparator(self.columns_y.count())
+            self.columns_x.addItems(derived)
+            self.columns_y.addItems(derived)
         self.columns_x.activated.connect(self.update_x_column)
         self.columns_y.activated.connect(self.update_y_column)
 
@@ -128,8 +139,16 @@ class PlotWidget(TabWidget, QtWidgets.QWidget):
         curve.sigClicked.connect(self.sigCurveClicked)
         curve.sigPointsClicked.connect(self.remove_points)
         curve.sigPointsHovered.connect(self.enlarge_point)
+        if self.pointWidget is not None and self.pointWidget.enabled:
+            curve.set_deletion_mode(True)
         
         return curve
+
+    def set_deletion_mode(self, enabled):
+        """ Switches the curves to drawing every point while points are deleted """
+        for item in self.plot.items:
+            if isinstance(item, ResultsCurve):
+                item.set_deletion_mode(enabled)
     
     def enlarge_point(self, curve, spots):
         if curve.results.procedure.status == Procedure.RUNNING:
@@ -153,7 +172,8 @@ class PlotWidget(TabWidget, QtWidgets.QWidget):
         if not self.pointWidget.enabled:
             return
 
-        for spot in spots:
+        # the last spots first, so the indices of the others stay valid
+        for spot in sorted(spots, key=lambda spot: spot.index(), reverse=True):
             curve.remove_point(spot, self.pointWidget)
 
     def update_x_column(self, index):
@@ -170,6 +190,12 @@ class PlotWidget(TabWidget, QtWidgets.QWidget):
         axis = self.columns_y.itemText(index)
         self.plot_frame.change_y_axis(axis)
 
+    def stop_polling(self):
+        self.plot_frame.stop_polling()
+
+    def curves_updated(self, curves):
+        self.plot_frame.curves_updated(curves)
+
     def load(self, curve):
         curve.x = self.columns_x.currentText()
         curve.y = self.columns_y.currentText()
@@ -9,6 +9,7 @@ from hardware.keithley2400 import Keithley2400
 from hardware.keithley_2636 import Keithley2636
 from hardware.agilent_2912 import Agilent2912
 from hardware.agilent_34410a import Agilent34410A
+from hardware.session_pool import session_pool
 
 log = logging.getLogger(__name__)
 log.addHandler(logging.NullHandler())
@@ -170,18 +171,18 @@ class QuickMeasureWidget(TabWidget, QtWidgets.QWidget):
 
             match device_name:
                 case "Keithley 2400":
-                    self.device = Keithley2400(device_address)
+                    self.device = session_pool.get(Keithley2400, device_address)
                     self.device.config_average(self.get("sourcemeter_average"))
                 case "Keithley 2636":
                     if sourcemeter_channel == "Channel A":
-                        self.device = Keithley2636(device_address).ChA
+                        self.device = session_pool.get(Keithley2636, device_address).ChA
                     else:
-                        self.device = Keithley2636(device_address).ChB
+                        self.device = session_pool.get(Keithley2636, device_address).ChB
                 case "Agilent 2912":
                     if sourcemeter_channel == "Channel A":
-                        self.device = Agilent2912(device_address).ChA
+                        self.device = session_pool.get(Agilent2912, device_address).ChA
                     else:
-                        self.device = Agilent2912(device_address).ChB
+                        self.device = session_pool.get(Agilent2912, device_address).ChB
                 case _:
                     log.error("Device not implemented!")
                     return
@@ -215,7 +216,7 @@ class QuickMeasureWidget(TabWidget, QtWidgets.QWidget):
 
             match device_name:
                 case "Agilent 34400":
-                    self.device = Agilent34410A(device_address)
+                    self.device = session_pool.get(Agilent34410A, device_address)
                 case _:
                     log.error("Device not implemented!")
                     return
@@ -91,6 +91,9 @@ class ResultsDialog(QtWidgets.QFileDialog):
         self.resize(900, 500)
 
         self.setFileMode(QtWidgets.QFileDialog.FileMode.ExistingFiles)
+        # The format of a data file is detected from its extension by Results.load
+        self.setNameFilters(["Data files (*.csv *.csv.gz *.csv.zst *.pmb *.txt *.data)",
+                             "All files (*)"])
         self.currentChanged.connect(self.update_preview)
 
     def update_preview(self, filename):
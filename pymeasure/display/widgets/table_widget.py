@@ -23,7 +23,8 @@
 #
 
 import logging
-from numpy import float64, NaN
+from collections import OrderedDict
+from numpy import floating, NaN
 from functools import partial
 import pyqtgraph as pg
 import pandas as pd
@@ -40,8 +41,13 @@ log.addHandler(logging.NullHandler())
 
 
 class ResultsTable(QtCore.QObject):
-    """ Class representing a panda dataframe """
+    """ Class representing a panda dataframe
+
+    The cells are read from the column arrays of the dataframe, which are views of the
+    data of the results, instead of looking them up through pandas.
+    """
     data_changed = QtCore.Signal(int, int, int, int)
+    data_reset = QtCore.Signal()
 
     def __init__(self, results, color, column_index=None,
                  force_reload=False, wdg=None, **kwargs):
@@ -61,11 +67,28 @@ class ResultsTable(QtCore.QObject):
 
     @data.setter
     def data(self, value):
+        self._source = value
         self._data = value
         if self.column_index is not None:
             self._data = self._data.set_index(self.column_index)
         else:
             self._data.reset_index()
+        self._arrays = [self._data.iloc[:, i].to_numpy() for i in range(self._data.shape[1])]
+        self._positions = None
+
+    def value(self, row, col):
+        """ Returns the value of a cell """
+        if row is None:
+            raise IndexError("Row not available")
+        return self._arrays[col][row]
+
+    def position(self, index):
+        """ Returns the row of the first entry of the index, or None """
+        if self._positions is None:
+            self._positions = {}
+            for row, entry in enumerate(self._data.index):
+                self._positions.setdefault(entry, row)
+        return self._positions.get(index)
 
     @property
     def rows(self):
@@ -84,18 +107,27 @@ class ResultsTable(QtCore.QObject):
     def stop(self):
         self._started = False
 
-    def update_data(self):
+    def update_data(self, data=None):
         if not self._started:
             return
         if self.force_reload:
             self.results.reload()
-        self.data = self.results.data
+            data = None
+        previous = self._source
+        self.data = self.results.data if data is None else data
         current_row_count, columns = self._data.shape
-        if (self.last_row_count < current_row_count):
+        if current_row_count < self.last_row_count or self.force_reload:
+            # Rows were removed, e.g. deleted points, or the values may have changed
+            self.last_row_count = current_row_count
+            self.data_reset.emit()
+        elif (self.last_row_count < current_row_count):
             # Request cells content update
             self.data_changed.emit(self.last_row_count, 0,
                                    current_row_count - 1, columns - 1)
             self.last_row_count = current_row_count
+        elif self._source is not previous:
+            # New data of the same size, e.g. a file rewritten in place
+            self.data_reset.emit()
 
     def set_color(self, color):
         self.color = color
@@ -124,19 +156,36 @@ class PandasModelBase(QtCore.QAbstractTableModel):
 
     float_digits = 6
     concat_axis = 0
+    CACHE_SIZE = 4096  # formatted cells kept, about the visible part of the table
 
     def __init__(self, column_index=None, results_list=[], parent=None):
         super().__init__(parent)
         self.column_index = column_index
+        self._cache = OrderedDict()
+        self._vertical_header = None
         self._init_data(results_list)
 
     def _init_data(self, results_list=None):
         if results_list is None:
             results_list = []
         self.results_list = results_list
+        self._invalidate()
         self.row_count = self.pandas_row_count()
         self.column_count = self.pandas_column_count()
 
+    def _invalidate(self):
+        """ Drops the formatted cells and the cached index header """
+        self._cache.clear()
+        self._vertical_header = None
+
+    def _data_reset(self, results):
+        """ Internal method to handle data reset signal """
+        self.beginResetModel()
+        self._invalidate()
+        self.row_count = self.pandas_row_count()
+        self.column_count = self.pandas_column_count()
+        self.endResetModel()
+
     def clear(self):
         self.beginResetModel()
         for results in self.results_list:
@@ -149,6 +198,8 @@ class PandasModelBase(QtCore.QAbstractTableModel):
             self.beginResetModel()
             self.results_list.append(results)
             results.data_changed.connect(partial(self._data_changed, results))
+            results.data_reset.connect(partial(self._data_reset, results))
+            self._invalidate()
             self.endResetModel()
             results.init()
             results.start()
@@ -158,6 +209,7 @@ class PandasModelBase(QtCore.QAbstractTableModel):
         self.beginResetModel()
         if results in self.results_list:
             self.results_list.remove(results)
+        self._invalidate()
         self.row_count = self.pandas_row_count()
         self.column_count = self.pandas_column_count()
         results.stop()
@@ -171,24 +223,33 @@ class PandasModelBase(QtCore.QAbstractTableModel):
 
     def data(self, index, role=QtCore.Qt.ItemDataRole.DisplayRole):
         if index.isValid() and role in (QtCore.Qt.ItemDataRole.DisplayRole, SORT_ROLE):
+            key = (index.row(), index.column())
+            if role == QtCore.Qt.ItemDataRole.DisplayRole and key in self._cache:
+                self._cache.move_to_end(key)
+                return self._cache[key]
             try:
-                results, row, col = self.translate_to_local(index.row(), index.column())
-                value = results.data.iat[row, col]
-                column_type = results.data.dtypes.iat[col]
-                # Cast to column type
-                value_render = column_type.type(value)
+                results, row, col = self.translate_to_local(*key)
+                value = results.value(row, col)
+                value_render = value
             except (IndexError, ValueError, TypeError):
                 value = NaN
                 value_render = ""
-            if isinstance(value_render, float64):
+            if isinstance(value_render, (float, floating)):
                 # limit maximum number of decimal digits displayed
                 value_render = f"{value_render:.{self.float_digits:d}g}"
 
             if role == QtCore.Qt.ItemDataRole.DisplayRole:
-                return str(value_render)
+                value_render = str(value_render)
+                self._cache[key] = value_render
+                if len(self._cache) > self.CACHE_SIZE:
+                    self._cache.popitem(last=False)
+                return value_render
             elif role == SORT_ROLE:
                 # For numerical sort
-                return float(value)
+                try:
+                    return float(value)
+                except (ValueError, TypeError):
+                    return NaN
 
         return None
 
@@ -223,6 +284,7 @@ class PandasModelBase(QtCore.QAbstractTableModel):
 
     def _data_changed(self, results, r1, c1, r2, c2):
         """ Internal method to handle data changed signal """
+        self._vertical_header = None
         rows, rows_start, columns, columns_start = \
             self._get_new_rows_columns(results, r1, c1, r2, c2)
         if rows or columns:
@@ -242,6 +304,7 @@ class PandasModelBase(QtCore.QAbstractTableModel):
                 self.column_count += columns
                 self.endInsertColumns()
         else:
+            self._cache.clear()
             top_bottom = self._get_row_column_set(results, r1, c1, r2, c2)
             for r1, c1, r2, c2 in top_bottom:
                 self.dataChanged.emit(self.createIndex(r1, c1),
@@ -310,6 +373,7 @@ class PandasModelBase(QtCore.QAbstractTableModel):
         for r in self.results_list:
             r.start()
             r.update_data()
+        self._invalidate()
         self.row_count = self.pandas_row_count()
         self.column_count = self.pandas_column_count()
         self.endResetModel()
@@ -334,6 +398,20 @@ class PandasModelByRow(PandasModelBase):
             cols = self.results_list[0].columns
         return cols
 
+    def _get_new_rows_columns(self, results, r1, c1, r2, c2):
+        new_rows, new_rows_start, new_columns, new_columns_start = \
+            super()._get_new_rows_columns(results, r1, c1, r2, c2)
+        if new_rows > 0:
+            # The rows are appended after the other rows of the same results
+            new_rows_start = self.translate_to_global(results, r1, c1)[0]
+        return new_rows, new_rows_start, new_columns, new_columns_start
+
+    def _data_changed(self, results, r1, c1, r2, c2):
+        # Rows inserted before other results shift the cells below them
+        if results is not self.results_list[-1]:
+            self._cache.clear()
+        super()._data_changed(results, r1, c1, r2, c2)
+
     def _get_row_column_set(self, results, r1, c1, r2, c2):
         top = self.translate_to_global(results, r1, c1)
         bottom = self.translate_to_global(results, r2, c2)
@@ -353,7 +431,7 @@ class PandasModelByRow(PandasModelBase):
         for res in self.results_list:
             if res == results:
                 break
-            rows += results.rows
+            rows += res.rows
         return rows + row, col
 
     @property
@@ -361,9 +439,11 @@ class PandasModelByRow(PandasModelBase):
         if self.column_index is None:
             header = range(self.row_count)
         else:
-            header = []
-            for r in self.results_list:
-                header.extend(r.data.index)
+            if self._vertical_header is None:
+                self._vertical_header = []
+                for r in self.results_list:
+                    self._vertical_header.extend(r.data.index)
+            header = self._vertical_header
         return header
 
     @property
@@ -405,6 +485,12 @@ class PandasModelByColumn(PandasModelBase):
 
         return top_bottoms
 
+    def _data_changed(self, results, r1, c1, r2, c2):
+        # New index entries can be sorted between the existing rows
+        if self.column_index is not None:
+            self._cache.clear()
+        super()._data_changed(results, r1, c1, r2, c2)
+
     def translate_to_local(self, row, col):
         """ Translate from full table coordinate to single results coordinates """
         columns = 0
@@ -414,11 +500,7 @@ class PandasModelByColumn(PandasModelBase):
             columns += results.columns
         if (self.column_index is not None):
             # Remap row to matching index entry when indexing is used
-            try:
-                index = self.vertical_header[row]
-                row = list(results.data.index).index(index)
-            except ValueError:
-                row = None
+            row = results.position(self.vertical_header[row])
         return results, row, col - columns
 
     def translate_to_global(self, results, row, col):
@@ -427,7 +509,7 @@ class PandasModelByColumn(PandasModelBase):
         for res in self.results_list:
             if res == results:
                 break
-            columns += results.columns
+            columns += res.columns
         return row, col + columns
 
     @property
@@ -447,11 +529,12 @@ class PandasModelByColumn(PandasModelBase):
 
     @property
     def vertical_header(self):
-        header = set([])
-        for r in self.results_list:
-            header = header.union(set(r.data.index))
-        header = sorted(list(header))
-        return header
+        if self._vertical_header is None:
+            header = set([])
+            for r in self.results_list:
+                header = header.union(set(r.data.index))
+            self._vertical_header = sorted(list(header))
+        return self._vertical_header
 
 
 class Table(QtWidgets.QTableView):
@@ -707,5 +790,10 @@ class TableWidget(TabWidget, QtWidgets.QWidget):
                            parent=None,
                            )
 
+    def stop_polling(self):
+        """ Stops the periodic refresh of the tables """
+        if self.table.refresh_time is not None:
+            self.table.timer.stop()
+
     def clear_widget(self):
         self.table.clear()
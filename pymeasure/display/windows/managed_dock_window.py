@@ -103,6 +103,7 @@ class ManagedDockWindow(ManagedWindowBase):
             self.manager.abort_returned.connect(plot_widget.plot_frame.hide_vline)
                     
             plot_widget.pointWidget = self.pointWidget
+            self.pointWidget.modeChanged.connect(plot_widget.set_deletion_mode)
             
         self.dock_widget.sigCurveClicked.connect(self.curve_clicked)
 
@@ -46,10 +46,17 @@ from ..widgets import (
     EstimatorWidget,
     CurrentPointWidget,
     ClearDialog,
-    ParametersWidget
+    ParametersWidget,
+    CatalogWidget
 )
 from ...experiment import Results, Procedure, unique_filename
+from ...experiment.catalog import Catalog
+from ...experiment.binary import binary_to_csv, is_binary
+from ...experiment.compression import compression, convert
+from ..loader import ResultsLoader
+from ..refresh import RefreshScheduler
 from packages.point_del_widget import PointDelWidget
+from packages.phase_timing_widget import PhaseTimingWidget
 from logic.open_in_explorer import open_in_explorer
 
 log = logging.getLogger(__name__)
@@ -123,6 +130,9 @@ class ManagedWindowBase(QtWidgets.QMainWindow):
         should be saved to the selected file, or not (i.e., to a temporary file instead).
     :param hide_groups: a boolean controlling whether parameter groups are hidden (True, default)
         or disabled/grayed-out (False) when the group conditions are not met.
+    :param catalog_file: path of a SQLite measurement catalog (see
+        :class:`~pymeasure.experiment.catalog.Catalog`) in which the recorded results are
+        indexed and which can be searched in the "Catalog" dock, or :code:`None` (default)
 
     """
 
@@ -140,6 +150,7 @@ class ManagedWindowBase(QtWidgets.QMainWindow):
                  inputs_in_scrollarea=False,
                  enable_file_input=True,
                  hide_groups=True,
+                 catalog_file=None,
                  ):
 
         super().__init__(parent)
@@ -159,6 +170,7 @@ class ManagedWindowBase(QtWidgets.QMainWindow):
         log.setLevel(log_level)
         self.log.setLevel(log_level)
         self.widget_list = widget_list
+        self.catalog_file = catalog_file
 
         # Check if the get_estimates function is reimplemented
         self.use_estimator = not self.procedure_class.get_estimates == Procedure.get_estimates
@@ -239,6 +251,13 @@ class ManagedWindowBase(QtWidgets.QMainWindow):
         
         self.manager.update_point.connect(self.current_point.set_current_point)
 
+        # Curves and tables are refreshed when new rows arrive instead of polling each display
+        self.refresh_scheduler = RefreshScheduler(parent=self)
+        self.manager.new_rows.connect(self.refresh_scheduler.mark_dirty)
+        for wdg in self.widget_list:
+            if hasattr(wdg, 'stop_polling'):
+                wdg.stop_polling()
+
         if self.use_sequencer:
             self.sequencer = SequencerWidget(
                 self.sequencer_inputs,
@@ -252,6 +271,19 @@ class ManagedWindowBase(QtWidgets.QMainWindow):
             )
             
         self.pointWidget = PointDelWidget(parent=self)
+
+        self.phase_timing_widget = PhaseTimingWidget(parent=self)
+
+        self.catalog = None
+        if self.catalog_file is not None:
+            try:
+                self.catalog = Catalog(self.catalog_file)
+            except Exception:
+                log.exception(f"Could not open the measurement catalog {self.catalog_file}")
+        if self.catalog is not None:
+            self.manager.catalog = self.catalog
+            self.catalog_widget = CatalogWidget(self.catalog, parent=self)
+            self.catalog_widget.open_files.connect(self.load_experiments)
             
         self.clear_dialog = ClearDialog(parent=self)
         
@@ -345,6 +377,29 @@ class ManagedWindowBase(QtWidgets.QMainWindow):
         self.dockShowWidget.layout().addWidget(showPointButton)
         showPointButton.clicked.connect(lambda: self.point_dock.setVisible(not self.point_dock.isVisible()))
 
+        phase_timing_dock = QtWidgets.QDockWidget('Phase Timing')
+        phase_timing_dock.setWidget(self.phase_timing_widget)
+        phase_timing_dock.setFeatures(QtWidgets.QDockWidget.DockWidgetFeature.NoDockWidgetFeatures)
+        phase_timing_dock.setFeatures(QtWidgets.QDockWidget.DockWidgetFeature.DockWidgetClosable)
+        phase_timing_dock.setVisible(False)
+        self.addDockWidget(QtCore.Qt.DockWidgetArea.LeftDockWidgetArea, phase_timing_dock)
+
+        showPhaseTimingButton = QtWidgets.QPushButton('Phase Timing', self.dockShowWidget)
+        self.dockShowWidget.layout().addWidget(showPhaseTimingButton)
+        showPhaseTimingButton.clicked.connect(lambda: phase_timing_dock.setVisible(not phase_timing_dock.isVisible()))
+
+        if self.catalog is not None:
+            catalog_dock = QtWidgets.QDockWidget('Catalog')
+            catalog_dock.setWidget(self.catalog_widget)
+            catalog_dock.setFeatures(QtWidgets.QDockWidget.DockWidgetFeature.NoDockWidgetFeatures)
+            catalog_dock.setFeatures(QtWidgets.QDockWidget.DockWidgetFeature.DockWidgetClosable)
+            catalog_dock.setVisible(False)
+            self.addDockWidget(QtCore.Qt.DockWidgetArea.LeftDockWidgetArea, catalog_dock)
+
+            showCatalogButton = QtWidgets.QPushButton('Catalog', self.dockShowWidget)
+            self.dockShowWidget.layout().addWidget(showCatalogButton)
+            showCatalogButton.clicked.connect(lambda: catalog_dock.setVisible(not catalog_dock.isVisible()))
+
         self.tabs = QtWidgets.QTabWidget(self.main)
         for wdg in self.widget_list:
             self.tabs.addTab(wdg, wdg.name)
@@ -413,7 +468,7 @@ class ManagedWindowBase(QtWidgets.QMainWindow):
                 self.queue(procedure)
 
     def browser_item_menu(self, position):
-        item = self.browser.itemAt(position)
+        item = self.browser.item_at(position)
 
         if item is not None:
             experiment = self.manager.experiments.with_browser_item(item)
@@ -440,6 +495,14 @@ class ManagedWindowBase(QtWidgets.QMainWindow):
             action_save.triggered.connect(
                 lambda: self.save_experiment_copy(experiment.results.data_filename))
             menu.addAction(action_save)
+
+            # Remove the deleted points from the datafile
+            action_compact = QtGui.QAction(menu)
+            action_compact.setText("Compact Data File")
+            action_compact.setEnabled(len(experiment.results.deleted_rows) > 0
+                                      and experiment.procedure.status != Procedure.RUNNING)
+            action_compact.triggered.connect(lambda: self.compact_experiment_data(experiment))
+            menu.addAction(action_compact)
             
             # Delete
             action_delete = QtGui.QAction(menu)
@@ -512,15 +575,11 @@ class ManagedWindowBase(QtWidgets.QMainWindow):
                 self.disable_clear_buttons()
 
     def show_experiments(self):
-        root = self.browser.invisibleRootItem()
-        for i in range(root.childCount()):
-            item = root.child(i)
+        for item in self.browser.items():
             item.setCheckState(0, QtCore.Qt.CheckState.Checked)
 
     def hide_experiments(self):
-        root = self.browser.invisibleRootItem()
-        for i in range(root.childCount()):
-            item = root.child(i)
+        for item in self.browser.items():
             item.setCheckState(0, QtCore.Qt.CheckState.Unchecked)
 
     def clear_experiments(self):
@@ -554,25 +613,21 @@ class ManagedWindowBase(QtWidgets.QMainWindow):
             self.disable_clear_buttons()
             
     def clear_selected(self, delete_files:bool=False):
-        root = self.browser.invisibleRootItem()
-        i = 0
-        while i < root.childCount():
-            item = root.child(i)
-            if item.checkState(0) == QtCore.Qt.CheckState.Checked:
-                experiment = self.manager.experiments.with_browser_item(item)
-                self.manager.remove(experiment)
-                if delete_files:
-                    os.unlink(experiment.data_filename)
-            else:
-                i += 1
+        experiments = [self.manager.experiments.with_browser_item(item)
+                       for item in self.browser.items()
+                       if item.checkState(0) == QtCore.Qt.CheckState.Checked]
+        self.manager.remove_experiments(experiments)
+        if delete_files:
+            for experiment in experiments:
+                os.unlink(experiment.data_filename)
 
     def open_experiment(self):
         dialog = ResultsDialog(self.procedure_class,
                                widget_list=self.widget_list)
         if dialog.exec():
-            filenames = dialog.selectedFiles()
-            for filename in map(str, filenames):
-                if filename in self.manager.experiments:
+            filenames = []
+            for filename in map(str, dialog.selectedFiles()):
+                if filename in self.manager.experiments or filename in filenames:
                     QtWidgets.QMessageBox.warning(
                         self, "Load Error",
                         "The file %s cannot be opened twice." % os.path.basename(filename)
@@ -580,24 +635,58 @@ class ManagedWindowBase(QtWidgets.QMainWindow):
                 elif filename == '':
                     return
                 else:
-                    results = Results.load(filename)
-                    experiment = self.new_experiment(results)
-                    for curve in experiment.curve_list:
-                        if curve:
-                            curve.update_data()
-                    experiment.browser_item.progressbar.setValue(100)
-                    self.manager.load(experiment)
-                    log.info('Opened data file %s' % filename)
-                    
-                    self.browser_widget.show_button.setEnabled(True)
-                    self.browser_widget.hide_button.setEnabled(True)
-        
-                    if not self.manager.is_running():
-                        self.enable_clear_buttons()
+                    filenames.append(filename)
+            if filenames:
+                self.load_experiments(filenames)
+
+    def load_experiments(self, filenames):
+        """Load the data files in the background and add every experiment to the
+        browser as soon as it is loaded. A progress dialog allows to cancel loading."""
+        progress = QtWidgets.QProgressDialog("Opening data files...", "Cancel", 0, len(filenames), self)
+        progress.setWindowTitle("Open")
+        progress.setMinimumDuration(500)
+
+        loader = ResultsLoader(filenames, parent=self)
+        loader.loaded.connect(self.experiment_loaded)
+        loader.failed.connect(
+            lambda filename, error: log.error(f"Could not open data file {filename}: {error}"))
+        loader.progress.connect(lambda done, total: progress.setValue(done))
+        progress.canceled.connect(loader.stop)
+        loader.finished.connect(progress.deleteLater)
+        loader.finished.connect(loader.deleteLater)
+        loader.start()
+
+    def experiment_loaded(self, filename, results):
+        if filename in self.manager.experiments:
+            log.warning('Data file %s is already open' % filename)
+            return
+        experiment = self.new_experiment(results)
+        for curve in experiment.curve_list:
+            if curve:
+                curve.update_data()
+        experiment.browser_item.setProgress(100)
+        self.manager.load(experiment)
+        log.info('Opened data file %s' % filename)
+
+        self.browser_widget.show_button.setEnabled(True)
+        self.browser_widget.hide_button.setEnabled(True)
+
+        if not self.manager.is_running():
+            self.enable_clear_buttons()
+
+    def compact_experiment_data(self, experiment):
+        """Rewrite the datafile without the points deleted in the plot."""
+        experiment.results.compact()
+        for curve in experiment.curve_list:
+            if curve:
+                curve.update_data()
+        log.info(f"Compacted data file '{experiment.results.data_filename}'.")
 
     def save_experiment_copy(self, source_filename):
         """Save a copy of the datafile to a selected folder and file.
         Primarily useful for experiments that are stored in a temporary file.
+        Binary data files are exported to CSV unless a binary filename is selected,
+        CSV data files are (de)compressed according to the extension of the selected file.
         """
         dialog = QtWidgets.QFileDialog(self)
         dialog.setFileMode(QtWidgets.QFileDialog.AnyFile)
@@ -606,7 +695,17 @@ class ManagedWindowBase(QtWidgets.QMainWindow):
 
         if dialog.exec():
             filename = dialog.selectedFiles()[0]
-            shutil.copy2(source_filename, filename)
+            if is_binary(source_filename) and not is_binary(filename):
+                binary_to_csv(source_filename, filename)
+                log.info(f"Exported data from '{source_filename}' to '{filename}'.")
+                return
+            if compression(source_filename) != compression(filename) and not is_binary(source_filename):
+                convert(source_filename, filename)
+            else:
+                shutil.copy2(source_filename, filename)
+            if os.path.exists(Results.tombstone_filename(source_filename)):
+                shutil.copy2(Results.tombstone_filename(source_filename),
+                             Results.tombstone_filename(filename))
 
             log.info(f"Copied data from '{source_filename}' to '{filename}'.")
 
@@ -616,9 +715,7 @@ class ManagedWindowBase(QtWidgets.QMainWindow):
         if color.isValid():
             pixelmap = QtGui.QPixmap(24, 24)
             pixelmap.fill(color)
-            self.browser.itemChanged.disconnect(self.browser_item_changed)
             experiment.browser_item.setIcon(0, QtGui.QIcon(pixelmap))
-            self.browser.itemChanged.connect(self.browser_item_changed)
             for curve in experiment.curve_list:
                 if curve:
                     curve.wdg.set_color(curve, color=color)
@@ -654,7 +751,7 @@ class ManagedWindowBase(QtWidgets.QMainWindow):
 
     def new_curve(self, wdg, results, color=None, **kwargs):
         if color is None:
-            color = pg.intColor(self.browser.topLevelItemCount() % 8)
+            color = pg.intColor(self.browser.item_count() % 8)
         return wdg.new_curve(results, color=color, **kwargs)
 
     def new_experiment(self, results, curve=None):
@@ -845,7 +942,7 @@ class ManagedWindowBase(QtWidgets.QMainWindow):
     def curve_clicked(self, curve):
         for experiment in self.manager.experiments.queue:
             if curve in experiment.curve_list:
-                self.browser.setCurrentItem(experiment.browser_item )
+                self.browser.set_current_item(experiment.browser_item)
                 break
 
     @property
@@ -0,0 +1,344 @@
+#
+# This file is part of the PyMeasure package.
+#
+# Copyright (c) 2013-2024 PyMeasure Developers
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+#
+
+"""Binary storage of measurement results.
+
+A binary results file starts with a fixed preamble, followed by a JSON header
+with the procedure, parameters, metadata and columns of the measurement, and
+the data as little-endian float64 rows. Data is appended in chunks of rows and
+read back into memory at once. Run as a module to convert existing files::
+
+    python -m pymeasure.experiment.binary to-binary DIRECTORY_OR_FILE ...
+    python -m pymeasure.experiment.binary to-csv DIRECTORY_OR_FILE ...
+"""
+
+import argparse
+import json
+import logging
+import os
+import struct
+
+import numpy as np
+import pandas as pd
+
+log = logging.getLogger(__name__)
+log.addHandler(logging.NullHandler())
+
+BINARY_EXTENSION = "pmb"
+MAGIC = b"PYMEASURE-BINARY"
+VERSION = 1
+PREAMBLE = struct.Struct("<16sIQ4x")
+HEADER_SIZE = 16384
+DTYPE = np.dtype("<f8")
+CONVERSION_ROWS = 65536  # rows formatted at once when exporting to CSV
+
+COMMENT = '#'
+LINE_BREAK = "\n"
+
+
+def is_binary(filename):
+    """ Returns True if the filename has the extension of binary results files """
+    return str(filename).lower().endswith("." + BINARY_EXTENSION)
+
+
+def header_lines(attributes):
+    """ Returns the commented text header of a CSV results file, including
+    the metadata, for the attributes of a binary results file.
+    """
+    h = ["Procedure: <%s>" % attributes["procedure"], "Parameters:"]
+    h.extend(f"\t{name}: {value}" for name, value in attributes["parameters"].items())
+    if attributes.get("metadata"):
+        h.append("Metadata:")
+        h.extend(f"\t{name}: {value}" for name, value in attributes["metadata"].items())
+    h.append("Data:")
+    return [COMMENT + line for line in h]
+
+
+def parse_header_lines(lines):
+    """ Returns the attributes of a binary results file for the commented
+    text header of a CSV results file.
+    """
+    attributes = {"procedure": "", "parameters": {}, "metadata": {}}
+    section = None
+    for line in lines:
+        line = line.rstrip("\r\n")[1:]
+        if line.startswith("Procedure"):
+            attributes["procedure"] = line.partition("<")[2].rpartition(">")[0]
+        elif line.startswith("Parameters"):
+            section = "parameters"
+        elif line.startswith("Metadata"):
+            section = "metadata"
+        elif line.startswith("Data"):
+            section = None
+        elif line.startswith("\t") and section is not None:
+            name, _, value = line[1:].partition(": ")
+            attributes[section][name] = value
+    return attributes
+
+
+class BinaryFile:
+    """ Reads and writes a binary results file.
+
+    :param filename: path of the file.
+    """
+
+    def __init__(self, filename):
+        self.filename = filename
+
+    def create(self, attributes, data=None):
+        """ Creates the file with the given attributes, overwriting an
+        existing file.
+
+        :param attributes: dict with the keys "procedure", "parameters",
+                           "metadata" and "columns".
+        :param data: optional 2D array of rows to write.
+        """
+        header = self._encode(attributes)
+        header_size = max(HEADER_SIZE, self._header_size(len(header)))
+        with open(self.filename, "wb") as f:
+            f.write(PREAMBLE.pack(MAGIC, VERSION, header_size))
+            f.write(header.ljust(header_size))
+            if data is not None:
+                f.write(np.ascontiguousarray(data, dtype=DTYPE).tobytes())
+
+    @staticmethod
+    def _encode(attributes):
+        return json.dumps(attributes).encode("utf-8")
+
+    @staticmethod
+    def _header_size(length):
+        size = HEADER_SIZE
+        while size < length:
+            size *= 2
+        return size
+
+    def _preamble(self, f):
+        magic, version, header_size = PREAMBLE.unpack(f.read(PREAMBLE.size))
+        if magic != MAGIC:
+            raise ValueError(f"{self.filename} is not a binary results file")
+        if version > VERSION:
+            raise ValueError(f"{self.filename} has the unsupported version {version}")
+        return header_size
+
+    def attributes(self):
+        """ Returns the attributes stored in the header """
+        with open(self.filename, "rb") as f:
+            header_size = self._preamble(f)
+            return json.loads(f.read(header_size).decode("utf-8"))
+
+    def set_attributes(self, attributes):
+        """ Replaces the attributes stored in the header. The header is
+        rewritten in place; only if it no longer fits is the data moved.
+        """
+        header = self._encode(attributes)
+        with open(self.filename, "r+b") as f:
+            header_size = self._preamble(f)
+            if len(header) <= header_size:
+                f.write(header.ljust(header_size))
+                return
+            data = f.read()
+            header_size = self._header_size(len(header))
+            f.seek(0)
+            f.write(PREAMBLE.pack(MAGIC, VERSION, header_size))
+            f.write(header.ljust(header_size))
+            f.write(data)
+            f.truncate()
+
+    def rows(self):
+        """ Returns the number of complete rows in the file """
+        with open(self.filename, "rb") as f:
+            header_size = self._preamble(f)
+            columns = len(json.loads(f.read(header_size).decode("utf-8"))["columns"])
+        offset = PREAMBLE.size + header_size
+        return max(os.path.getsize(self.filename) - offset, 0) // (columns * DTYPE.itemsize)
+
+    def read(self):
+        """ Returns the columns and the data as an array of shape
+        (rows, columns). A partially written last row is ignored.
+
+        The data is read rather than memory mapped, so that no mapping keeps
+        the file open and it can be rewritten (e.g. by :meth:`create`).
+        """
+        with open(self.filename, "rb") as f:
+            header_size = self._preamble(f)
+            columns = json.loads(f.read(header_size).decode("utf-8"))["columns"]
+        offset = PREAMBLE.size + header_size
+        rows = max(os.path.getsize(self.filename) - offset, 0) // (len(columns) * DTYPE.itemsize)
+        if rows == 0:
+            return columns, np.empty((0, len(columns)), dtype=DTYPE)
+        data = np.fromfile(self.filename, dtype=DTYPE, count=rows * len(columns), offset=offset)
+        return columns, data.reshape(rows, len(columns))
+
+    def frame(self):
+        """ Returns the data as a DataFrame """
+        columns, data = self.read()
+        return pd.DataFrame(data, columns=columns, copy=False)
+
+
+class BinaryWriter:
+    """ Appends batches of records to a binary results file in chunks of
+    rows. A chunk is written when it is full and when the writer is flushed
+    or closed.
+
+    :param filename: path of an existing binary results file.
+    :param formatter: :class:`.CSVFormatter` used to convert values that are
+                      not plain numbers.
+    :param chunk_size: number of rows per chunk.
+    """
+
+    def __init__(self, filename, formatter, chunk_size=256):
+        self.filename = filename
+        self.converter = formatter
+        self.columns = BinaryFile(filename).attributes()["columns"]
+        self.chunk = np.empty((chunk_size, len(self.columns)), dtype=DTYPE)
+        self.size = 0
+        self.stream = open(filename, "ab")
+
+    def _write_chunk(self):
+        if self.size and self.stream is not None:
+            self.stream.write(self.chunk[:self.size].tobytes())
+            self.size = 0
+
+    def write(self, records):
+        """ Adds a batch of records. Full chunks are handed to the file,
+        the rest is kept until the next :meth:`flush`.
+        """
+        frame = self.converter.convert(self.converter.frame(records).reindex(columns=self.columns))
+        values = frame.apply(pd.to_numeric, errors="coerce").to_numpy(dtype=DTYPE)
+        start = 0
+        while start < len(values):
+            count = min(len(values) - start, len(self.chunk) - self.size)
+            self.chunk[self.size:self.size + count] = values[start:start + count]
+            self.size += count
+            start += count
+            if self.size == len(self.chunk):
+                self._write_chunk()
+
+    def flush(self):
+        self._write_chunk()
+        if self.stream is not None:
+            self.stream.flush()
+
+    def sync(self):
+        """ Flushes the rows and waits until the file is written to disk """
+        self.flush()
+        if self.stream is not None:
+            os.fsync(self.stream.fileno())
+
+    def close(self):
+        self.flush()
+        if self.stream is not None:
+            self.stream.close()
+            self.stream = None
+
+
+def csv_to_binary(csv_filename, binary_filename=None):
+    """ Converts a CSV results file to a binary results file.
+
+    :param csv_filename: path of the CSV file.
+    :param binary_filename: path of the binary file, defaults to the CSV path
+                            with the binary extension.
+    :return: path of the binary file.
+    """
+    if binary_filename is None:
+        binary_filename = os.path.splitext(csv_filename)[0] + "." + BINARY_EXTENSION
+    header = []
+    with open(csv_filename) as f:
+        for line in f:
+            if not line.startswith(COMMENT):
+                break
+            header.append(line)
+    attributes = parse_header_lines(header)
+    if not attributes["procedure"]:
+        raise ValueError(f"{csv_filename} has no results header")
+    data = pd.read_csv(csv_filename, comment=COMMENT)
+    attributes["columns"] = list(data.columns)
+    values = data.apply(pd.to_numeric, errors="coerce").to_numpy(dtype=DTYPE)
+    BinaryFile(binary_filename).create(attributes, values)
+    return binary_filename
+
+
+def binary_to_csv(binary_filename, csv_filename=None, delimiter=','):
+    """ Exports a binary results file to a CSV results file.
+
+    :param binary_filename: path of the binary file.
+    :param csv_filename: path of the CSV file, defaults to the binary path
+                         with the ``csv`` extension.
+    :param delimiter: delimiter between columns.
+    :return: path of the CSV file.
+    """
+    if csv_filename is None:
+        csv_filename = os.path.splitext(binary_filename)[0] + ".csv"
+    from .results import CSVFormatter
+
+    binary = BinaryFile(binary_filename)
+    attributes = binary.attributes()
+    columns, data = binary.read()
+    formatter = CSVFormatter(columns, delimiter)
+    with open(csv_filename, "w") as f:
+        f.write(LINE_BREAK.join(header_lines(attributes)) + LINE_BREAK)
+        f.write(formatter.format_header() + LINE_BREAK)
+        for start in range(0, len(data), CONVERSION_ROWS):
+            frame = pd.DataFrame(data[start:start + CONVERSION_ROWS], columns=columns)
+            f.write(formatter.format_frame(frame, LINE_BREAK))
+    return csv_filename
+
+
+def _files(paths, extension):
+    for path in paths:
+        if os.path.isdir(path):
+            for root, _, filenames in os.walk(path):
+                for filename in sorted(filenames):
+                    if filename.lower().endswith("." + extension):
+                        yield os.path.join(root, filename)
+        else:
+            yield path
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Convert results files between CSV and binary.")
+    parser.add_argument("direction", choices=["to-binary", "to-csv"])
+    parser.add_argument("paths", nargs="+", help="files or directories (searched recursively)")
+    parser.add_argument("--overwrite", action="store_true", help="replace existing target files")
+    args = parser.parse_args(argv)
+
+    to_binary = args.direction == "to-binary"
+    converted = failed = 0
+    for source in _files(args.paths, "csv" if to_binary else BINARY_EXTENSION):
+        target = os.path.splitext(source)[0] + ("." + BINARY_EXTENSION if to_binary else ".csv")
+        if os.path.exists(target) and not args.overwrite:
+            log.warning(f"Skipping {source}, {target} already exists.")
+            continue
+        try:
+            csv_to_binary(source, target) if to_binary else binary_to_csv(source, target)
+            converted += 1
+        except Exception as e:
+            log.error(f"Could not convert {source}: {e}")
+            failed += 1
+    print(f"Converted {converted} files, {failed} failed.")
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    main()
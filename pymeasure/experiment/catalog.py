@@ -0,0 +1,304 @@
+#
+# This file is part of the PyMeasure package.
+#
+# Copyright (c) 2013-2024 PyMeasure Developers
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+#
+
+
+"""Local SQLite catalog of measurement results.
+
+The catalog indexes the procedure, parameter values, metadata, number of rows
+and the minimum and maximum of every column of the results files, so that
+measurements can be found without opening the files. It is updated by the
+:class:`.Recorder` when an experiment starts and ends, and by :meth:`Catalog.scan`
+for existing folders.
+"""
+
+import logging
+import os
+import re
+import sqlite3
+from contextlib import closing
+from time import time
+
+import numpy as np
+import pandas as pd
+
+from .binary import BINARY_EXTENSION, BinaryFile, is_binary, parse_header_lines
+from .compression import open_text
+
+log = logging.getLogger(__name__)
+log.addHandler(logging.NullHandler())
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS experiments (
+    id INTEGER PRIMARY KEY,
+    filename TEXT UNIQUE NOT NULL,
+    procedure TEXT,
+    status TEXT,
+    rows INTEGER,
+    modified REAL,
+    indexed REAL
+);
+CREATE TABLE IF NOT EXISTS attributes (
+    experiment INTEGER NOT NULL REFERENCES experiments(id) ON DELETE CASCADE,
+    kind TEXT NOT NULL,
+    name TEXT NOT NULL,
+    value TEXT,
+    number REAL
+);
+CREATE TABLE IF NOT EXISTS columns (
+    experiment INTEGER NOT NULL REFERENCES experiments(id) ON DELETE CASCADE,
+    name TEXT NOT NULL,
+    minimum REAL,
+    maximum REAL
+);
+CREATE INDEX IF NOT EXISTS attributes_by_name ON attributes (name, number, value);
+CREATE INDEX IF NOT EXISTS attributes_by_experiment ON attributes (experiment);
+CREATE INDEX IF NOT EXISTS columns_by_experiment ON columns (experiment);
+"""
+
+EXTENSIONS = ("csv", "csv.gz", "csv.zst", BINARY_EXTENSION)
+OPERATORS = ("<=", ">=", "!=", "=", "<", ">", "~")
+NUMBER = re.compile(r"^\s*[-+]?(\d+\.?\d*|\.\d+)([eE][-+]?\d+)?")
+
+
+def _number(value):
+    """ Returns the leading number of a value such as "4.2 K", or None """
+    match = NUMBER.match(str(value))
+    return float(match.group(0)) if match else None
+
+
+def parse_query(text):
+    """ Parses a query such as "Mode=HarmonicMode; Sample name~X; Temperature<5"
+    into a list of (name, operator, value) conditions. A term without an
+    operator matches the procedure class.
+
+    :param text: terms separated by semicolons.
+    :return: the procedure (or None) and the list of conditions.
+    """
+    procedure = None
+    conditions = []
+    for term in text.split(";"):
+        term = term.strip()
+        if not term:
+            continue
+        positions = [(term.find(op), op) for op in OPERATORS if op in term]
+        if not positions:
+            procedure = term
+            continue
+        # The first operator in the term; on a tie the longer one, e.g. "<=" before "<"
+        index, op = min(positions, key=lambda p: (p[0], -len(p[1])))
+        conditions.append((term[:index].strip(), op, term[index + len(op):].strip()))
+    return procedure, conditions
+
+
+class Catalog:
+    """ SQLite index of results files.
+
+    Every call opens its own short connection, so the catalog can be used
+    from the Recorder, the GUI and a scanner thread at the same time.
+
+    :param filename: path of the SQLite database, created if needed.
+    """
+
+    def __init__(self, filename):
+        self.filename = filename
+        directory = os.path.dirname(os.path.abspath(filename))
+        if not os.path.exists(directory):
+            os.makedirs(directory)
+        with closing(self._connect()) as connection, connection:
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.executescript(SCHEMA)
+
+    @staticmethod
+    def default_filename():
+        """ Returns the default location of the catalog in the home folder """
+        return os.path.join(os.path.expanduser("~"), ".pymeasure", "catalog.sqlite")
+
+    def _connect(self):
+        connection = sqlite3.connect(self.filename, timeout=10)
+        connection.execute("PRAGMA foreign_keys=ON")
+        return connection
+
+    def _store(self, filename, procedure, parameters, metadata, status=None, data=None):
+        filename = os.path.abspath(filename)
+        modified = os.path.getmtime(filename) if os.path.exists(filename) else None
+        rows = None if data is None else len(data)
+        attributes = [("parameter", name, value) for name, value in parameters.items()]
+        attributes += [("metadata", name, value) for name, value in metadata.items()]
+        columns = []
+        if data is not None and len(data):
+            values = data.apply(pd.to_numeric, errors="coerce")
+            with np.errstate(all="ignore"):
+                minimum, maximum = values.min(skipna=True), values.max(skipna=True)
+            columns = [(name, None if pd.isna(minimum[name]) else float(minimum[name]),
+                        None if pd.isna(maximum[name]) else float(maximum[name]))
+                       for name in values.columns]
+
+        with closing(self._connect()) as connection, connection:
+            connection.execute("DELETE FROM experiments WHERE filename = ?", (filename,))
+            experiment = connection.execute(
+                "INSERT INTO experiments (filename, procedure, status, rows, modified, indexed) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (filename, procedure, status, rows, modified, time())).lastrowid
+            connection.executemany(
+                "INSERT INTO attributes (experiment, kind, name, value, number) VALUES (?, ?, ?, ?, ?)",
+                [(experiment, kind, name, str(value), _number(value))
+                 for kind, name, value in attributes])
+            connection.executemany(
+                "INSERT INTO columns (experiment, name, minimum, maximum) VALUES (?, ?, ?, ?)",
+                [(experiment, name, minimum, maximum) for name, minimum, maximum in columns])
+
+    def add_results(self, results, data=None):
+        """ Adds or updates the entry of a :class:`.Results` object.
+
+        :param results: the results.
+        :param data: the data for the row count and column ranges, if known.
+        """
+        attributes = results.attributes()
+        metadata = {m.name: str(m) for m in results.procedure.metadata_objects().values()
+                    if getattr(m, "evaluated", False)}
+        status = str(results.procedure.status)
+        for filename in results.data_filenames:
+            self._store(filename, attributes["procedure"], attributes["parameters"],
+                        metadata, status, data)
+
+    def experiment_started(self, results):
+        self.add_results(results)
+
+    def experiment_finished(self, results):
+        self.add_results(results, results.data)
+
+    def add_file(self, filename):
+        """ Indexes a results file from disk.
+
+        :param filename: path of a CSV or binary results file.
+        """
+        if is_binary(filename):
+            binary = BinaryFile(filename)
+            attributes = binary.attributes()
+            data = binary.frame()
+        else:
+            header = []
+            with open_text(filename) as f:
+                for line in f:
+                    if not line.startswith("#"):
+                        break
+                    header.append(line)
+            attributes = parse_header_lines(header)
+            if not attributes["procedure"]:
+                raise ValueError(f"{filename} has no results header")
+            with open_text(filename) as f:
+                data = pd.read_csv(f, comment="#")
+        self._store(filename, attributes["procedure"], attributes["parameters"],
+                    attributes.get("metadata", {}), None, data)
+
+    def scan(self, directory, should_stop=None, progress=None):
+        """ Indexes the results files in a folder and its subfolders, skipping
+        files that did not change since they were indexed, and removes the
+        entries of deleted files.
+
+        :param directory: folder to scan.
+        :param should_stop: optional callable, scanning stops when it returns True.
+        :param progress: optional callable, called with the number of checked files.
+        :return: number of indexed files.
+        """
+        directory = os.path.abspath(directory)
+        with closing(self._connect()) as connection:
+            known = dict(connection.execute(
+                "SELECT filename, modified FROM experiments WHERE filename LIKE ?",
+                (os.path.join(directory, "") + "%",)))
+
+        indexed = checked = 0
+        found = set()
+        for root, _, filenames in os.walk(directory):
+            for name in filenames:
+                if should_stop is not None and should_stop():
+                    return indexed
+                if not name.lower().endswith(EXTENSIONS):
+                    continue
+                filename = os.path.join(root, name)
+                found.add(filename)
+                checked += 1
+                if progress is not None:
+                    progress(checked)
+                if known.get(filename) == os.path.getmtime(filename):
+                    continue
+                try:
+                    self.add_file(filename)
+                    indexed += 1
+                except Exception as e:
+                    log.debug(f"Skipping {filename} in the catalog: {e}")
+
+        removed = [(filename,) for filename in known if filename not in found]
+        if removed:
+            with closing(self._connect()) as connection, connection:
+                connection.executemany("DELETE FROM experiments WHERE filename = ?", removed)
+        return indexed
+
+    def search(self, procedure=None, conditions=(), limit=1000):
+        """ Returns the entries matching all conditions, newest first.
+
+        Conditions compare parameter or metadata values by name. Numeric values
+        are compared as numbers (units are ignored), others as text; the
+        operator ``~`` matches a part of the text, case-insensitive.
+
+        :param procedure: part of the procedure class name, or None.
+        :param conditions: list of (name, operator, value) tuples.
+        :param limit: maximum number of entries.
+        :return: list of dicts with filename, procedure, status, rows and modified.
+        """
+        sql = ["SELECT filename, procedure, status, rows, modified FROM experiments e WHERE 1"]
+        arguments = []
+        if procedure:
+            sql.append("AND procedure LIKE ?")
+            arguments.append(f"%{procedure}%")
+        for name, op, value in conditions:
+            if op not in OPERATORS:
+                raise ValueError(f"Unknown operator {op}")
+            number = _number(value)
+            if op == "~":
+                test, argument = "a.value LIKE ?", f"%{value}%"
+            elif number is not None and NUMBER.match(value).end() == len(value.strip()):
+                test, argument = f"a.number {'<>' if op == '!=' else op} ?", number
+            elif op in ("=", "!="):
+                test, argument = f"a.value {'=' if op == '=' else '<>'} ? COLLATE NOCASE", value
+            else:
+                raise ValueError(f"Operator {op} requires a number, got '{value}'")
+            sql.append("AND EXISTS (SELECT 1 FROM attributes a WHERE a.experiment = e.id "
+                       f"AND a.name = ? COLLATE NOCASE AND {test})")
+            arguments.extend([name, argument])
+        sql.append("ORDER BY modified DESC LIMIT ?")
+        arguments.append(limit)
+
+        with closing(self._connect()) as connection:
+            rows = connection.execute(" ".join(sql), arguments).fetchall()
+        return [dict(zip(("filename", "procedure", "status", "rows", "modified"), row))
+                for row in rows]
+
+    def columns(self, filename):
+        """ Returns the (name, minimum, maximum) ranges of the columns of a file """
+        with closing(self._connect()) as connection:
+            return connection.execute(
+                "SELECT c.name, c.minimum, c.maximum FROM columns c "
+                "JOIN experiments e ON c.experiment = e.id WHERE e.filename = ?",
+                (os.path.abspath(filename),)).fetchall()
@@ -0,0 +1,258 @@
+#
+# This file is part of the PyMeasure package.
+#
+# Copyright (c) 2013-2024 PyMeasure Developers
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+#
+
+
+"""Compressed CSV data files.
+
+Data files ending in ``.csv.gz`` are compressed with gzip, files ending in
+``.csv.zst`` with Zstandard, which requires the optional ``zstandard``
+package. :func:`open_text` opens both like plain text files, so results are
+written and read through the same code as plain CSV files. Every writer
+session adds a gzip member or a Zstandard frame, which are read back as one
+stream. A gzip file whose writer did not close it, e.g. after a crash, is read
+up to the last complete line that was flushed. Run as a module to (de)compress existing files::
+
+    python -m pymeasure.experiment.compression compress --format zst DIRECTORY_OR_FILE ...
+    python -m pymeasure.experiment.compression decompress DIRECTORY_OR_FILE ...
+"""
+
+import argparse
+import gzip
+import io
+import logging
+import os
+import shutil
+import zlib
+
+log = logging.getLogger(__name__)
+log.addHandler(logging.NullHandler())
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+COMPRESSIONS = {"gz": "gzip", "zst": "zstd"}
+GZIP_LEVEL = 6
+ZSTD_LEVEL = 3
+CHUNK_SIZE = 1 << 16
+
+
+def compression(filename):
+    """ Returns the compression of a data file from its extension: "gzip",
+    "zstd" or None for an uncompressed file
+    """
+    extension = str(filename).lower().rpartition(".")[2]
+    return COMPRESSIONS.get(extension)
+
+
+def strip_compression(filename):
+    """ Returns the filename without the extension of the compression """
+    if compression(filename) is None:
+        return filename
+    return os.path.splitext(filename)[0]
+
+
+class _GzipReader(io.RawIOBase):
+    """ Reads the concatenated members of a gzip file like :class:`gzip.GzipFile`,
+    but ends the stream at a truncated last member instead of raising
+    :class:`EOFError`. The decoded data of an unfinished member is returned up
+    to its last complete line, so a partially written row is dropped.
+    """
+
+    def __init__(self, filename):
+        super().__init__()
+        self._file = open(filename, "rb")
+        self._decompressor = zlib.decompressobj(31)
+        self._started = False  # the current member has started
+        self._pending = b""
+        self._tail = b""  # decoded data after the last line break of an unfinished member
+        self._eof = False
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        while not self._pending and not self._eof:
+            self._fill()
+        size = min(len(buffer), len(self._pending))
+        buffer[:size] = self._pending[:size]
+        self._pending = self._pending[size:]
+        return size
+
+    def _fill(self):
+        data = b""
+        if self._decompressor.eof:
+            data = self._decompressor.unused_data
+            self._decompressor = zlib.decompressobj(31)
+            self._started = False
+        if not data:
+            data = self._file.read(CHUNK_SIZE)
+            if not data:
+                self._eof = True
+                if self._started:
+                    log.warning(f"{self._file.name} ends in an unfinished gzip member, "
+                                "the data is read up to its last complete line")
+                return
+        if not self._started:
+            data = data.lstrip(b"\0")  # padding between members
+            if not data:
+                return
+            self._started = True
+        decoded = self._tail + self._decompressor.decompress(data)
+        if self._decompressor.eof:
+            self._pending, self._tail = decoded, b""
+        else:
+            end = decoded.rfind(b"\n") + 1
+            self._pending, self._tail = decoded[:end], decoded[end:]
+
+    def close(self):
+        if not self.closed:
+            self._file.close()
+        super().close()
+
+
+def _require_zstandard():
+    if zstandard is None:
+        raise ImportError("The zstandard package is required for .zst data files")
+
+
+def open_text(filename, mode="r", encoding=None):
+    """ Opens a data file in text mode, compressing or decompressing it
+    according to its extension.
+
+    :param filename: path of the file.
+    :param mode: "r", "w", "a" or "x".
+    :param encoding: text encoding of the file.
+    :return: a text file object
+    """
+    kind = compression(filename)
+    if kind is None:
+        return open(filename, mode, encoding=encoding)
+    if kind == "gzip":
+        if mode == "r":
+            return io.TextIOWrapper(io.BufferedReader(_GzipReader(filename)), encoding=encoding)
+        return gzip.open(filename, mode + "t", compresslevel=GZIP_LEVEL, encoding=encoding)
+    _require_zstandard()
+    if mode == "r":
+        reader = zstandard.ZstdDecompressor().stream_reader(
+            open(filename, "rb"), read_across_frames=True, closefd=True)
+        return io.TextIOWrapper(io.BufferedReader(reader), encoding=encoding)
+    writer = zstandard.ZstdCompressor(level=ZSTD_LEVEL).stream_writer(
+        open(filename, mode + "b"), closefd=True)
+    return io.TextIOWrapper(writer, encoding=encoding)
+
+
+def convert(filename, target):
+    """ Copies a CSV data file, compressing or decompressing it according
+    to the extensions of both files.
+
+    :param filename: path of the source file.
+    :param target: path of the copy.
+    :return: path of the copy.
+    """
+    with open_text(filename) as source, open_text(target, "w") as f:
+        shutil.copyfileobj(source, f, 1 << 20)
+    return target
+
+
+def compress(filename, target=None, kind="gzip"):
+    """ Compresses a CSV data file.
+
+    :param filename: path of the uncompressed file.
+    :param target: path of the compressed file, defaults to the filename
+                   with the extension of the compression appended.
+    :param kind: "gzip" or "zstd".
+    :return: path of the compressed file.
+    """
+    if target is None:
+        extension = {kind: extension for extension, kind in COMPRESSIONS.items()}[kind]
+        target = f"{filename}.{extension}"
+    return convert(filename, target)
+
+
+def decompress(filename, target=None):
+    """ Decompresses a compressed CSV data file.
+
+    :param filename: path of the compressed file.
+    :param target: path of the uncompressed file, defaults to the filename
+                   without the extension of the compression.
+    :return: path of the uncompressed file.
+    """
+    if target is None:
+        target = strip_compression(filename)
+    return convert(filename, target)
+
+
+def _files(paths, compressed):
+    for path in paths:
+        if os.path.isdir(path):
+            for root, _, filenames in os.walk(path):
+                for filename in sorted(filenames):
+                    name = filename.lower()
+                    is_compressed = compression(name) is not None
+                    if strip_compression(name).endswith(".csv") and is_compressed == compressed:
+                        yield os.path.join(root, filename)
+        else:
+            yield path
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compress or decompress CSV data files.")
+    parser.add_argument("direction", choices=["compress", "decompress"])
+    parser.add_argument("paths", nargs="+", help="files or directories (searched recursively)")
+    parser.add_argument("--format", choices=sorted(COMPRESSIONS), default="gz",
+                        help="compression of new files (default: gz)")
+    parser.add_argument("--keep", action="store_true", help="keep the source files")
+    parser.add_argument("--overwrite", action="store_true", help="replace existing target files")
+    args = parser.parse_args(argv)
+
+    compressing = args.direction == "compress"
+    converted = failed = saved = 0
+    for source in _files(args.paths, not compressing):
+        target = f"{source}.{args.format}" if compressing else strip_compression(source)
+        if os.path.exists(target) and not args.overwrite:
+            log.warning(f"Skipping {source}, {target} already exists.")
+            continue
+        try:
+            if compressing:
+                compress(source, target, COMPRESSIONS[args.format])
+            else:
+                decompress(source, target)
+            shutil.copystat(source, target)
+            saved += os.path.getsize(source) - os.path.getsize(target)
+            if not args.keep:
+                os.remove(source)
+            converted += 1
+        except Exception as e:
+            log.error(f"Could not convert {source}: {e}")
+            if os.path.exists(target):
+                os.remove(target)
+            failed += 1
+    print(f"Converted {converted} files, {failed} failed, {saved / 1e6:.1f} MB saved.")
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    main()
@@ -23,9 +23,15 @@
 #
 
 import logging
-from logging import StreamHandler, FileHandler
+import os
+import threading
+from logging import StreamHandler
+from queue import Empty
+from time import monotonic
 
 from ..log import QueueListener
+from .binary import BinaryWriter, is_binary
+from .compression import compression, open_text
 from ..thread import StoppableThread
 
 log = logging.getLogger(__name__)
@@ -93,27 +99,193 @@ class Listener(StoppableThread):
             self.__class__.__name__, self.port, self.topic, self.should_stop())
 
 
-class Recorder(QueueListener):
+class CSVWriter:
+    """ Appends batches of records to a CSV data file through a buffered
+    stream, compressed according to the extension of the file (see
+    :func:`~pymeasure.experiment.compression.open_text`). The file is opened
+    with the first batch, after the metadata has been stored in the header.
+
+    :param filename: path of the data file, which already holds the header.
+    :param formatter: :class:`.CSVFormatter` of the results.
+    :param mode: mode in which the file is opened.
+    :param encoding: encoding of the file.
+    :param buffering: size of the stream buffer in bytes.
+    """
+
+    def __init__(self, filename, formatter, mode='a', encoding=None, buffering=1 << 16):
+        self.filename = filename
+        self.formatter = formatter
+        self.mode = mode
+        self.encoding = encoding
+        self.buffering = buffering
+        self.stream = None
+
+    def write(self, records):
+        if self.stream is None:
+            if compression(self.filename) is None:
+                self.stream = open(self.filename, self.mode, encoding=self.encoding,
+                                   buffering=self.buffering)
+            else:
+                self.stream = open_text(self.filename, self.mode, encoding=self.encoding)
+        self.stream.write(self.formatter.format_rows(records))
+
+    def flush(self):
+        if self.stream is not None:
+            self.stream.flush()
+
+    def sync(self):
+        """ Flushes the rows and waits until the file is written to disk """
+        if self.stream is not None:
+            self.flush()
+            os.fsync(self.stream.fileno())
+
+    def close(self):
+        if self.stream is not None and not self.stream.closed:
+            self.stream.flush()
+            self.stream.close()
+
+
+class Recorder:
     """ Recorder loads the initial Results for a filepath and
     appends data by listening for it over a queue. The queue
     ensures that no data is lost between the Recorder and Worker.
+    If a :class:`.Catalog` is given, the results are indexed in it when
+    the Recorder is created and again when it is stopped.
+
+    The records are added to the in-memory data of the results as they are
+    handled, while a writer thread drains the queue in batches of up to
+    ``max_rows`` records and writes each batch at once. When the written rows
+    are flushed to the file depends on the durability policy:
+
+    - ``Recorder.FLUSH_POINT``: as soon as the points that arrived are
+      written, so that no point is lost if the program stops;
+    - ``Recorder.FLUSH_INTERVAL``: at the latest ``flush_interval`` seconds
+      after a point arrived, and whenever ``max_rows`` rows are pending;
+    - ``Recorder.SYNC_ON_FINISH``: only when the buffers are full, with the
+      file flushed and synchronized to disk (``fsync``) when the Recorder stops.
+
+    All policies flush the file when the Recorder stops.
+
+    :param results: :class:`.Results` to record.
+    :param queue: queue on which the records arrive; ``None`` stops the Recorder.
+    :param catalog: optional :class:`.Catalog` in which the results are indexed.
+    :param durability: durability policy, see above.
+    :param flush_interval: maximum age in seconds of unflushed rows for
+        ``Recorder.FLUSH_INTERVAL``.
+    :param max_rows: maximum number of rows per batch.
+    :param kwargs: keyword arguments of :class:`CSVWriter`, e.g. ``encoding``.
     """
+    FLUSH_POINT = 'point'
+    FLUSH_INTERVAL = 'interval'
+    SYNC_ON_FINISH = 'finish'
+
+    _sentinel = None
 
-    def __init__(self, results, queue, **kwargs):
+    def __init__(self, results, queue, catalog=None, durability=FLUSH_INTERVAL,
+                 flush_interval=0.1, max_rows=1024, **kwargs):
         """ Constructs a Recorder to record the Procedure data into
         the file path, by waiting for data on the subscription port
         """
-        handlers = []
+        if durability not in (self.FLUSH_POINT, self.FLUSH_INTERVAL, self.SYNC_ON_FINISH):
+            raise ValueError(f"Invalid durability policy '{durability}'")
+        self.results = results
+        self.queue = queue
+        self.catalog = catalog
+        self.durability = durability
+        self.flush_interval = flush_interval
+        self.max_rows = max_rows
+        self._update_catalog(started=True)
+        self.writers = []
         for filename in results.data_filenames:
-            fh = FileHandler(filename=filename, **kwargs)
-            fh.setFormatter(results.formatter)
-            fh.setLevel(logging.NOTSET)
-            handlers.append(fh)
+            if is_binary(filename):
+                self.writers.append(BinaryWriter(filename, results.formatter,
+                                                 chunk_size=max_rows))
+            else:
+                self.writers.append(CSVWriter(filename, results.formatter, **kwargs))
+        self._thread = None
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name="Recorder", daemon=True)
+        self._thread.start()
 
-        super().__init__(queue, *handlers)
+    def is_alive(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def handle(self, record):
+        """ Appends the record to the in-memory data of the results and
+        queues it for the writer thread
+        """
+        self.results.append(record)
+        self.queue.put(record)
+
+    def _batch(self, timeout):
+        """ Returns the queued records, waiting at most ``timeout`` seconds
+        (or indefinitely for None) for the first one, and whether the
+        sentinel was received.
+        """
+        batch = []
+        try:
+            record = self.queue.get(timeout=timeout)
+        except Empty:
+            return batch, False
+        while record is not self._sentinel:
+            batch.append(record)
+            if len(batch) >= self.max_rows:
+                return batch, False
+            try:
+                record = self.queue.get_nowait()
+            except Empty:
+                return batch, False
+        return batch, True
+
+    def _run(self):
+        pending = 0
+        last_flush = monotonic()
+        stopped = False
+        while not stopped:
+            timeout = None
+            if pending and self.durability == self.FLUSH_INTERVAL:
+                timeout = max(last_flush + self.flush_interval - monotonic(), 0)
+            batch, stopped = self._batch(timeout)
+            if batch:
+                self._call("write", batch)
+                pending += len(batch)
+            if not pending or self.durability == self.SYNC_ON_FINISH:
+                continue
+            if (self.durability == self.FLUSH_POINT or pending >= self.max_rows
+                    or monotonic() - last_flush >= self.flush_interval):
+                self._call("flush")
+                pending = 0
+                last_flush = monotonic()
+
+        self._call("sync" if self.durability == self.SYNC_ON_FINISH else "flush")
+        self._call("close")
+
+    def _call(self, method, *args):
+        for writer in self.writers:
+            try:
+                getattr(writer, method)(*args)
+            except Exception:
+                log.exception(f"Could not {method} the data file {writer.filename}")
 
     def stop(self):
-        for handler in self.handlers:
-            handler.close()
+        """ Writes the remaining records, closes the data files and waits
+        for the writer thread to finish
+        """
+        if self.is_alive():
+            self.queue.put(self._sentinel)
+            self._thread.join()
+        else:
+            self._call("close")
+        self._update_catalog(started=False)
 
-        super().stop()
+    def _update_catalog(self, started):
+        if self.catalog is None:
+            return
+        try:
+            if started:
+                self.catalog.experiment_started(self.results)
+            else:
+                self.catalog.experiment_finished(self.results)
+        except Exception:
+            log.exception("Could not update the measurement catalog")
@@ -22,6 +22,7 @@
 # THE SOFTWARE.
 #
 
+import csv
 from decimal import Decimal
 import logging
 import os
@@ -31,11 +32,15 @@ from importlib import import_module
 from importlib.machinery import SourceFileLoader
 from datetime import datetime
 from string import Formatter
+from threading import Lock
 
+import numpy as np
 import pandas as pd
 import pint
 
 from .procedure import Procedure, UnknownProcedure
+from .binary import BinaryFile, binary_to_csv, header_lines, is_binary
+from .compression import compression, decompress, open_text, strip_compression
 from pymeasure.units import ureg
 
 log = logging.getLogger(__name__)
@@ -141,54 +146,211 @@ class CSVFormatter(logging.Formatter):
         :type record: dict
         :return: a string
         """
-        line = []
+        return self.delimiter.join(self.format_value(x, record.get(x, float("nan")))
+                                   for x in self.columns)
+
+    def frame(self, records):
+        """Returns a batch of records as a DataFrame with the columns of the
+        formatter; missing values are NaN.
+
+        Columns holding only floats are float columns, the other columns keep
+        the values as emitted, so that e.g. an int next to a missing value is
+        not turned into a float.
+
+        :param records: list of records (dicts).
+        :return: a DataFrame
+        """
+        data = {}
         for x in self.columns:
-            value = record.get(x, float("nan"))
-            if isinstance(value, (float, int, Decimal)) and type(value) is not bool:
-                line.append(f"{value}")
+            values = [record.get(x, float("nan")) for record in records]
+            floats = set(map(type, values)) <= {float, np.float64}
+            data[x] = pd.Series(values, dtype=float if floats else object)
+        return pd.DataFrame(data, columns=self.columns)
+
+    def convert(self, frame):
+        """Converts the columns of a batch that are not plain numbers.
+
+        The type of every column is decided once per batch: numeric columns
+        are kept as they are, only the values of the other columns (e.g. pint
+        quantities or strings) go through :meth:`format_value`.
+
+        :param frame: DataFrame with the columns of the formatter.
+        :return: a DataFrame
+        """
+        fallback = [x for x in frame.columns
+                    if frame[x].dtype == object or frame[x].dtype == bool]
+        if not fallback:
+            return frame
+        frame = frame.copy()
+        for x in fallback:
+            frame[x] = [value if type(value) is float or type(value) is int
+                        else self.format_value(x, value) for value in frame[x]]
+        return frame
+
+    def format_frame(self, frame, line_break="\n"):
+        """Formats a DataFrame as csv lines, each terminated by a line break.
+
+        The lines are the same as those of :meth:`format`, values are never
+        quoted.
+
+        :param frame: DataFrame with the columns of the formatter.
+        :param line_break: string terminating every line.
+        :return: a string
+        """
+        frame = frame.reindex(columns=self.columns)
+        try:
+            return self.convert(frame).to_csv(
+                None, sep=self.delimiter, header=False, index=False, na_rep="nan",
+                lineterminator=line_break, quoting=csv.QUOTE_NONE)
+        except csv.Error:
+            # values holding the delimiter, quotes or line breaks
+            records = frame.astype(object).to_dict("records")
+            return "".join(self.format(record) + line_break for record in records)
+
+    def format_rows(self, records, line_break="\n"):
+        """Formats a batch of records as csv lines, each terminated by a
+        line break.
+
+        :param records: list of records (dicts) to format.
+        :param line_break: string terminating every line.
+        :return: a string
+        """
+        if not records:
+            return ""
+        return self.format_frame(self.frame(records), line_break)
+
+    def format_value(self, x, value):
+        """Formats the value of a single column, converting quantities to the
+        units of the column.
+
+        :param x: column name.
+        :param value: value to format.
+        :return: a string
+        """
+        if isinstance(value, (float, int, Decimal)) and type(value) is not bool:
+            return f"{value}"
+        units = self.units.get(x, None)
+        if units is not None:
+            if isinstance(value, str):
+                try:
+                    value = ureg.Quantity(value)
+                except pint.UndefinedUnitError:
+                    log.warning(
+                        f"Value {value} for column {x} cannot be parsed to"
+                        f" unit {units}.")
+            if isinstance(value, pint.Quantity):
+                try:
+                    return f"{value.m_as(units)}"
+                except pint.DimensionalityError:
+                    log.warning(
+                        f"Value {value} for column {x} does not have the "
+                        f"right unit {units}.")
+                    return "nan"
+            elif isinstance(value, bool):
+                log.warning(
+                    f"Boolean for column {x} does not have unit {units}.")
+                return "nan"
             else:
-                units = self.units.get(x, None)
-                if units is not None:
-                    if isinstance(value, str):
-                        try:
-                            value = ureg.Quantity(value)
-                        except pint.UndefinedUnitError:
-                            log.warning(
-                                f"Value {value} for column {x} cannot be parsed to"
-                                f" unit {units}.")
-                    if isinstance(value, pint.Quantity):
-                        try:
-                            line.append(f"{value.m_as(units)}")
-                        except pint.DimensionalityError:
-                            line.append("nan")
-                            log.warning(
-                                f"Value {value} for column {x} does not have the "
-                                f"right unit {units}.")
-                    elif isinstance(value, bool):
-                        line.append("nan")
-                        log.warning(
-                            f"Boolean for column {x} does not have unit {units}.")
-                    else:
-                        line.append("nan")
-                        log.warning(
-                            f"Value {value} for column {x} does not have the right"
-                            f" type for unit {units}.")
-                else:
-                    if isinstance(value, pint.Quantity):
-                        if value.units == ureg.dimensionless:
-                            line.append(f"{value.magnitude}")
-                        else:
-                            self.units[x] = value.to_base_units().units
-                            line.append(f"{value.m_as(self.units[x])}")
-                            log.info(f"Column {x} units was set to {self.units[x]}")
-                    else:
-                        line.append(f"{value}")
-        return self.delimiter.join(line)
+                log.warning(
+                    f"Value {value} for column {x} does not have the right"
+                    f" type for unit {units}.")
+                return "nan"
+        if isinstance(value, pint.Quantity):
+            if value.units == ureg.dimensionless:
+                return f"{value.magnitude}"
+            self.units[x] = value.to_base_units().units
+            log.info(f"Column {x} units was set to {self.units[x]}")
+            return f"{value.m_as(self.units[x])}"
+        return f"{value}"
 
     def format_header(self):
         return self.delimiter.join(self.columns)
 
 
+class ResultsBuffer:
+    """ Append-only columnar store of the data emitted by a running
+    :class:`.Procedure`, which lets :class:`.Results` serve the live data
+    without reading the data file.
+
+    Every column is a preallocated NumPy array whose capacity doubles when it
+    is full. Columns hold floats; a column receiving a value that is not a
+    number is converted to an object array.
+
+    :param columns: list of column names.
+    :param formatter: :class:`.CSVFormatter` used to convert values that are
+                      not plain numbers, as they would be written to the file.
+    :param capacity: initial number of rows.
+    """
+
+    def __init__(self, columns, formatter, capacity=1024):
+        self.columns = list(columns)
+        self.formatter = formatter
+        self._arrays = {c: np.empty(capacity, dtype=float) for c in self.columns}
+        self._capacity = capacity
+        self._size = 0
+        self._frame = None
+        self._lock = Lock()
+
+    def __len__(self):
+        return self._size
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        del state['_lock']
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._lock = Lock()
+
+    def _convert(self, column, value):
+        if isinstance(value, (float, int)) and type(value) is not bool:
+            return value
+        value = self.formatter.format_value(column, value)
+        try:
+            return float(value)
+        except ValueError:
+            return value
+
+    def _grow(self):
+        self._capacity *= 2
+        for column, array in self._arrays.items():
+            grown = np.empty(self._capacity, dtype=array.dtype)
+            grown[:self._size] = array[:self._size]
+            self._arrays[column] = grown
+
+    def append(self, record):
+        """ Appends a record emitted under the 'results' topic.
+
+        :param record: dict mapping column names to values.
+        """
+        values = {c: self._convert(c, record.get(c, float("nan"))) for c in self.columns}
+        with self._lock:
+            if self._size == self._capacity:
+                self._grow()
+            for column, value in values.items():
+                array = self._arrays[column]
+                if isinstance(value, str) and array.dtype != object:
+                    array = self._arrays[column] = array.astype(object)
+                array[self._size] = value
+            self._size += 1
+
+    def frame(self):
+        """ Returns the data as a DataFrame of read-only views into the
+        buffer, shared by all readers; copy it before changing values. The
+        frame is cached until new data is appended.
+        """
+        with self._lock:
+            if self._frame is None or len(self._frame) != self._size:
+                views = {}
+                for column in self.columns:
+                    view = self._arrays[column][:self._size]
+                    view.flags.writeable = False
+                    views[column] = view
+                self._frame = pd.DataFrame(views, copy=False)
+            return self._frame
+
+
 class Results:
     """ The Results class provides a convenient interface to reading and
     writing data in connection with a :class:`.Procedure` object.
@@ -197,6 +359,25 @@ class Results:
     :cvar DELIMITER: The character used to delimit the data (default: ,)
     :cvar LINE_BREAK: The character used for line breaks (default \\n)
     :cvar CHUNK_SIZE: The length of the data chuck that is read
+    :cvar METADATA_SIZE: The number of spare characters reserved in the
+                         header for the metadata values (default: 1024)
+
+    If the procedure has metadata, the header of a CSV data file reserves a
+    metadata region of one comment line per metadata and a padding line, which
+    :meth:`store_metadata` fills in place without rewriting the data.
+
+    Deleted rows are kept as tombstones in a sidecar file next to the data
+    file (see :meth:`delete_rows`); :attr:`data` leaves them out, and
+    :meth:`compact` removes them from the data file.
+
+    Data files with the extension of :mod:`~pymeasure.experiment.binary` are
+    stored in the binary format instead of CSV, which is selected per
+    experiment by the filename. CSV data files ending in ``.gz`` or ``.zst``
+    are compressed (see :mod:`~pymeasure.experiment.compression`).
+
+    The data of a new data file is kept in a :class:`.ResultsBuffer`, which
+    the :class:`.Recorder` fills as the data is emitted, so that :attr:`data`
+    does not read the file. Data of existing files is read from disk.
 
     :param procedure: Procedure object
     :param data_filename: The data filename where the data is or should be
@@ -207,6 +388,7 @@ class Results:
     DELIMITER = ','
     LINE_BREAK = "\n"
     CHUNK_SIZE = 1000
+    METADATA_SIZE = 1024
 
     def __init__(self, procedure, data_filename):
         if not isinstance(procedure, Procedure):
@@ -227,16 +409,27 @@ class Results:
         self.data_filename = data_filename
         self.data_filenames = data_filenames
 
+        self._buffer = None
+        self._deleted = np.empty(0, dtype=np.int64)
+        self._visible = None
         if os.path.exists(data_filename):  # Assume header is already written
             self.reload()
             self.procedure.status = Procedure.FINISHED
             # TODO: Correctly store and retrieve status
         else:
             for filename in self.data_filenames:
-                with open(filename, 'w') as f:
+                # Tombstones left by a removed file of the same name
+                if os.path.exists(Results.tombstone_filename(filename)):
+                    os.remove(Results.tombstone_filename(filename))
+            for filename in self.data_filenames:
+                if is_binary(filename):
+                    BinaryFile(filename).create(self.attributes())
+                    continue
+                with open_text(filename, 'w') as f:
                     f.write(self.header())
                     f.write(self.labels())
             self._data = None
+            self._buffer = ResultsBuffer(self.procedure.DATA_COLUMNS, self.formatter)
 
     def __getstate__(self):
         # Get all information needed to reconstruct procedure
@@ -283,11 +476,31 @@ class Results:
         for name, parameter in self.parameters.items():
             h.append("\t{}: {}".format(parameter.name, str(
                 parameter).encode("unicode_escape").decode("utf-8")))
+        metadata = self.procedure.metadata_objects()
+        if metadata:
+            # Reserved region, filled by store_metadata
+            h.append("Metadata:")
+            h.extend([""] * len(metadata))
+            h.append(" " * Results.METADATA_SIZE)
         h.append("Data:")
         self._header_count = len(h)
         h = [Results.COMMENT + line for line in h]  # Comment each line
         return Results.LINE_BREAK.join(h) + Results.LINE_BREAK
 
+    def attributes(self):
+        """ Returns the procedure, parameters, metadata and columns as the
+        attributes of a binary data file
+        """
+        procedure = re.search("'(?P<name>[^']+)'",
+                              repr(self.procedure_class)).group("name")
+        return {
+            "procedure": procedure,
+            "parameters": {parameter.name: str(parameter).encode("unicode_escape").decode("utf-8")
+                           for parameter in self.parameters.values()},
+            "metadata": {},
+            "columns": list(self.procedure.DATA_COLUMNS),
+        }
+
     def labels(self):
         """ Returns the columns labels as a string to be written
         to the file
@@ -300,6 +513,13 @@ class Results:
         """
         return self.formatter.format(data)
 
+    def append(self, record):
+        """ Appends an emitted record to the in-memory data, if the data
+        is kept in memory
+        """
+        if self._buffer is not None:
+            self._buffer.append(record)
+
     def parse(self, line):
         """ Returns a dictionary containing the data from the line """
         data = {}
@@ -323,20 +543,102 @@ class Results:
         return Results.LINE_BREAK.join(m) + Results.LINE_BREAK
 
     def store_metadata(self):
-        """ Inserts the metadata header (if any) into the datafile """
+        """ Stores the metadata (if any) in the datafile. The reserved
+        metadata region of the header is filled in place; a datafile without
+        a (large enough) region gets the metadata header inserted by
+        rewriting the file.
+        """
         c_header = self.metadata()
         if c_header is None:
             return
 
+        inserted = False
         for filename in self.data_filenames:
+            if is_binary(filename):
+                binary = BinaryFile(filename)
+                attributes = binary.attributes()
+                attributes["metadata"] = {
+                    metadata.name: str(metadata).encode("unicode_escape").decode("utf-8")
+                    for metadata in self.procedure.metadata_objects().values()}
+                binary.set_attributes(attributes)
+                continue
+            if compression(filename) is not None:
+                inserted |= self._rewrite_metadata(filename, c_header)
+                continue
+            if self._fill_metadata(filename, c_header):
+                continue
             with open(filename, 'r+') as f:
                 contents = f.readlines()
                 contents.insert(self._header_count - 1, c_header)
 
                 f.seek(0)
                 f.writelines(contents)
+            inserted = True
+
+        if inserted:
+            self._header_count += self._metadata_count
 
-        self._header_count += self._metadata_count
+    def _rewrite_metadata(self, filename, c_header):
+        """ Rewrites a compressed datafile with the metadata in its header,
+        in the reserved metadata region if there is one.
+
+        :return: True if the metadata lines were inserted.
+        """
+        with open_text(filename) as f:
+            contents = f.readlines()
+        lines = c_header.splitlines(keepends=True)
+        data_line = Results.COMMENT + "Data:" + Results.LINE_BREAK
+        inserted = True
+        if lines[0] in contents and data_line in contents:
+            start, end = contents.index(lines[0]), contents.index(data_line)
+            if end - start == len(lines) + 1:
+                # Keep the line count of the region
+                contents[start:end] = lines + [Results.COMMENT + Results.LINE_BREAK]
+                inserted = False
+        if inserted:
+            contents.insert(self._header_count - 1, c_header)
+        with open_text(filename, 'w') as f:
+            f.writelines(contents)
+        return inserted
+
+    @staticmethod
+    def _fill_metadata(filename, c_header):
+        """ Writes the metadata lines over the reserved metadata region of
+        the header. The region keeps its size and its line breaks, so only the
+        header is read and written.
+
+        :return: True if the metadata fitted into the region.
+        """
+        comment = Results.COMMENT.encode()
+        metadata_lines = [line.encode("utf-8") for line in c_header.split(Results.LINE_BREAK)[:-1]]
+        with open(filename, 'r+b') as f:
+            line = f.readline()
+            while line.startswith(comment) and line.rstrip(b"\r\n") != metadata_lines[0]:
+                line = f.readline()
+            if not line.startswith(comment):
+                return False
+            start = f.tell()
+
+            region = []
+            line = f.readline()
+            while line.startswith(comment) and line.rstrip(b"\r\n") != comment + b"Data:":
+                region.append(line)
+                line = f.readline()
+            if not line.startswith(comment) or len(region) != len(metadata_lines):
+                return False
+
+            # Same number of lines with the original line breaks, padded to the size of the region
+            breaks = [line[len(line.rstrip(b"\r\n")):] for line in region]
+            size = sum(len(line) for line in region)
+            filled = [text + end for text, end in zip(metadata_lines[1:], breaks)]
+            padding = size - sum(len(line) for line in filled) - len(breaks[-1]) - len(comment)
+            if padding < 0:
+                return False
+            filled.append(comment + b" " * padding + breaks[-1])
+
+            f.seek(start)
+            f.write(b"".join(filled))
+        return True
 
     @staticmethod
     def parse_header(header, procedure_class=None):
@@ -411,10 +713,15 @@ class Results:
         """ Returns a Results object with the associated Procedure object and
         data
         """
+        if is_binary(data_filename):
+            header = Results.LINE_BREAK.join(header_lines(BinaryFile(data_filename).attributes()))
+            procedure = Results.parse_header(header, procedure_class)
+            return Results(procedure, data_filename)
+
         header = ""
         header_read = False
         header_count = 0
-        with open(data_filename) as f:
+        with open_text(data_filename) as f:
             while not header_read:
                 line = f.readline()
                 if line.startswith(Results.COMMENT):
@@ -427,8 +734,65 @@ class Results:
         results._header_count = header_count
         return results
 
+    @staticmethod
+    def tombstone_filename(data_filename):
+        """ Returns the name of the sidecar file with the deleted rows of
+        a data file
+        """
+        return os.path.splitext(strip_compression(data_filename))[0] + "_deleted.npy"
+
+    @property
+    def deleted_rows(self):
+        """ Sorted array of the deleted rows, as row numbers of the data file """
+        return self._deleted
+
     @property
     def data(self):
+        data = self._read_data()
+        if len(self._deleted) == 0:
+            return data
+        # Filter only when the data or the tombstones changed
+        if self._visible is None or self._visible[0] is not data:
+            keep = np.ones(len(data), dtype=bool)
+            keep[self._deleted[self._deleted < len(data)]] = False
+            self._visible = (data, data[keep].reset_index(drop=True))
+        return self._visible[1]
+
+    def delete_rows(self, rows):
+        """ Marks rows as deleted by storing them in the tombstone sidecar
+        file, without rewriting the data file
+
+        :param rows: positions of the rows in the current :attr:`data`.
+        """
+        keep = np.ones(len(self._read_data()), dtype=bool)
+        keep[self._deleted[self._deleted < len(keep)]] = False
+        self._deleted = np.union1d(self._deleted, np.flatnonzero(keep)[np.asarray(rows, dtype=np.int64)])
+        self._visible = None
+        for filename in self.data_filenames:
+            np.save(Results.tombstone_filename(filename), self._deleted)
+
+    def compact(self):
+        """ Rewrites the data files without the deleted rows and removes
+        the tombstone sidecar files
+        """
+        if len(self._deleted) == 0:
+            return
+        self.write_data(self.data)
+        self._deleted = np.empty(0, dtype=np.int64)
+        self._visible = None
+        for filename in self.data_filenames:
+            if os.path.exists(Results.tombstone_filename(filename)):
+                os.remove(Results.tombstone_filename(filename))
+        self.reload()
+
+    def _read_data(self):
+        if self._buffer is not None:
+            return self._buffer.frame()
+        if is_binary(self.data_filename):
+            # Read again only if rows were appended since the last access
+            if self._data is None or len(self._data) != BinaryFile(self.data_filename).rows():
+                self.reload()
+            return self._data
         # Need to update header count for correct referencing
         if self._header_count == -1:
             self._header_count = len(
@@ -442,15 +806,16 @@ class Results:
                 self._data = pd.DataFrame(columns=self.procedure.DATA_COLUMNS)
         else:  # Concatenate additional data, if any, to already loaded data
             skiprows = len(self._data) + self._header_count
-            chunks = pd.read_csv(
-                self.data_filename,
-                comment=Results.COMMENT,
-                header=0,
-                names=self._data.columns,
-                chunksize=Results.CHUNK_SIZE, skiprows=skiprows, iterator=True
-            )
             try:
-                tmp_frame = pd.concat(chunks, ignore_index=True)
+                with open_text(self.data_filename) as f:
+                    chunks = pd.read_csv(
+                        f,
+                        comment=Results.COMMENT,
+                        header=0,
+                        names=self._data.columns,
+                        chunksize=Results.CHUNK_SIZE, skiprows=skiprows, iterator=True
+                    )
+                    tmp_frame = pd.concat(chunks, ignore_index=True)
                 # only append new data if there is any
                 # if no new data, tmp_frame dtype is object, which override's
                 # self._data's original dtype - this can cause problems plotting
@@ -466,16 +831,58 @@ class Results:
         """ Preforms a full reloading of the file data, neglecting
         any changes in the comments
         """
-        chunks = pd.read_csv(
-            self.data_filename,
-            comment=Results.COMMENT,
-            chunksize=Results.CHUNK_SIZE,
-            iterator=True
-        )
-        try:
-            self._data = pd.concat(chunks, ignore_index=True)
-        except Exception:
-            self._data = chunks.read()
+        self._buffer = None
+        self._visible = None
+        tombstones = Results.tombstone_filename(self.data_filename)
+        if os.path.exists(tombstones):
+            self._deleted = np.load(tombstones)
+        if is_binary(self.data_filename):
+            self._data = BinaryFile(self.data_filename).frame()
+            return
+        # Compressed files are read as one stream across their gzip members or zstd frames
+        with open_text(self.data_filename) as f:
+            chunks = pd.read_csv(
+                f,
+                comment=Results.COMMENT,
+                chunksize=Results.CHUNK_SIZE,
+                iterator=True
+            )
+            try:
+                self._data = pd.concat(chunks, ignore_index=True)
+            except Exception:
+                self._data = chunks.read()
+
+    def write_data(self, data):
+        """ Rewrites the data files with the given data, keeping the header
+        and the metadata
+
+        :param data: DataFrame with the columns of the procedure.
+        """
+        for filename in self.data_filenames:
+            if is_binary(filename):
+                binary = BinaryFile(filename)
+                columns = self.procedure.DATA_COLUMNS
+                values = data.reindex(columns=columns).apply(pd.to_numeric, errors="coerce")
+                binary.create(binary.attributes(), values.to_numpy(dtype=float))
+                continue
+            with open_text(filename, "w") as f:
+                f.write(self.header())
+                f.write(self.labels())
+                f.write(self.formatter.format_frame(data, Results.LINE_BREAK))
+        self.store_metadata()
+
+    def export_csv(self, csv_filename):
+        """ Writes the data with the header and the metadata to a CSV file
+
+        :param csv_filename: path of the CSV file.
+        """
+        if is_binary(self.data_filename):
+            binary_to_csv(self.data_filename, csv_filename, Results.DELIMITER)
+        elif compression(self.data_filename) is not None:
+            decompress(self.data_filename, csv_filename)
+        elif os.path.abspath(csv_filename) != os.path.abspath(self.data_filename):
+            with open(self.data_filename) as source, open(csv_filename, "w") as target:
+                target.writelines(source)
 
     def __repr__(self):
         return "<{}(filename='{}',procedure={},shape={})>".format(
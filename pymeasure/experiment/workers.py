@@ -50,13 +50,15 @@ class Worker(StoppableThread):
     thread, a Recorder is run to write the results to
     """
 
-    def __init__(self, results, log_queue=None, log_level=logging.INFO, port=None):
+    def __init__(self, results, log_queue=None, log_level=logging.INFO, port=None,
+                 catalog=None):
         """ Constructs a Worker to perform the Procedure
         defined in the file at the filepath
         """
         super().__init__()
 
         self.port = port
+        self.catalog = catalog
         if not isinstance(results, Results):
             raise ValueError("Invalid Results object during Worker construction")
         self.results = results
@@ -116,6 +118,8 @@ class Worker(StoppableThread):
             pass  # No dumps defined
         if topic == 'results':
             self.recorder.handle(record)
+            # Tells the display that new rows are available, without the data
+            self.monitor_queue.put(('results', None))
         elif topic == 'status' or topic == 'progress' or topic == 'current_point':
             self.monitor_queue.put((topic, record))
 
@@ -156,7 +160,7 @@ class Worker(StoppableThread):
 
         self.procedure = self.results.procedure
 
-        self.recorder = Recorder(self.results, self.recorder_queue)
+        self.recorder = Recorder(self.results, self.recorder_queue, catalog=self.catalog)
         self.recorder.start()
 
         # locals()[self.procedures_file] = __import__(self.procedures_file)
@@ -126,8 +126,12 @@ class CommonBase:
     # Prefix used to store reserved variables
     __reserved_prefix = "___"
 
+    # Opt-in shadow cache of the last written property values, see :meth:`control`
+    cache_settings = False
+
     def __init__(self, preprocess_reply=None, **kwargs):
         self._special_names = self._setup_special_names()
+        self._setting_cache = {}
         self._create_channels()
         if preprocess_reply is not None:
             warn(("Parameter `preprocess_reply` is deprecated. "
@@ -297,6 +301,21 @@ class CommonBase:
                     f"{name} is a reserved variable name and it cannot be read")
         return super().__getattribute__(name)
 
+    # Setting cache
+    def clear_setting_cache(self):
+        """Forget all cached property values, so that the next set of every property is
+        written to the device again."""
+        self._setting_cache = {}
+
+    def forget_setting(self, set_command):
+        """Forget the cached value of the property with the given `set_command`.
+
+        Call it from methods which change a cached setting by writing to the device directly.
+
+        :param set_command: The `set_command` of the property, as passed to :meth:`control`.
+        """
+        self._setting_cache.pop(set_command, None)
+
     # Channel management
     def add_child(self, cls, id=None, collection="channels", prefix="ch_", attr_name="", **kwargs):
         """Add a child to this instance and return its index in the children list.
@@ -498,6 +517,13 @@ class CommonBase:
             .. deprecated:: 0.12
                 Use `values_kwargs` dictionary parameter instead.
 
+        If the instrument sets ``cache_settings = True``, the last written command of every
+        property is remembered and setting the same value again is not written to the device.
+        The cache is cleared if writing fails or reports errors, and by
+        :meth:`~pymeasure.instruments.Instrument.reset`. Methods writing to the device directly
+        have to call :meth:`forget_setting` (or :meth:`clear_setting_cache`) for the
+        properties they change.
+
         Example of usage of dynamic parameter is as follows:
 
         .. code-block:: python
@@ -615,20 +641,40 @@ class CommonBase:
                     'Values of type `{}` are not allowed '
                     'for CommonBase.control'.format(type(values))
                 )
-            self.write(command_process(set_command) % value)
+            command = command_process(set_command) % value
+            cache = self._setting_cache if getattr(self, "cache_settings", False) else None
+            if cache is not None:
+                if cache.get(set_command) == command:
+                    log.debug(f"Skipping unchanged setting '{command}'.")
+                    return
+                # Forget the value until the write is known to have succeeded
+                cache.pop(set_command, None)
+            try:
+                self.write(command)
+            except Exception:
+                if cache is not None:
+                    self.clear_setting_cache()
+                raise
             if check_set_errors:
                 try:
                     error_list = self.check_set_errors()
                 except Exception as exc:
                     log.error("Exception raised while setting a property with the command "
-                              f"""'{command_process(set_command) % value}': '{str(exc)}'.""")
+                              f"""'{command}': '{str(exc)}'.""")
+                    if cache is not None:
+                        self.clear_setting_cache()
                     raise
                 errors = [str(error) for error in error_list]
                 if errors:
                     log.error(
                         "Error received after trying to set a property with the command "
-                        f"""'{command_process(set_command) % value}': '{"', '".join(errors)}'."""
+                        f"""'{command}': '{"', '".join(errors)}'."""
                     )
+                    if cache is not None:
+                        self.clear_setting_cache()
+                    return
+            if cache is not None:
+                self._setting_cache[set_command] = command
 
         # Add the specified document string to the getter
         fget.__doc__ = docs
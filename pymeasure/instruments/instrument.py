@@ -217,6 +217,7 @@ class Instrument(CommonBase):
         """ Resets the instrument. """
         if self.SCPI:
             self.write("*RST")
+            self.clear_setting_cache()
         else:
             raise NotImplementedError("Non SCPI instruments require implementation in subclasses")
 
@@ -239,6 +240,9 @@ class Instrument(CommonBase):
                     errors.append(err)
                 else:
                     break
+            if errors:
+                # The device state is uncertain after an error, do not trust cached settings
+                self.clear_setting_cache()
             return errors
         else:
             raise NotImplementedError("Non SCPI instruments require implementation in subclasses")
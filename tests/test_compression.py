@@ -0,0 +1,48 @@
+import gzip
+
+import pytest
+
+from pymeasure.experiment import FloatParameter, Procedure, Results
+from pymeasure.experiment.compression import open_text
+from pymeasure.experiment.listeners import CSVWriter
+
+
+class CompressedProcedure(Procedure):
+    amplitude = FloatParameter("Amplitude", default=1.0)
+
+    DATA_COLUMNS = ["Field (Oe)", "Voltage (V)"]
+
+
+def test_unclosed_gzip_file_is_read_up_to_last_flushed_line(tmp_path):
+    filename = str(tmp_path / "data.csv.gz")
+    with open_text(filename, "w") as f:
+        f.write("A,B\n")
+    with open_text(filename, "a") as f:
+        f.write("1,2\n")
+    f = open_text(filename, "a")
+    f.write("3,4\n5,")
+    f.flush()  # left open, as after a crash
+
+    with pytest.raises(EOFError):
+        with gzip.open(filename, "rt") as g:
+            g.read()
+    with open_text(filename) as g:
+        assert g.read() == "A,B\n1,2\n3,4\n"
+    f.close()
+
+
+@pytest.mark.parametrize("extension", ["csv.gz", "csv.zst"])
+def test_results_load_after_crash(tmp_path, extension):
+    if extension == "csv.zst":
+        pytest.importorskip("zstandard")
+    filename = str(tmp_path / f"data.{extension}")
+    results = Results(CompressedProcedure(), filename)
+    writer = CSVWriter(filename, results.formatter)
+    records = [{"Field (Oe)": float(i), "Voltage (V)": 0.5 * i} for i in range(100)]
+    writer.write(records)
+    writer.flush()  # the writer is never closed
+
+    loaded = Results.load(filename, CompressedProcedure)
+    assert len(loaded.data) == len(records)
+    assert list(loaded.data["Voltage (V)"]) == [record["Voltage (V)"] for record in records]
+    writer.close()
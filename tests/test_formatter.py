@@ -0,0 +1,41 @@
+import pytest
+
+from pymeasure.experiment.results import CSVFormatter
+from pymeasure.units import ureg
+
+COLUMNS = ["Index", "Field (Oe)", "Voltage (V)", "Comment", "Valid"]
+
+
+@pytest.fixture
+def records():
+    return [
+        {"Index": 1, "Field (Oe)": 0.1, "Voltage (V)": ureg.Quantity(2, "mV"),
+         "Comment": "ok", "Valid": True},
+        {"Field (Oe)": 1e16, "Voltage (V)": 1e-05, "Comment": "a b"},
+        {"Index": 3, "Field (Oe)": float("nan"), "Voltage (V)": "4 V", "Valid": False},
+        {"Index": 4, "Field (Oe)": 2, "Voltage (V)": 123456789.123456789, "Comment": 5},
+    ]
+
+
+def lines(formatter, records):
+    return "".join(formatter.format(record) + "\n" for record in records)
+
+
+def test_format_rows_matches_format(records):
+    assert CSVFormatter(COLUMNS).format_rows(records) == lines(CSVFormatter(COLUMNS), records)
+
+
+def test_format_rows_keeps_ints_next_to_missing_values(records):
+    assert CSVFormatter(COLUMNS).format_rows(records).splitlines()[0].startswith("1,0.1,")
+
+
+def test_format_rows_does_not_quote(records):
+    records[0]["Comment"] = 'say "hi", then leave'
+    formatter = CSVFormatter(COLUMNS)
+    assert formatter.format_rows(records) == lines(CSVFormatter(COLUMNS), records)
+
+
+def test_format_rows_with_line_break(records):
+    formatter = CSVFormatter(COLUMNS)
+    expected = "".join(formatter.format(record) + "\r\n" for record in records)
+    assert CSVFormatter(COLUMNS).format_rows(records, "\r\n") == expected
@@ -0,0 +1,66 @@
+import pytest
+
+pytest.importorskip("PyQt5")
+np = pytest.importorskip("numpy")
+pd = pytest.importorskip("pandas")
+pg = pytest.importorskip("pyqtgraph")
+
+from packages.point_del_widget import PointDelWidget  # noqa: E402
+from pymeasure.display.curves import ResultsCurve  # noqa: E402
+
+ROWS = ResultsCurve.DOWNSAMPLE_THRESHOLD + 1000
+
+
+class Procedure:
+    status = "Finished"
+
+
+class FakeResults:
+    procedure = Procedure()
+
+    def __init__(self, rows):
+        self.data = pd.DataFrame({"x": np.arange(rows, dtype=float),
+                                  "y": np.sin(np.arange(rows))})
+        self.deleted_rows = np.empty(0, dtype=np.int64)
+        self.deleted = []
+
+    def delete_rows(self, rows):
+        self.deleted.extend(int(row) for row in rows)
+
+
+@pytest.fixture
+def curve():
+    pg.mkQApp()
+    curve = ResultsCurve(FakeResults(ROWS), "x", "y", pen=pg.mkPen(), symbol="o")
+    curve.update_data()
+    return curve
+
+
+def test_large_curve_is_downsampled(curve):
+    assert curve._downsampled
+    assert curve.get_last_x() == ROWS - 1
+
+
+def test_delete_point_from_large_curve(curve):
+    widget = PointDelWidget()
+    curve.set_deletion_mode(True)
+    assert not curve._downsampled
+
+    spots = curve.scatter.points()
+    assert len(spots) == ROWS
+    curve.remove_point(spots[4321], widget)
+    curve.remove_point(curve.scatter.points()[4321], widget)
+
+    xdata, _ = curve.getData()
+    assert len(xdata) == ROWS - 2
+    assert 4321 not in xdata and 4322 not in xdata
+    assert curve.get_last_x() == ROWS - 1
+
+    widget.undo()
+    assert len(curve.getData()[0]) == ROWS - 1
+    curve.remove_point(curve.scatter.points()[5500], widget)
+    widget.storeChanges()
+    assert sorted(curve.results.deleted) == [4321, 5501]
+
+    curve.set_deletion_mode(False)
+    assert curve._downsampled